@@ -29,6 +29,7 @@ from enlighten.device.LaserTemperatureFeature import LaserTemperatureFeature
 from enlighten.device.AmbientTemperatureFeature import AmbientTemperatureFeature
 from enlighten.device.Multispec import Multispec
 from enlighten.device.RegionControlFeature import RegionControlFeature
+from enlighten.device.StreamingAcquisitionFeature import StreamingAcquisitionFeature
 from enlighten.factory.DFUFeature import DFUFeature
 from enlighten.factory.FactoryStripChartFeature import FactoryStripChartFeature
 from enlighten.file_io.Configuration import Configuration
@@ -37,17 +38,23 @@ from enlighten.file_io.HardwareFileOutputManager import HardwareFileOutputManage
 from enlighten.file_io.LoggingFeature import LoggingFeature
 from enlighten.measurement.AreaScanFeature import AreaScanFeature
 from enlighten.measurement.MeasurementFactory import MeasurementFactory
+from enlighten.measurement.MeasurementLoader import MeasurementLoader
 from enlighten.measurement.Measurements import Measurements
 from enlighten.measurement.SaveOptions import SaveOptions
+from enlighten.measurement.SaveQueue import SaveQueue
+from enlighten.measurement.SessionStore import SessionStore
 from enlighten.network.BLEManager import BLEManager
 from enlighten.network.CloudManager import CloudManager
 from enlighten.post_processing.AbsorbanceFeature import AbsorbanceFeature
+from enlighten.post_processing.AsyncProcessingExecutor import AsyncProcessingExecutor
 from enlighten.post_processing.BaselineCorrection import BaselineCorrection
 from enlighten.post_processing.BoxcarFeature import BoxcarFeature
 from enlighten.post_processing.DarkFeature import DarkFeature
+from enlighten.post_processing.DespikingFeature import DespikingFeature
 from enlighten.post_processing.ElectricalDarkCorrectionFeature import ElectricalDarkCorrectionFeature
 from enlighten.post_processing.HorizROIFeature import HorizROIFeature
 from enlighten.post_processing.InterpolationFeature import InterpolationFeature
+from enlighten.post_processing.ProcessingPipeline import ProcessingPipeline
 from enlighten.post_processing.RamanIntensityCorrection import RamanIntensityCorrection
 from enlighten.post_processing.AutoRamanFeature import AutoRamanFeature
 from enlighten.post_processing.ReferenceFeature import ReferenceFeature
@@ -56,11 +63,13 @@ from enlighten.post_processing.ScanAveragingFeature import ScanAveragingFeature
 from enlighten.post_processing.TakeOneFeature import TakeOneFeature
 from enlighten.post_processing.TransmissionFeature import TransmissionFeature
 from enlighten.scope.Cursor import Cursor
+from enlighten.scope.FrameScheduler import FrameScheduler
 from enlighten.scope.Graph import Graph
 from enlighten.scope.GridFeature import GridFeature
 from enlighten.scope.PresetFeature import PresetFeature
 from enlighten.scope.RamanShiftCorrectionFeature import RamanShiftCorrectionFeature
 from enlighten.timing.BatchCollection import BatchCollection
+from enlighten.timing.ProcessingProfiler import ProcessingProfiler
 from enlighten.ui.Authentication import Authentication
 from enlighten.ui.Clipboard import Clipboard
 from enlighten.ui.Colors import Colors
@@ -71,6 +80,7 @@ from enlighten.ui.GuideFeature import GuideFeature
 from enlighten.ui.HelpFeature import HelpFeature
 from enlighten.ui.ImageResources import ImageResources
 from enlighten.ui.Marquee import Marquee
+from enlighten.ui.SessionBrowser import SessionBrowser
 from enlighten.ui.PageNavigation import PageNavigation
 from enlighten.ui.ReadingProgressBar import ReadingProgressBar
 from enlighten.ui.ResourceMonitorFeature import ResourceMonitorFeature
@@ -78,6 +88,7 @@ from enlighten.ui.Sounds import Sounds
 from enlighten.ui.StatusBarFeature import StatusBarFeature
 from enlighten.ui.StatusIndicators import StatusIndicators
 from enlighten.ui.Stylesheets import Stylesheets
+from enlighten.ui.ThumbnailRenderer import ThumbnailRenderer
 from enlighten.ui.VCRControls import VCRControls
 
 class BusinessObjects:
@@ -131,6 +142,7 @@ class BusinessObjects:
         ctl.external_trigger = None
         ctl.file_manager = None
         ctl.focus_listener = None
+        ctl.frame_scheduler = None
         ctl.gain_db_feature = None
         ctl.graph = None
         ctl.grid = None
@@ -151,12 +163,17 @@ class BusinessObjects:
         ctl.logging_feature = None
         ctl.marquee = None
         ctl.measurement_factory = None
+        ctl.measurement_loader = None
         ctl.measurements = None
         ctl.mfg = None
         ctl.model_info = None
         ctl.multispec = None
         ctl.page_nav = None
         ctl.plugin_controller = None
+        ctl.processing_pipeline = None
+        ctl.despiking_feature = None
+        ctl.async_processing = None
+        ctl.processing_profiler = None
         ctl.raman_intensity_correction = None
         ctl.raman_shift_correction = None
         ctl.reference_feature = None
@@ -164,12 +181,17 @@ class BusinessObjects:
         ctl.resource_monitor = None
         ctl.richardson_lucy = None
         ctl.save_options = None
+        ctl.save_queue = None
         ctl.scan_averaging = None
+        ctl.session_browser = None
+        ctl.session_store = None
         ctl.sounds = None
         ctl.status_bar = None
         ctl.status_indicators = None
+        ctl.streaming_acquisition = None
         ctl.stylesheets = None
         ctl.take_one = None
+        ctl.thumbnail_renderer = None
         ctl.transmission = None
         ctl.vcr_controls = None
 
@@ -237,6 +259,9 @@ class BusinessObjects:
         self.header("instantiating Graph")
         ctl.graph = Graph(ctl, name="Scope")
 
+        self.header("instantiating FrameScheduler")
+        ctl.frame_scheduler = FrameScheduler(ctl)
+
         self.header("instantiating HardwareFileOutputManager")
         ctl.hardware_file_manager = HardwareFileOutputManager(ctl)
 
@@ -276,12 +301,27 @@ class BusinessObjects:
         self.header("instantiating SaveOptions")
         ctl.save_options = SaveOptions(ctl)
 
+        self.header("instantiating ThumbnailRenderer")
+        ctl.thumbnail_renderer = ThumbnailRenderer(ctl)
+
         self.header("instantiating MeasurementFactory")
         ctl.measurement_factory = MeasurementFactory(ctl)
 
         self.header("instantiating Measurements")
         ctl.measurements = Measurements(ctl)
 
+        self.header("instantiating SaveQueue")
+        ctl.save_queue = SaveQueue(ctl)
+
+        self.header("instantiating SessionStore")
+        ctl.session_store = SessionStore(ctl)
+
+        self.header("instantiating SessionBrowser")
+        ctl.session_browser = SessionBrowser(ctl)
+
+        self.header("instantiating MeasurementLoader")
+        ctl.measurement_loader = MeasurementLoader(ctl)
+
         self.header("instantiating Authentication")
         ctl.authentication = Authentication(ctl)
 
@@ -334,6 +374,9 @@ class BusinessObjects:
         self.header("instantiating RamanIntensityCorrection")
         ctl.raman_intensity_correction = RamanIntensityCorrection(ctl)
 
+        self.header("instantiating StreamingAcquisitionFeature")
+        ctl.streaming_acquisition = StreamingAcquisitionFeature(ctl)
+
         self.header("instantiating BatchCollection")
         ctl.batch_collection = BatchCollection(ctl)
 
@@ -365,6 +408,18 @@ class BusinessObjects:
         self.header("instantiating RichardsonLucy")
         ctl.richardson_lucy = RichardsonLucy(ctl)
 
+        self.header("instantiating DespikingFeature")
+        ctl.despiking_feature = DespikingFeature(ctl)
+
+        self.header("instantiating ProcessingPipeline")
+        ctl.processing_pipeline = ProcessingPipeline(ctl)
+
+        self.header("instantiating AsyncProcessingExecutor")
+        ctl.async_processing = AsyncProcessingExecutor(ctl)
+
+        self.header("instantiating ProcessingProfiler")
+        ctl.processing_profiler = ProcessingProfiler(ctl)
+
         self.header("instantiating DFUFeature")
         ctl.dfu = DFUFeature(ctl)
 
@@ -379,9 +434,13 @@ class BusinessObjects:
 
         self.header("instantiating AreaScanFeature")
         ctl.area_scan = AreaScanFeature(
+            bt_load                     = cfu.pushButton_area_scan_load,
             bt_save                     = cfu.pushButton_area_scan_save,
             cb_enable                   = cfu.checkBox_area_scan_enable,
             cb_fast                     = cfu.checkBox_area_scan_fast,
+            cb_record                   = cfu.checkBox_area_scan_record,
+            config                      = ctl.config,
+            file_manager                = ctl.file_manager,
             frame_image                 = cfu.frame_area_scan_image,
             frame_live                  = cfu.frame_area_scan_live,
             graphics_view               = cfu.graphicsView_area_scan,
@@ -393,6 +452,7 @@ class BusinessObjects:
             multispec                   = ctl.multispec,
             progress_bar                = cfu.progressBar_area_scan,
             save_options                = ctl.save_options,
+            sb_playback_frame           = cfu.spinBox_area_scan_playback_frame,
             sb_start                    = cfu.spinBox_area_scan_start_line,
             sb_stop                     = cfu.spinBox_area_scan_stop_line,
             sb_delay_ms                 = cfu.spinBox_area_scan_delay_ms,
@@ -97,7 +97,8 @@ class Controller:
                 window_state      = None,
                 start_batch       = False,
                 plugin            = None,
-                password          = None
+                password          = None,
+                stream_spectra    = False
             ):
         """
         All of the parameters are normally set via command-line arguments
@@ -118,6 +119,7 @@ class Controller:
         self.start_batch            = start_batch
         self.plugin                 = plugin 
         self.password               = password
+        self.stream_spectra         = stream_spectra
         self.spec_timeout           = 30
         self.splash                 = splash
         self.form                   = form
@@ -287,6 +289,8 @@ class Controller:
         ########################################################################
 
 
+        self.streaming_acquisition.stop(spec)
+
         log.debug("disconnect_device[%s]: closing", device_id)
         spec.close()
 
@@ -294,6 +298,15 @@ class Controller:
         self.detector_temperature.remove_spec_curve(spec)
         self.laser_temperature.remove_spec_curve(spec)
         self.area_scan.remove_spec_curve(spec)
+        self.processing_pipeline.remove_spec(spec)
+        self.async_processing.remove_spec(spec)
+        self.baseline_correction.remove_spec(spec)
+        self.despiking_feature.remove_spec(spec)
+        self.raman_intensity_correction.remove_spec(spec)
+        self.transmission.remove_spec(spec)
+        self.plugin_controller.remove_spec(spec)
+        self.processing_profiler.remove_spec(spec)
+        self.frame_scheduler.remove_spec(spec)
         if not self.multispec.remove(spec):
             log.error("disconnect_device[%s]: failed to remove from Multispec", device_id)
             return False
@@ -313,6 +326,14 @@ class Controller:
         log.debug("stopping all timers")
         for feature in [ self.batch_collection,
                          self.status_indicators,
+                         self.streaming_acquisition,
+                         self.async_processing,
+                         self.frame_scheduler,
+                         self.measurement_loader,
+                         self.thumbnail_renderer,
+                         self.save_queue,
+                         self.session_store,
+                         self.area_scan,
                          self.plugin_controller,
                          self.ble_manager,
                          self.logging_feature ]:
@@ -910,6 +931,9 @@ class Controller:
             # Not the scan waterfall that is a 2D layout
             self.area_scan.add_spec_curve(spec)
 
+            # high-rate collection (if enabled)
+            self.streaming_acquisition.start(spec)
+
         # scope capture buttons
         if hotplug:
             spec.app_state.paused = False
@@ -1234,6 +1258,11 @@ class Controller:
         generated by the spectrometer, you would need to run at a faster rate.  
         In this case, all we're trying to do is graph "the latest" spectrum from
         the spectrometer, and for that 10Hz seems fine.
+
+        If you DO need every spectrum, enable StreamingAcquisitionFeature 
+        (--stream-spectra), which drains each spectrometer's queue at full rate
+        on a background thread; this method then only samples the latest 
+        Reading for display.
         
         Note that when multiple spectrometers are connected, we actually poll a 
         little slower.
@@ -1520,7 +1549,10 @@ class Controller:
         device_id = spec.device_id
 
         try:
-            spectrometer_response = device.acquire_data()
+            if self.streaming_acquisition.is_streaming(spec):
+                spectrometer_response = self.streaming_acquisition.acquire_data(spec)
+            else:
+                spectrometer_response = device.acquire_data()
             if spectrometer_response.poison_pill:
                 log.error(f"acquire_reading: received poison-pill from spectrometer: {spectrometer_response}") # disposition AFTER displaying user message
 
@@ -1764,13 +1796,11 @@ class Controller:
             # we are reprocessing
             reprocessing = True
 
-        app_state = None
         selected = False
         if spec is None:
             spec = self.multispec.current_spectrometer()
             settings = spec.settings
         if spec is not None:
-            app_state = spec.app_state
             selected = self.multispec.is_selected(spec.device_id)
 
         # don't graph incomplete averages
@@ -1804,97 +1834,40 @@ class Controller:
             self.marquee.error("detector saturated")
 
         ########################################################################
-        # Dark Correction
-        ########################################################################
-
-        if app_state is not None:
-            pr.correct_dark(spec.app_state.dark if dark is None else dark)
-
-        ########################################################################
-        # Cropping
+        # Post-Processing
         ########################################################################
 
-        # This should be done before any processing that involves multiple
-        # pixels, e.g. offset, boxcar, baseline correction, or Richardson-Lucy.
-        # It should be done BEFORE interpolation.
-        self.horiz_roi.process(pr)
-
-        ########################################################################
-        # Reference
-        ########################################################################
-
-        # add reference to ProcessedReading whether or not we're actively in a
-        # reference view, so plugins etc can access it
-        if app_state and app_state.reference is not None:
-            pr.reference = np.copy(spec.app_state.reference)
-        elif ref is not None:
-            pr.reference = np.copy(ref)
-        else:
-            pr.reference = None
-
-        if self.page_nav.using_reference():
-            if self.page_nav.doing_transmission():
-                self.transmission.process(pr, settings, spec.app_state)
-            elif self.page_nav.doing_absorbance():
-                self.absorbance.process(pr, settings, spec.app_state)
-
-        ########################################################################
-        # non-reference views
-        ########################################################################
-
-        else:
-
-            ####################################################################
-            # Raman intensity correction
-            ####################################################################
-
-            # This MUST be done before interpolation.
-            if self.page_nav.doing_raman():
-                self.raman_intensity_correction.process(pr, spec)
-
-            # Dieter goes back and forth on the order of these next two:
-
-            # a potentially better approach might be:
-            # - trim spectrum to useful range
-            # - intensity correction using SRM on nominal wavenumber axis
-            # - BASELINE CORRECTION
-            # - DECONVOLUTION
-            # - wavenumber axis calibration --WP-00413 report, p200
-
-            # If we invert the order of operation, applying the intensity
-            # correction first, then the DECONVOLUTION, and the BASELINE
-            # CORRECTION last, we see a better performance, especially with the
-            # alternate baseline method "ALS". --WP-00413 report, p217
-
-            ####################################################################
-            # baseline correction
-            ####################################################################
-
-            self.baseline_correction.process(pr, spec)
-
-            # on 2020-05-19 Deiter asked this to be moved before cropping
-            # (yet clearly we haven't...)
-            if not self.page_nav.using_reference():
-                self.richardson_lucy.process(pr, spec)
+        # Dark correction, cropping, reference techniques, Raman intensity 
+        # correction, baseline correction, Richardson-Lucy, boxcar and 
+        # interpolation, in that order.  The numeric stages from baseline
+        # correction onward may be finished on a worker thread, in which case
+        # finish_processing is called back on the GUI thread when they're done.
+        job = self.processing_pipeline.start(pr, spec=spec, settings=settings, dark=dark, ref=ref, reading=reading)
+        if not reprocessing and self.async_processing.submit(job, self.finish_processing):
+            return
 
-        # if self.form.ui.checkBox_despike_enable.isChecked():
-        #     pr = self.despiking_feature.process(pr)
+        self.processing_pipeline.finish(job)
+        return self.finish_processing(job, reprocessing=reprocessing)
 
-        ########################################################################
-        # Boxcar Smoothing
-        ########################################################################
+    def finish_processing(self, job, reprocessing=False):
+        """
+        Second half of process_reading, run on the GUI thread once the numeric
+        post-processing stages have completed (possibly asynchronously).
 
-        # One could argue whether boxcar should be before or after interpolation;
-        # however, it currently calls ProcessedReading.set_processed which does
-        # NOT update .interpolated, so for now it must remain before.
-        self.boxcar.process(pr, spec)
+        @param job (Input) PipelineJob from ProcessingPipeline.start
+        @returns ProcessedReading if reprocessing
+        """
+        pr       = job.pr
+        spec     = job.spec
+        settings = job.settings
 
-        ########################################################################
-        # Interpolation
-        ########################################################################
+        app_state = None
+        selected = False
+        if spec is not None:
+            app_state = spec.app_state
+            selected = self.multispec.is_selected(spec.device_id)
 
-        if self.interp.enabled:
-            self.interp.process(pr)
+        self.processing_pipeline.complete(job)
 
         ########################################################################
         # Plugins
@@ -1908,7 +1881,8 @@ class Controller:
         # affect ProcessedReading.processed), we kind of need that to happen 
         # here.
         if self.plugin_controller.enabled:
-            self.plugin_controller.process_reading(pr, settings, spec)
+            with self.processing_profiler.measure(spec, "plugin"):
+                self.plugin_controller.process_reading(pr, settings, spec)
 
         ########################################################################
         # Graph 
@@ -1924,13 +1898,14 @@ class Controller:
         else:
             graphed = False
             if pr.has_processed():
-                if self.graph.in_wavelengths():
-                    graphed = self.set_curve_data(spec.curve, x=pr.get_wavelengths(), y=pr.get_processed(), label="nm")
-                elif self.graph.in_wavenumbers():
-                    graphed = self.set_curve_data(spec.curve, x=pr.get_wavenumbers(), y=pr.get_processed(), label="cm")
-                else:
-                    pixel_axis = pr.get_pixel_axis()
-                    graphed = self.set_curve_data(spec.curve, x=pixel_axis, y=pr.get_processed(), label="px")
+                with self.processing_profiler.measure(spec, "graph"):
+                    if self.graph.in_wavelengths():
+                        graphed = self.set_curve_data(spec.curve, x=pr.get_wavelengths(), y=pr.get_processed(), label="nm")
+                    elif self.graph.in_wavenumbers():
+                        graphed = self.set_curve_data(spec.curve, x=pr.get_wavenumbers(), y=pr.get_processed(), label="cm")
+                    else:
+                        pixel_axis = pr.get_pixel_axis()
+                        graphed = self.set_curve_data(spec.curve, x=pixel_axis, y=pr.get_processed(), label="px")
 
             if not graphed:
                 # This can happen in transmission or absorbance mode before a reference
@@ -1955,7 +1930,8 @@ class Controller:
 
         if selected and self.page_nav.doing_raman():
             # log.debug("process_reading: sending KIA request (reprocessing = %s)", reprocessing)
-            self.kia_feature.process(pr, settings)
+            with self.processing_profiler.measure(spec, "kia"):
+                self.kia_feature.process(pr, settings)
 
         ########################################################################
         # Re-Processing complete
@@ -1987,6 +1963,9 @@ class Controller:
     def set_curve_data(self, curve, y, x=None, label=None):
         """
         Lightweight wrapper over pyqtgraph.PlotCurveItem.setData.
+
+        Updates are drawn via FrameScheduler, so may be deferred to the next
+        display frame.
         
         Checks for case where x[0] is higher than x[1] (happens with a default
         wavecal of [0, 1, 0, 0] and positive excitation in wavenumber space).
@@ -2005,7 +1984,7 @@ class Controller:
 
         if x is None or x == []:
             log.debug(f"set_curve_data[{label}]: no x (y_len {len(y)}, y {y[:5]}, curve {curve})")
-            self.graph.set_data(curve=curve, y=y)
+            self.frame_scheduler.set_data(curve=curve, y=y)
             return True
 
         if len(x) != len(y):
@@ -2021,8 +2000,8 @@ class Controller:
             tmp[0] = x[1] - (x[2] - x[1])
             x = tmp
 
-        log.debug(f"set_curve_data[{label}]: passing to Graph")
-        self.graph.set_data(curve=curve, y=y, x=x, label=label)
+        log.debug(f"set_curve_data[{label}]: passing to FrameScheduler")
+        self.frame_scheduler.set_data(curve=curve, y=y, x=x, label=label)
         return True
 
     # ##########################################################################
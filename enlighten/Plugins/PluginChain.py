@@ -0,0 +1,337 @@
+import copy
+import time
+import logging
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from .PluginModuleInfo import PluginModuleInfo
+from .PluginValidator  import PluginValidator
+
+from EnlightenPlugin import EnlightenPluginBase,        \
+                            EnlightenPluginField,       \
+                            EnlightenPluginResponse,    \
+                            EnlightenPluginConfiguration
+
+log = logging.getLogger(__name__)
+
+##
+# One plugin within a PluginChain, with its latency budget and statistics.
+#
+# Each member has its own single-threaded executor, so (as with PluginWorker)
+# a plugin instance is never asked to process two requests at once.
+class PluginChainMember:
+
+    def __init__(self, module_info, budget_ms):
+        self.module_info = module_info
+        self.budget_ms = budget_ms
+
+        self.label = module_info.module_name
+        self.executor = None
+        self.future = None      # most recent call, possibly still running after its budget
+        self.last_ms = 0
+        self.dropped = 0
+
+    @property
+    def instance(self):
+        return self.module_info.instance
+
+    def is_busy(self):
+        return self.future is not None and not self.future.done()
+
+    def start(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"PluginChain.{self.label}")
+
+    def stop(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def submit(self, request):
+        self.future = self.executor.submit(self.run, request)
+        return self.future
+
+    def run(self, request):
+        plugin = self.instance
+
+        # make the following available to plugin utility functions (functional-api)
+        plugin.settings = request.settings
+        plugin.spectrum = request.processed_reading.get_processed()
+
+        start = time.perf_counter()
+        response = plugin.process_request_obj(request)
+        self.last_ms = (time.perf_counter() - start) * 1000.0
+        return response
+
+    ##
+    # Waits until the member's deadline for its response.
+    #
+    # @returns the response, or None if the budget expired (the call is left to
+    #          finish in the background, and the member skips frames until it does)
+    def wait(self, future, deadline):
+        timeout = None if deadline is None else max(0, deadline - time.perf_counter())
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            log.debug(f"{self.label} exceeded its {self.budget_ms}ms budget, dropping frame")
+            self.dropped += 1
+
+##
+# Runs several plugins over the same ProcessedReading, presenting them to
+# PluginController as a single plugin (so the existing PluginWorker, GUI
+# fields, graphing and response handling all apply unchanged).
+#
+# In "sequence" mode each plugin receives the previous plugin's overrides (e.g.
+# Filters.SavitzkyGolay smoothing "processed" before Analysis.PeakFinding); in
+# "parallel" mode all plugins receive the original reading concurrently.  The
+# members' responses are merged into one EnlightenPluginResponse: series,
+# outputs, overrides and metadata are combined (later plugins win on
+# conflicts), while commands, signals and messages are concatenated.
+#
+# Each member can be given a latency budget.  If it doesn't respond within its
+# budget, its contribution to that frame is dropped rather than holding up the
+# chain (and with block_enlighten, Controller.process_reading); it then
+# skips new frames until the overdue call completes.  Each member's last
+# processing time and dropped-frame count are reported as output fields.
+#
+# Chains are declared in enlighten.ini, one per section beginning with
+# "plugin_chain", and appear in the plugin list as "Chain.<name>":
+#
+# @verbatim
+# [plugin_chain]
+# name = SmoothedPeaks
+# plugins = Filters.SavitzkyGolay, Analysis.PeakFinding
+# mode = sequence
+# budgets_ms = 20, 100
+# @endverbatim
+#
+# budgets_ms may be a single value applied to every member; 0 (the default)
+# means no budget.
+class PluginChain(EnlightenPluginBase):
+
+    MODES = [ "sequence", "parallel" ]
+
+    def __init__(self, ctl, name, members, mode="sequence"):
+        super().__init__(ctl)
+
+        self.chain_name = name
+        self.members = members
+        self.mode = mode if mode in self.MODES else "sequence"
+
+    def get_configuration(self):
+        configs = [ m.module_info.config for m in self.members ]
+
+        fields = []
+        events = {}
+        series_names = []
+        for config in configs:
+            if isinstance(config.fields, dict):
+                for page in config.fields.values():
+                    fields.extend(page)
+            elif config.fields:
+                fields.extend(config.fields)
+            if config.events:
+                events.update(config.events)
+            for name in config.series_names or []:
+                if name not in series_names:
+                    series_names.append(name)
+
+        for m in self.members:
+            fields.append(EnlightenPluginField(name=self.ms_field(m),      datatype="float", direction="output", tooltip=f"{m.label} processing time"))
+            fields.append(EnlightenPluginField(name=self.dropped_field(m), datatype="int",   direction="output", tooltip=f"{m.label} frames dropped for exceeding its budget"))
+
+        other = [ c for c in configs if c.has_other_graph ]
+        return EnlightenPluginConfiguration(
+            name            = self.chain_name,
+            fields          = fields,
+            has_other_graph = len(other) > 0,
+            x_axis_label    = other[0].x_axis_label if other else None,
+            y_axis_label    = other[0].y_axis_label if other else None,
+            is_blocking     = any(c.is_blocking for c in configs),
+            block_enlighten = any(c.block_enlighten for c in configs),
+            streaming       = all(c.streaming for c in configs),
+            multi_devices   = all(c.multi_devices for c in configs),
+            events          = events,
+            series_names    = series_names,
+            graph_type      = configs[0].graph_type if configs else "line")
+
+    @staticmethod
+    def ms_field(member):
+        return f"{member.label} (ms)"
+
+    @staticmethod
+    def dropped_field(member):
+        return f"{member.label} dropped"
+
+    def connect(self):
+        for m in self.members:
+            if not m.instance.connect():
+                self.error_message = f"{m.label} failed to connect: {m.instance.error_message}"
+                return False
+            m.start()
+        return True
+
+    def disconnect(self):
+        for m in self.members:
+            m.stop()
+            try:
+                m.instance.disconnect()
+            except:
+                log.error(f"error disconnecting {m.label}", exc_info=1)
+
+    def process_request_obj(self, request):
+        if self.mode == "parallel":
+            responses = self.run_parallel(request)
+        else:
+            responses = self.run_sequence(request)
+        return self.merge(request, responses)
+
+    def run_sequence(self, request):
+        responses = []
+        current = request
+        for m in self.members:
+            if m.is_busy():
+                m.dropped += 1
+                continue
+
+            response = m.wait(m.submit(current), self.deadline(m, time.perf_counter()))
+            if response is None:
+                continue
+
+            responses.append(response)
+            if response.overrides:
+                current = self.apply_overrides(current, response.overrides)
+        return responses
+
+    def run_parallel(self, request):
+        start = time.perf_counter()
+        pending = []
+        for m in self.members:
+            if m.is_busy():
+                m.dropped += 1
+            else:
+                pending.append((m, m.submit(request)))
+
+        responses = []
+        for m, future in pending:
+            response = m.wait(future, self.deadline(m, start))
+            if response is not None:
+                responses.append(response)
+        return responses
+
+    @staticmethod
+    def deadline(member, start):
+        return start + member.budget_ms / 1000.0 if member.budget_ms > 0 else None
+
+    ##
+    # @returns a copy of the request whose ProcessedReading reflects the given
+    #          overrides (@see PluginController.apply_overrides)
+    @staticmethod
+    def apply_overrides(request, overrides):
+        pr = copy.copy(request.processed_reading)
+        for name in [ "processed", "recordable_dark", "recordable_reference" ]:
+            if name in overrides:
+                setattr(pr, name, overrides[name])
+
+        request = copy.copy(request)
+        request.processed_reading = pr
+        return request
+
+    def merge(self, request, responses):
+        merged = EnlightenPluginResponse(request,
+            commands  = [],
+            metadata  = {},
+            outputs   = {},
+            overrides = {},
+            signals   = [],
+            series    = {})
+        messages = []
+
+        for response in responses:
+            if not PluginValidator.validate_response(response):
+                continue
+            for name in [ "metadata", "outputs", "overrides", "series" ]:
+                value = getattr(response, name)
+                if value:
+                    getattr(merged, name).update(value)
+            for name in [ "commands", "signals" ]:
+                value = getattr(response, name)
+                if value:
+                    getattr(merged, name).extend(value)
+            if response.message:
+                messages.append(response.message)
+
+        for m in self.members:
+            merged.outputs[self.ms_field(m)] = m.last_ms
+            merged.outputs[self.dropped_field(m)] = m.dropped
+
+        if messages:
+            merged.message = " | ".join(messages)
+        for name in [ "commands", "metadata", "overrides", "signals", "series" ]:
+            if not getattr(merged, name):
+                setattr(merged, name, None)
+        return merged
+
+##
+# Presents a PluginChain declared in enlighten.ini to PluginController as if it
+# were another plugin module.
+class PluginChainModuleInfo(PluginModuleInfo):
+
+    SECTION_PREFIX = "plugin_chain"
+
+    def __init__(self, name, members, mode, ctl):
+        super().__init__(pathname=None, package="Chain", filename=f"{name}.py", ctl=ctl)
+        self.members = members # list of PluginChainMember
+        self.mode = mode
+        self.is_chain = True
+
+    ## Configuration.get logs an error for options which are not set
+    @staticmethod
+    def get_option(config, section, key, default):
+        return config.get(section, key) if config.has_option(section, key) else default
+
+    ##
+    # @param module_infos (Input) the PluginModuleInfos found by PluginController
+    # @returns list of PluginChainModuleInfo for each configured chain
+    @staticmethod
+    def from_config(ctl, module_infos):
+        chains = []
+        for section in ctl.config.get_sections():
+            if not section.startswith(PluginChainModuleInfo.SECTION_PREFIX):
+                continue
+
+            get = PluginChainModuleInfo.get_option
+            names = [ s.strip() for s in get(ctl.config, section, "plugins", "").split(",") if s.strip() ]
+            budgets_ms = get(ctl.config, section, "budgets_ms", "0")
+            try:
+                budgets = [ float(s) for s in budgets_ms.split(",") if s.strip() ]
+            except ValueError:
+                log.error(f"ignoring [{section}] (invalid budgets_ms {budgets_ms})")
+                continue
+            if len(budgets) == 1:
+                budgets = budgets * len(names)
+
+            missing = [ name for name in names if name not in module_infos ]
+            if len(names) < 2 or missing or len(budgets) != len(names):
+                log.error(f"ignoring [{section}] (plugins {names}, missing {missing}, budgets_ms {budgets})")
+                continue
+
+            name = get(ctl.config, section, "name", "+".join(module_infos[n].module_name for n in names))
+            mode = get(ctl.config, section, "mode", "sequence").lower()
+            members = [ PluginChainMember(module_infos[n], b) for n, b in zip(names, budgets) ]
+            chains.append(PluginChainModuleInfo(name, members, mode, ctl))
+        return chains
+
+    def load(self):
+        for m in self.members:
+            if not m.module_info.load():
+                log.error(f"unable to load chain member {m.label}")
+                return False
+
+        self.name = self.full_module_name
+        self.instance = PluginChain(self.ctl, name=self.module_name, members=self.members, mode=self.mode)
+        self.config = self.instance.get_configuration_obj()
+
+        if not PluginValidator.validate_config(self.config, self):
+            log.error("invalid configuration")
+            return False
+        return True
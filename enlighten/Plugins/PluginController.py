@@ -1,6 +1,6 @@
 import os
 import sys
-import copy
+import datetime
 import shutil
 import logging
 import pyqtgraph
@@ -10,8 +10,11 @@ import numpy as np
 from time import sleep
 from queue import Queue
 
+from .PluginChain       import PluginChainModuleInfo
 from .PluginFieldWidget import PluginFieldWidget
 from .PluginModuleInfo  import PluginModuleInfo
+from .PluginProcessWorker import PluginProcessWorker
+from .PluginSnapshots   import PluginSnapshots
 from .PluginValidator   import PluginValidator
 from .PluginWorker      import PluginWorker
 from .TableModel        import TableModel
@@ -139,6 +142,13 @@ class PluginController:
         log.debug("instantiating PluginController")
         self.clear()
 
+        self.snapshots = PluginSnapshots(ctl, section=self.SECTION)
+
+        # optionally run plugins in a child process (@see PluginProcessWorker)
+        self.process_isolation = ctl.config.get_bool(self.SECTION, "process_isolation", default=False)
+        self.shm_slots         = ctl.config.get_int (self.SECTION, "shared_memory_slots", default=4)
+        self.shm_slot_kb       = ctl.config.get_int (self.SECTION, "shared_memory_slot_kb", default=1024)
+
         # widgets
         self.button_process             = cfu.pushButton_plugin_process
         self.cb_connected               = cfu.checkBox_plugin_connected
@@ -289,6 +299,12 @@ class PluginController:
                 except Exception as e:
                     log.error(f"problem accessing file {file} of {e}")
                     continue
+
+        # add any plugin chains declared in enlighten.ini
+        for chain in PluginChainModuleInfo.from_config(self.ctl, module_infos):
+            log.debug(f"find_all_plugins: added chain {chain.full_module_name}")
+            module_infos[chain.full_module_name] = chain
+
         return module_infos
 
     def populate_plugin_list(self):
@@ -522,11 +538,21 @@ class PluginController:
             return False
         module_name = module_info.module_name
 
-        log.debug("create_worker: creating")
-        self.worker = PluginWorker(
-            request_queue   = self.request_queue,
-            response_queue  = self.response_queue,
-            module_info     = module_info)
+        isolated = self.process_isolation or getattr(module_info.config, "process_isolated", False)
+        if isolated and not module_info.is_chain: # chain members run in-process
+            log.debug("create_worker: creating process-isolated worker")
+            self.worker = PluginProcessWorker(
+                request_queue   = self.request_queue,
+                response_queue  = self.response_queue,
+                module_info     = module_info,
+                slots           = self.shm_slots,
+                slot_bytes      = self.shm_slot_kb * 1024)
+        else:
+            log.debug("create_worker: creating")
+            self.worker = PluginWorker(
+                request_queue   = self.request_queue,
+                response_queue  = self.response_queue,
+                module_info     = module_info)
 
         log.debug("create_worker: setting daemon")
         self.worker.setDaemon(True)
@@ -904,6 +930,10 @@ class PluginController:
             self.disconnect()
             return False
 
+    def remove_spec(self, spec):
+        """ called by Controller.disconnect_device """
+        self.snapshots.remove_spec(spec)
+
     def get_current_settings(self):
         config = self.get_current_configuration()
         plugin_fields = { pfw.field_name: pfw.field_value for pfw in self.plugin_field_widgets }
@@ -915,9 +945,11 @@ class PluginController:
     ##
     # Processes any queued responses, then sends the new request.
     #
-    # Note that we make deep copies of both settings and the processed_reading, 
-    # to minimize opportunities for bugs / exploits in plugins that could 
-    # break ENLIGHTEN.  This is a performance hit, but oh well.
+    # Note that plugins receive read-only snapshots of both settings and the
+    # processed_reading, to minimize opportunities for bugs / exploits in
+    # plugins that could break ENLIGHTEN, without deep-copying every frame.
+    #
+    # @see PluginSnapshots
     #
     # @returns true if new EnlightenPluginRequest successfully sent to plugin
     def process_reading(self, processed_reading, settings, spec, manual=False):
@@ -959,13 +991,15 @@ class PluginController:
             plugin_fields = self.get_current_settings()
 
             self.mut.lock() # avoid duplicate request_ids
-            # Send COPIES of SpectrometerSettings and the ProcessedReading,
+            # Send SNAPSHOTS of SpectrometerSettings and the ProcessedReading,
             # to reduce opportunities for plugin bugs to screw-up ENLIGHTEN.
+            settings_copy = self.snapshots.get_settings(settings, spec)
             request = EnlightenPluginRequest(
                 request_id          = self.next_request_id,
                 spec                = spec,
-                settings            = copy.deepcopy(settings),
-                processed_reading   = copy.deepcopy(processed_reading),
+                settings            = settings_copy,
+                processed_reading   = self.snapshots.freeze(processed_reading, settings_copy),
+                creation_time       = datetime.datetime.now(),
                 fields              = plugin_fields
             )
             self.next_request_id += 1
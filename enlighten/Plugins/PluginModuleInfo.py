@@ -43,6 +43,7 @@ class PluginModuleInfo:
         self.instance = None                # a single instance of Foo.Foo() 
         self.config = None                  # an instance of EnlightenPluginConfiguration
         self.name = None
+        self.is_chain = False                 # @see PluginChainModuleInfo
 
         self.ctl = ctl
 
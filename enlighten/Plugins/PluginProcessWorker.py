@@ -0,0 +1,414 @@
+import sys
+import copy
+import queue
+import logging
+import threading
+import traceback
+import importlib.util
+import multiprocessing
+import numpy as np
+
+from .PluginSnapshots    import PluginSnapshots
+from .PluginWorker       import PluginWorker
+from .SharedSpectrumRing import SharedSpectrumRing
+
+log = logging.getLogger(__name__)
+
+##
+# Everything the child process needs to re-import and run the plugin.  (The
+# PluginModuleInfo itself can't be sent, as the loaded instance holds ctl.)
+class PluginProcessArgs:
+
+    def __init__(self, module_info, ring_name, slots, slot_bytes, log_level, sys_path):
+        self.pathname         = module_info.pathname
+        self.full_module_name = module_info.full_module_name
+        self.module_name      = module_info.module_name
+        self.ring_name        = ring_name
+        self.slots            = slots
+        self.slot_bytes       = slot_bytes
+        self.log_level        = log_level
+        self.sys_path         = sys_path
+
+##
+# An alternative to PluginWorker which hosts the plugin in a child process, so
+# CPU-heavy plugins (RamanID, PeakFinding, LocalBaseline...) don't contend with
+# the Qt GUI thread for the GIL.
+#
+# From PluginController's perspective this behaves exactly like PluginWorker:
+# it is a Thread reading EnlightenPluginRequests from request_queue and
+# writing EnlightenPluginResponses (or an upstream poison-pill) to
+# response_queue.  Internally the thread forwards each request to the child:
+#
+# - ProcessedReading arrays (processed, raw, dark, reference, x-axes...,
+#   including those of .cropped, .interpolated and .reading) are written into a
+#   free slot of a SharedSpectrumRing, so only small descriptors are pickled
+#   (any which don't fit in the slot are pickled as usual); the child unpacks
+#   them read-only, except processed, which it copies so plugins may edit it
+#   in-place (see PluginSnapshots.WRITEABLE_FIELDS);
+# - SpectrometerSettings are only pickled when the request carries a different
+#   settings object than the last one sent (see PluginSnapshots);
+# - the child re-assembles an equivalent EnlightenPluginRequest and calls the
+#   plugin's process_request_obj() as PluginWorker would.
+#
+# A second thread reads responses back from the child, re-attaches the
+# original request (including the Spectrometer, which can't cross processes)
+# and releases the slot, so up to "slots" requests can be in flight at once.
+#
+# Because the plugin runs in another process it has no access to ENLIGHTEN
+# itself: its ctl is None, request.spec is None, and GUI helpers such as
+# EnlightenPluginBase.plot(x=None) or get_axis() are unavailable.  Plugins
+# therefore opt-in via EnlightenPluginConfiguration.process_isolated (or it
+# can be forced for all plugins via enlighten.ini):
+#
+# @verbatim
+# [plugins]
+# process_isolation = True
+# shared_memory_slots = 4
+# shared_memory_slot_kb = 1024
+# @endverbatim
+class PluginProcessWorker(threading.Thread):
+
+    JOIN_TIMEOUT_SEC = 5
+
+    def __init__(self, request_queue, response_queue, module_info, slots=4, slot_bytes=1024*1024):
+        threading.Thread.__init__(self)
+
+        self.request_queue  = request_queue
+        self.response_queue = response_queue
+        self.module_info    = module_info
+        self.slots          = max(1, slots)
+        self.slot_bytes     = slot_bytes
+        self.error_message  = None
+
+        self.ring = None
+        self.process = None
+        self.req_send = None
+        self.resp_recv = None
+        self.reader = None
+
+        self.free_slots = queue.Queue()
+        self.in_flight = {}     # request_id -> (slot, EnlightenPluginRequest)
+        self.lock = threading.Lock()
+        self.last_settings = None
+        self.stopping = False
+
+        if self.module_info is None:
+            log.critical("module_info cannot be None")
+
+    def run(self):
+        if self.module_info is None:
+            return
+
+        module_name = self.module_info.module_name
+        try:
+            self.spawn()
+        except:
+            log.critical(f"PluginProcessWorker[{module_name}] failed to spawn", exc_info=1)
+            self.error_message = traceback.format_exc()
+            self.shutdown()
+            self.response_queue.put_nowait(None)
+            return
+
+        while True:
+            request = self.request_queue.get(block=True)
+            if request is None:
+                log.critical("PluginProcessWorker[%s] received poison-pill", module_name)
+                break
+
+            if not self.reader.is_alive():
+                break
+
+            try:
+                self.send(request)
+            except:
+                log.critical(f"PluginProcessWorker[{module_name}] failed to send request {request.request_id}", exc_info=1)
+                self.error_message = traceback.format_exc()
+                self.response_queue.put_nowait(None)
+                break
+
+        self.shutdown()
+        log.info("PluginProcessWorker[%s] done", module_name)
+
+    def spawn(self):
+        self.ring = SharedSpectrumRing(self.slots, self.slot_bytes)
+        for slot in range(self.slots):
+            self.free_slots.put(slot)
+
+        ctx = multiprocessing.get_context("spawn")
+        req_recv, self.req_send = ctx.Pipe(duplex=False)
+        self.resp_recv, resp_send = ctx.Pipe(duplex=False)
+
+        args = PluginProcessArgs(
+            module_info = self.module_info,
+            ring_name   = self.ring.name,
+            slots       = self.slots,
+            slot_bytes  = self.slot_bytes,
+            log_level   = logging.getLogger().getEffectiveLevel(),
+            sys_path    = list(sys.path))
+
+        log.debug(f"spawning plugin process for {self.module_info.full_module_name}")
+        self.process = ctx.Process(target=run_plugin_process, args=(args, req_recv, resp_send), name=f"Plugin.{self.module_info.module_name}", daemon=True)
+        self.process.start()
+
+        # the child keeps its own ends
+        req_recv.close()
+        resp_send.close()
+
+        self.reader = threading.Thread(target=self.read_responses, name="PluginProcessWorker.reader", daemon=True)
+        self.reader.start()
+
+    def send(self, request):
+        # wait for a free slot, unless the child has gone away meanwhile
+        while True:
+            try:
+                slot = self.free_slots.get(timeout=1)
+                break
+            except queue.Empty:
+                if not self.reader.is_alive():
+                    raise Exception("plugin process exited")
+
+        skeleton, arrays = self.split_reading(request.processed_reading)
+        descriptors, leftovers = self.ring.pack(slot, arrays)
+
+        settings = None
+        if request.settings is not self.last_settings:
+            settings = request.settings
+            self.last_settings = request.settings
+
+        with self.lock:
+            self.in_flight[request.request_id] = (slot, request)
+
+        self.req_send.send({
+            "request_id":    request.request_id,
+            "slot":          slot,
+            "descriptors":   descriptors,
+            "leftovers":     leftovers,
+            "reading":       skeleton,
+            "settings":      settings,
+            "new_settings":  settings is not None,
+            "fields":        request.fields,
+            "creation_time": request.creation_time })
+
+    ##
+    # @returns (skeleton, arrays) where skeleton is a shallow copy of pr (and
+    #          its children) with array attributes removed, and arrays a dict
+    #          of (child, attribute) -> array
+    @staticmethod
+    def split_reading(pr):
+        if pr is None:
+            return None, {}
+
+        arrays = {}
+        skeleton = copy.copy(pr)
+        skeleton.settings = None
+
+        objs = { None: skeleton }
+        for name in PluginSnapshots.CHILD_FIELDS + [ "reading" ]:
+            child = getattr(skeleton, name, None)
+            if child is not None:
+                child = copy.copy(child)
+                if hasattr(child, "settings"):
+                    child.settings = None
+                setattr(skeleton, name, child)
+                objs[name] = child
+
+        for obj_name, obj in objs.items():
+            for field in PluginSnapshots.ARRAY_FIELDS + PluginSnapshots.WRITEABLE_FIELDS:
+                a = getattr(obj, field, None)
+                if a is not None:
+                    arrays[(obj_name, field)] = a
+                    setattr(obj, field, None)
+
+        return skeleton, arrays
+
+    @staticmethod
+    def join_reading(skeleton, arrays, settings):
+        if skeleton is None:
+            return
+        for (obj_name, field), a in arrays.items():
+            obj = skeleton if obj_name is None else getattr(skeleton, obj_name)
+            if field in PluginSnapshots.WRITEABLE_FIELDS and isinstance(a, np.ndarray) and not a.flags.writeable:
+                a = np.array(a)
+            setattr(obj, field, a)
+        for obj in [ skeleton, skeleton.cropped, skeleton.interpolated ]:
+            if obj is not None:
+                obj.settings = settings
+        return skeleton
+
+    def read_responses(self):
+        """ runs on the reader thread """
+        module_name = self.module_info.module_name
+        while True:
+            try:
+                msg = self.resp_recv.recv()
+            except (EOFError, OSError):
+                log.debug(f"PluginProcessWorker[{module_name}] response pipe closed")
+                if not self.stopping:
+                    # the child died without telling us why
+                    self.error_message = f"plugin process for {module_name} exited unexpectedly"
+                    self.response_queue.put_nowait(None)
+                break
+
+            kind = msg[0]
+            if kind == "connected":
+                _, ok, error_message = msg
+                if not ok:
+                    log.error(f"plugin {module_name} failed to connect (error_message = {error_message})")
+                    self.error_message = error_message
+                    self.response_queue.put_nowait(None)
+                    break
+                log.debug(f"plugin {module_name} connected in process {self.process.pid}")
+
+            elif kind == "response":
+                _, request_id, response = msg
+                with self.lock:
+                    slot, request = self.in_flight.pop(request_id, (None, None))
+                if slot is not None:
+                    self.free_slots.put(slot)
+                response.request = request
+                self.response_queue.put_nowait(response)
+
+            elif kind == "slot":
+                # child has finished reading a slot, but has no response yet
+                with self.lock:
+                    slot, request = self.in_flight.get(msg[1], (None, None))
+                    if slot is not None:
+                        self.in_flight[msg[1]] = (None, request)
+                if slot is not None:
+                    self.free_slots.put(slot)
+
+            elif kind == "event":
+                self.response_queue.put_nowait(msg[1])
+
+            elif kind == "error":
+                _, request_id, error_message = msg
+                log.critical(f"PluginProcessWorker[{module_name}] caught exception processing request {request_id}, closing")
+                self.error_message = error_message
+                self.response_queue.put_nowait(None)
+                break
+
+    def shutdown(self):
+        self.stopping = True
+        if self.req_send is not None:
+            try:
+                self.req_send.send(None)
+            except:
+                pass
+
+        if self.process is not None:
+            self.process.join(self.JOIN_TIMEOUT_SEC)
+            if self.process.is_alive():
+                log.error(f"plugin process {self.process.pid} didn't exit, terminating")
+                self.process.terminate()
+                self.process.join(self.JOIN_TIMEOUT_SEC)
+            self.process = None
+
+        for conn in [ self.req_send, self.resp_recv ]:
+            if conn is not None:
+                try:
+                    conn.close()
+                except:
+                    pass
+        self.req_send = None
+
+        if self.reader is not None:
+            self.reader.join(self.JOIN_TIMEOUT_SEC)
+
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+##
+# Child process entry point: load the plugin, connect, then service requests
+# until a poison-pill (None) arrives or the pipe closes.
+def run_plugin_process(args, req_recv, resp_send):
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(processName)s %(name)s %(levelname)s %(message)s")
+
+    for path in args.sys_path:
+        if path not in sys.path:
+            sys.path.append(path)
+
+    ring = SharedSpectrumRing(args.slots, args.slot_bytes, name=args.ring_name)
+    plugin = None
+    try:
+        plugin = load_plugin(args)
+        ok = plugin.connect()
+        error_message = None if ok else plugin.error_message
+    except:
+        ok = False
+        error_message = traceback.format_exc()
+
+    resp_send.send(("connected", ok, error_message))
+    if not ok:
+        ring.close()
+        return
+
+    from EnlightenPlugin import EnlightenPluginRequest
+
+    settings = None
+    has_event_responses = True
+    while True:
+        # relay self-generated event responses (@see PluginWorker)
+        if has_event_responses:
+            try:
+                for event in plugin.get_event_responses():
+                    resp_send.send(("event", event))
+                plugin.clear_event_responses()
+            except:
+                has_event_responses = False
+
+        try:
+            if has_event_responses and not req_recv.poll(PluginWorker.EVENT_POLL_SEC):
+                continue
+            msg = req_recv.recv()
+        except (EOFError, OSError):
+            break
+
+        if msg is None:
+            break
+
+        request_id = msg["request_id"]
+        try:
+            arrays = ring.unpack(msg["slot"], msg["descriptors"])
+            resp_send.send(("slot", request_id))
+            arrays.update(msg["leftovers"])
+
+            if msg["new_settings"]:
+                settings = msg["settings"]
+
+            request = EnlightenPluginRequest(
+                request_id        = request_id,
+                spec              = None,
+                settings          = settings,
+                processed_reading = PluginProcessWorker.join_reading(msg["reading"], arrays, settings),
+                creation_time     = msg["creation_time"],
+                fields            = msg["fields"])
+
+            # make the following available to plugin utility functions (functional-api)
+            plugin.settings = request.settings
+            plugin.spectrum = request.processed_reading.get_processed()
+
+            response = plugin.process_request_obj(request)
+            if response is not None:
+                response.request = None # re-attached by the parent
+            resp_send.send(("response", request_id, response))
+        except:
+            resp_send.send(("error", request_id, traceback.format_exc()))
+            break
+
+    try:
+        plugin.disconnect()
+    except:
+        pass
+    ring.close()
+
+def load_plugin(args):
+    """ @see PluginModuleInfo.load """
+    spec = importlib.util.spec_from_file_location(args.full_module_name, args.pathname)
+    module_obj = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module_obj)
+
+    instance = getattr(module_obj, args.module_name)(None)
+    instance.running_isolated = True
+    instance.get_configuration_obj()
+    return instance
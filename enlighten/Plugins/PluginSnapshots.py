@@ -0,0 +1,164 @@
+import copy
+import time
+import logging
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+##
+# Builds the (read-only) copies of SpectrometerSettings and ProcessedReading
+# which PluginController passes to plugins in each EnlightenPluginRequest.
+#
+# PluginController used to copy.deepcopy() both on every frame, so that a buggy
+# plugin couldn't corrupt ENLIGHTEN's own state.  At full frame rate with a
+# plugin like Analysis.StatsBuffer, those deep copies were the dominant cost.
+# Instead:
+#
+# - ProcessedReading arrays are passed as non-writeable numpy views of
+#   ENLIGHTEN's own buffers (a list is converted to an array once).  Any
+#   attempt by a plugin to modify them in-place raises ValueError rather than
+#   silently changing ENLIGHTEN's data.  The exception is processed, which
+#   plugins (e.g. Analysis.Despiking) commonly edit in-place: each request gets
+#   its own writeable copy of that one array, which is cheap next to a deep
+#   copy.  The ProcessedReading object itself (and its cropped/interpolated
+#   children) are shallow copies, so plugins may still re-assign attributes
+#   freely.
+#
+# - SpectrometerSettings are deep-copied only when Spectrometer.settings_version
+#   changes (every change_device_setting, including EEPROM updates), when the
+#   x-axis arrays are regenerated, or after max_age_sec as a safety net for
+#   anything updating settings in-place.  Successive requests share the same
+#   copy, which plugins should treat as read-only.
+#
+# ENLIGHTEN doesn't modify a ProcessedReading's arrays in-place once it has
+# been sent to plugins (later changes, like plugin overrides, re-assign them),
+# so the views remain stable for the life of the request.
+#
+# @verbatim
+# [plugins]
+# settings_max_age_sec = 1.0
+# @endverbatim
+class PluginSnapshots:
+
+    ## ProcessedReading (and wasatch.Reading) attributes passed as frozen arrays
+    ARRAY_FIELDS = [ "raw",
+                     "dark",
+                     "reference",
+                     "wavelengths",
+                     "wavenumbers",
+                     "recordable_dark",
+                     "recordable_reference",
+                     "spectrum" ]
+
+    ## ProcessedReading attributes passed as writeable copies instead
+    WRITEABLE_FIELDS = [ "processed" ]
+
+    ## nested ProcessedReadings which are frozen recursively
+    CHILD_FIELDS = [ "cropped", "interpolated" ]
+
+    def __init__(self, ctl, section="plugins"):
+        self.ctl = ctl
+
+        self.max_age_sec = self.ctl.config.get_float(section, "settings_max_age_sec", default=1.0)
+        self.settings_cache = {} # device_id -> (key, timestamp, SpectrometerSettings copy)
+
+    def clear(self):
+        self.settings_cache = {}
+
+    def remove_spec(self, spec):
+        if spec is not None:
+            self.settings_cache.pop(spec.device_id, None)
+
+    ##
+    # @param settings (Input) SpectrometerSettings to copy
+    # @param spec     (Input) owning Spectrometer (if None, always deep-copies)
+    # @returns a (possibly cached) deep copy of settings
+    def get_settings(self, settings, spec=None):
+        if settings is None:
+            return
+        if spec is None:
+            return copy.deepcopy(settings)
+
+        key = (spec.settings_version, settings, settings.wavelengths, settings.wavenumbers)
+        now = time.monotonic()
+
+        cached = self.settings_cache.get(spec.device_id, None)
+        if cached is not None:
+            cached_key, timestamp, snapshot = cached
+            if now - timestamp < self.max_age_sec and len(key) == len(cached_key) and all(a is b for a, b in zip(key, cached_key)):
+                return snapshot
+
+        snapshot = copy.deepcopy(settings)
+        self.settings_cache[spec.device_id] = (key, now, snapshot)
+        return snapshot
+
+    ##
+    # @param pr       (Input) ProcessedReading to snapshot
+    # @param settings (Input) optional settings copy to attach (e.g. from get_settings)
+    # @returns a shallow copy of pr whose arrays are read-only
+    def freeze(self, pr, settings=None):
+        if pr is None:
+            return
+
+        frozen = copy.copy(pr)
+        self.freeze_arrays(frozen)
+        self.copy_arrays(frozen)
+
+        for name in self.CHILD_FIELDS:
+            child = getattr(frozen, name, None)
+            if child is not None:
+                setattr(frozen, name, self.freeze(child, settings))
+
+        reading = getattr(frozen, "reading", None)
+        if reading is not None:
+            frozen.reading = copy.copy(reading)
+            self.freeze_arrays(frozen.reading)
+
+        if getattr(frozen, "settings", None) is not None and settings is not None:
+            frozen.settings = settings
+
+        metadata = getattr(frozen, "plugin_metadata", None)
+        if metadata is not None:
+            frozen.plugin_metadata = copy.deepcopy(metadata)
+
+        return frozen
+
+    def freeze_arrays(self, obj):
+        for name in self.ARRAY_FIELDS:
+            a = getattr(obj, name, None)
+            if a is not None:
+                setattr(obj, name, self.read_only(a))
+
+    def copy_arrays(self, obj):
+        for name in self.WRITEABLE_FIELDS:
+            a = getattr(obj, name, None)
+            if a is not None:
+                setattr(obj, name, self.writeable(a))
+
+    @staticmethod
+    def writeable(a):
+        """ @returns a writeable copy of a (as an array where possible) """
+        try:
+            copied = np.array(a)
+        except:
+            return copy.deepcopy(a)
+        if copied.dtype == object:
+            return copy.deepcopy(a)
+        return copied
+
+    @staticmethod
+    def read_only(a):
+        """ @returns a non-writeable array sharing a's buffer where possible """
+        if isinstance(a, np.ndarray):
+            if not a.flags.writeable:
+                return a
+            view = a.view()
+        else:
+            try:
+                view = np.array(a)
+            except:
+                return copy.deepcopy(a)
+            if view.dtype == object:
+                return copy.deepcopy(a)
+        view.flags.writeable = False
+        return view
@@ -1,4 +1,4 @@
-import time
+import queue
 import logging
 import threading
 import traceback
@@ -11,8 +11,14 @@ log = logging.getLogger(__name__)
 # which remain connected to the PluginController which spawned the worker.  The
 # run() method loops indefinitely, relaying requests and responses between the 
 # Controller and plugin, until closed by a poison-pill from either end.
+#
+# The worker blocks on the request queue, so it wakes as soon as a request (or
+# poison-pill) arrives rather than polling.  Only while the plugin supports
+# event responses does it also wake every EVENT_POLL_SEC to relay them.
 class PluginWorker(threading.Thread):
 
+    EVENT_POLL_SEC = 0.01
+
     ##
     # Actually instantiates the plugin.
     def __init__(self, request_queue, response_queue, module_info):
@@ -53,8 +59,6 @@ class PluginWorker(threading.Thread):
         log.debug(f"connected successfully")
 
         while True:
-            time.sleep(0.01)
-
             if self.has_event_responses:
                 # MZ: event responses seem to be self-generated EnlightenPluginResponse 
                 # objects created and queued within a plugin which do not directly 
@@ -75,10 +79,12 @@ class PluginWorker(threading.Thread):
                     log.debug (f"Error {e} trying to handle event responses, ignoring future attempts")
                     self.has_event_responses = False
 
-            if self.request_queue.empty():
+            try:
+                timeout = self.EVENT_POLL_SEC if self.has_event_responses else None
+                request = self.request_queue.get(block=True, timeout=timeout)
+            except queue.Empty:
                 continue
 
-            request = self.request_queue.get_nowait()
             if request is None:
                 log.critical("PluginWorker[%s] received poison-pill", module_name)
                 plugin.disconnect()
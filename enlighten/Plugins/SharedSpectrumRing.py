@@ -0,0 +1,100 @@
+import logging
+import numpy as np
+
+from multiprocessing import shared_memory
+
+log = logging.getLogger(__name__)
+
+##
+# A block of multiprocessing.shared_memory divided into fixed-size "slots", each
+# able to carry the arrays of one EnlightenPluginRequest from ENLIGHTEN to a
+# PluginProcessWorker's child process without pickling them.
+#
+# The parent (creator) packs a dict of named arrays into a free slot and sends
+# only the small descriptors returned by pack() down the pipe; the child
+# attaches to the same block by name and unpacks (copies) the arrays out of the
+# slot, after which the slot can be re-used.  Slots are handed out and returned
+# by the caller, so several requests may be in flight at once.
+#
+# Arrays which don't fit in the remaining space of a slot (or aren't numeric)
+# are returned by pack() as leftovers, to be pickled as usual.
+class SharedSpectrumRing:
+
+    ## keep each array 8-byte aligned within the slot
+    ALIGNMENT = 8
+
+    ##
+    # @param slots      (Input) number of slots
+    # @param slot_bytes (Input) capacity of each slot
+    # @param name       (Input) if provided, attach to an existing ring rather than creating one
+    def __init__(self, slots, slot_bytes, name=None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        else:
+            self.shm = self.attach(name)
+
+        self.name = self.shm.name
+
+    @staticmethod
+    def attach(name):
+        # Only the creator should unlink the block.  Before Python 3.13 the
+        # attaching process also "registers" it, but children started through
+        # multiprocessing share the parent's resource_tracker, so that
+        # registration is a harmless duplicate.
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            return shared_memory.SharedMemory(name=name)
+
+    ##
+    # @param slot   (Input) index of a slot not currently in use
+    # @param arrays (Input) dict of key -> array-like
+    # @returns (descriptors, leftovers), where descriptors is a list of
+    #          (key, offset, dtype, shape) and leftovers a dict of arrays which
+    #          weren't placed in the slot
+    def pack(self, slot, arrays):
+        base = slot * self.slot_bytes
+        offset = 0
+        descriptors = []
+        leftovers = {}
+
+        for key, a in arrays.items():
+            a = np.asarray(a)
+            if a.dtype.kind not in "biuf" or offset + a.nbytes > self.slot_bytes:
+                leftovers[key] = a
+                continue
+
+            dest = np.ndarray(a.shape, dtype=a.dtype, buffer=self.shm.buf, offset=base + offset)
+            dest[...] = a
+            descriptors.append((key, offset, a.dtype.str, a.shape))
+
+            offset += a.nbytes
+            offset += -offset % self.ALIGNMENT
+
+        return descriptors, leftovers
+
+    ##
+    # @param slot        (Input) slot the arrays were packed into
+    # @param descriptors (Input) as returned by pack()
+    # @returns dict of key -> read-only copies of the arrays (the slot may be
+    #          re-used as soon as this returns)
+    def unpack(self, slot, descriptors):
+        base = slot * self.slot_bytes
+        arrays = {}
+        for key, offset, dtype, shape in descriptors:
+            a = np.array(np.ndarray(shape, dtype=np.dtype(dtype), buffer=self.shm.buf, offset=base + offset))
+            a.flags.writeable = False
+            arrays[key] = a
+        return arrays
+
+    def close(self):
+        try:
+            self.shm.close()
+            if self.owner:
+                self.shm.unlink()
+        except:
+            log.error(f"error releasing shared memory {self.name}", exc_info=1)
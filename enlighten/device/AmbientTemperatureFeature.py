@@ -67,8 +67,7 @@ class AmbientTemperatureFeature:
         if self.output_to_file:
             self.ctl.hardware_file_manager.write_line(self.name, f"{self.name},{spec.label},{current_time},{degC}")
 
-        x_time = [(current_time-x).total_seconds() for x,y in rds.data]
-        y = rds.get_values()
+        x_time, y = rds.get_relative_to_now()
 
         try:
             self.ctl.graph.set_data(curve=active_curve, y=y, x=x_time)
@@ -189,10 +189,10 @@ class DetectorTemperatureFeature:
             self.ctl.hardware_file_manager.write_line(
                 self.name,
                 f"{self.name}, {spec.label}, {current_time}, {reading.detector_temperature_degC}")
-        x_time = [(current_time-x).total_seconds() for x,y in app_state.detector_temperatures_degC_averaged_display.data]
+        x_time, y = app_state.detector_temperatures_degC_averaged_display.get_relative_to_now()
         self.ctl.graph.set_data(
             curve = curve,
-            y     = app_state.detector_temperatures_degC_averaged_display.get_values(),
+            y     = y,
             x     = x_time)
 
         if spec == current_spec:
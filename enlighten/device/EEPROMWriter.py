@@ -14,14 +14,26 @@ log = logging.getLogger(__name__)
 class EEPROMWriter:
     """
     Encapsulate reflashing the EEPROM to the device.
+
+    Observers are notified (with no arguments) whenever an updated EEPROM is
+    sent to the subprocess, so that anything cached from EEPROM fields (e.g.
+    RamanIntensityCorrection's factors) can be regenerated.
     """
     def __init__(self, ctl):
         self.ctl = ctl
 
+        self.observers = set()
+
         b = ctl.form.ui.pushButton_write_eeprom
         b.setVisible(False)
         b.clicked.connect(self.write)
 
+    def register_observer(self, callback):
+        self.observers.add(callback)
+
+    def unregister_observer(self, callback):
+        self.observers.discard(callback)
+
     def write(self, verify=True):
         log.debug("asked to write EEPROM (verify %s)", verify)
 
@@ -107,6 +119,9 @@ class EEPROMWriter:
             # some level of login, but I guess we have to for FieldWavecalFeature
             spec.change_device_setting("update_eeprom", (sn, spec.settings.eeprom))
 
+        for callback in self.observers:
+            callback()
+
         return True
 
     def backup(self, output_path=None):
@@ -80,6 +80,7 @@ class Spectrometer:
         self.app_state = None
         self.wp_model_info = None
         self.settings = None
+        self.settings_version = 0
         self.next_expected_acquisition_timestamp = None
         self.roi_region_left = None
         self.roi_region_right = None
@@ -231,6 +232,15 @@ class Spectrometer:
         device_id = self.device.device_id
         log.info(f"change_device_setting[{device_id}]: {setting} -> {value}")
         self.device.change_setting(setting, value)
+        self.settings_changed()
+
+    ##
+    # Increments settings_version, which lets consumers (e.g. PluginSnapshots)
+    # cache copies of SpectrometerSettings until they actually change.  Called
+    # for every change_device_setting (including EEPROMWriter sending an edited
+    # EEPROM downstream).
+    def settings_changed(self):
+        self.settings_version += 1
 
     def is_mock(self) -> bool:
         return self.get_mock() is not None
@@ -358,4 +368,7 @@ class Spectrometer:
 
     def clear_graph(self):
         """ erase, but do not delete, this graph curve from the graph """
+        # else a deferred update would redraw the spectrum just erased
+        if self.ctl.frame_scheduler:
+            self.ctl.frame_scheduler.remove_curve(self.curve)
         self.ctl.graph.set_data(curve=self.curve)
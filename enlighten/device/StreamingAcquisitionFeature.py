@@ -0,0 +1,241 @@
+import os
+import queue
+import logging
+import datetime
+import threading
+import numpy as np
+
+from wasatch.SpectrometerResponse import SpectrometerResponse
+from wasatch.Reading import Reading
+
+log = logging.getLogger(__name__)
+
+##
+# Appends every streamed spectrum as one row of a CSV file.
+#
+# Rows are collected in a preallocated block and written BLOCK_SIZE at a time
+# with np.savetxt, rather than formatting each pixel in Python per spectrum.
+# Timestamps are POSIX seconds.
+class StreamingSpectrumWriter:
+
+    BLOCK_SIZE = 50
+
+    def __init__(self, pathname, pixels, wavelengths=None):
+        self.pathname = pathname
+        self.pixels = pixels
+        self.count = 0      # rows in the current block
+        self.outfile = open(pathname, "w")
+
+        # Timestamp, Session Count, Integration Time, Averaged, then the spectrum
+        self.block = np.zeros((self.BLOCK_SIZE, 4 + pixels), dtype=np.float64)
+        self.fmt = [ "%.6f", "%d", "%g", "%d" ] + [ "%g" ] * pixels
+
+        self.outfile.write("Timestamp,Session Count,Integration Time,Averaged," + ",".join([f"Pixel {i}" for i in range(pixels)]) + "\n")
+        if wavelengths is not None:
+            self.outfile.write("Wavelength,,,," + ",".join(["%.2f" % wl for wl in wavelengths]) + "\n")
+
+    def write(self, reading, integration_time_ms):
+        timestamp = reading.timestamp.timestamp() if reading.timestamp else datetime.datetime.now().timestamp()
+
+        row = self.block[self.count]
+        row[:4] = (timestamp, reading.session_count, integration_time_ms, 1 if reading.averaged else 0)
+        row[4:] = reading.spectrum
+        self.count += 1
+
+        if self.count == self.BLOCK_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.count:
+            np.savetxt(self.outfile, self.block[:self.count], fmt=self.fmt, delimiter=",")
+            self.count = 0
+        self.outfile.flush()
+
+    def close(self):
+        try:
+            self.flush()
+            self.outfile.close()
+        except:
+            log.error(f"error closing {self.pathname}", exc_info=1)
+
+##
+# A dedicated consumer thread which drains one spectrometer's
+# WasatchDeviceWrapper.response_queue as fast as the device fills it.
+#
+# Every Reading goes to the StreamingSpectrumWriter, if saving.  Meanwhile, the
+# thread retains whatever WasatchDeviceWrapper.get_final_item would have returned
+# to the GUI (the newest averaged Reading if any, else the newest Reading, with
+# poison-pills and errors taking precedence), which Controller.acquire_reading
+# collects on its own 10Hz schedule via acquire_data().
+class StreamingConsumer(threading.Thread):
+
+    POLL_TIMEOUT_SEC = 0.1
+
+    def __init__(self, spec, writer=None):
+        super().__init__(name=f"StreamingConsumer-{spec.label}", daemon=True)
+
+        self.spec = spec
+        self.device = spec.device
+        self.writer = writer
+
+        self.pixels = None
+        self.total = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+        self.skipped = 0
+        self.pending = None             # latest SpectrometerResponse with a Reading
+        self.pending_averaged = None    # latest SpectrometerResponse with an averaged Reading
+        self.pending_urgent = None      # poison-pill or error keepalive
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        log.debug(f"{self.name} started")
+        while not self.stop_event.is_set():
+            try:
+                response = self.device.response_queue.get(timeout=self.POLL_TIMEOUT_SEC)
+            except queue.Empty:
+                continue
+            except:
+                log.error(f"{self.name}: error reading response_queue", exc_info=1)
+                break
+
+            try:
+                self.consume(response)
+            except:
+                log.error(f"{self.name}: error consuming response", exc_info=1)
+
+        if self.writer:
+            self.writer.close()
+        log.debug(f"{self.name} stopped")
+
+    def consume(self, response):
+        if response is None:
+            return
+
+        if response.poison_pill or (response.keep_alive and response.error_msg):
+            with self.lock:
+                self.pending_urgent = response
+            return
+
+        if response.keep_alive or response.data is None:
+            return
+
+        reading = response.data
+        if isinstance(reading, Reading) and reading.failure is None and reading.spectrum is not None:
+            self.record(reading)
+
+        with self.lock:
+            self.pending = response
+            if isinstance(reading, Reading) and reading.averaged:
+                self.pending_averaged = response
+
+    def record(self, reading):
+        pixels = len(reading.spectrum)
+        if self.pixels is None:
+            self.pixels = pixels
+        if pixels != self.pixels:
+            # e.g. area scan rows
+            self.skipped += 1
+            return
+
+        self.total += 1
+        if self.writer:
+            self.writer.write(reading, self.spec.settings.state.integration_time_ms)
+
+    def acquire_data(self):
+        """ mimics WasatchDeviceWrapper.acquire_data for Controller.acquire_reading """
+        with self.lock:
+            if self.pending_urgent is not None:
+                response = self.pending_urgent
+                self.pending_urgent = None
+                return response
+
+            response = self.pending_averaged or self.pending
+            self.pending = None
+            self.pending_averaged = None
+
+        if response is None:
+            return SpectrometerResponse(keep_alive=True)
+        return response
+
+##
+# High-rate "data collection" mode.
+#
+# Normally Controller.tick_acquisition polls each spectrometer at ~10Hz and
+# discards any Readings which queued up in between, because ENLIGHTEN was
+# designed as a real-time VIEWER.  When streaming is enabled, a StreamingConsumer
+# thread per spectrometer drains the queue at full rate (optionally streaming
+# every spectrum to CSV), while the GUI still only graphs the latest Reading at
+# its own pace.
+#
+# Enable with the --stream-spectra command-line option, or:
+#
+# @verbatim
+# [streaming]
+# enabled = True
+# save = True
+# @endverbatim
+#
+# Saved streams land in the normal save directory as
+# stream-<serial>-<timestamp>.csv (one spectrum per row).
+class StreamingAcquisitionFeature:
+
+    SECTION = "streaming"
+
+    def __init__(self, ctl):
+        self.ctl = ctl
+
+        self.consumers = {} # device_id -> StreamingConsumer
+
+        self.enabled = self.ctl.stream_spectra or self.ctl.config.get_bool(self.SECTION, "enabled")
+        self.save    = self.ctl.config.get_bool(self.SECTION, "save", default=True)
+
+        if self.enabled:
+            log.info(f"streaming enabled (save {self.save})")
+
+    def is_streaming(self, spec):
+        return spec is not None and spec.device_id in self.consumers
+
+    def start(self, spec):
+        """ called by Controller.initialize_new_device """
+        if not self.enabled or spec is None or spec.device is None or self.is_streaming(spec):
+            return
+
+        writer = None
+        if self.save:
+            try:
+                now = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+                pathname = os.path.join(self.ctl.save_options.generate_today_dir(), f"stream-{spec.settings.eeprom.serial_number}-{now}.csv")
+                writer = StreamingSpectrumWriter(pathname, spec.settings.pixels(), wavelengths=spec.settings.wavelengths)
+                self.ctl.marquee.info(f"streaming {spec.label} to {os.path.basename(pathname)}")
+            except:
+                log.error(f"unable to stream {spec.label} to disk", exc_info=1)
+
+        consumer = StreamingConsumer(spec, writer=writer)
+        self.consumers[spec.device_id] = consumer
+        consumer.start()
+
+    def stop(self, spec=None):
+        """ called on disconnect (spec) and shutdown (all) """
+        if spec is None:
+            device_ids = list(self.consumers.keys())
+        else:
+            device_ids = [ spec.device_id ]
+
+        for device_id in device_ids:
+            consumer = self.consumers.pop(device_id, None)
+            if consumer is None:
+                continue
+            consumer.stop()
+            consumer.join(timeout=2 * StreamingConsumer.POLL_TIMEOUT_SEC + 1)
+            log.info(f"stopped streaming {device_id} ({consumer.total} spectra)")
+
+    def acquire_data(self, spec):
+        """ substitute for spec.device.acquire_data() while streaming """
+        device = spec.device
+        if device.closing or not device.connected:
+            return device.acquire_data()
+        return self.consumers[spec.device_id].acquire_data()
@@ -7,6 +7,8 @@ import qimage2ndarray
 
 from enlighten import common
 from enlighten.ui.ScrollStealFilter import ScrollStealFilter
+from enlighten.measurement.AreaScanRenderer import AreaScanRenderer
+from enlighten.measurement.AreaScanRecording import AreaScanRecorder, AreaScanRecording
 
 if common.use_pyside2():
     from PySide2 import QtCore, QtWidgets, QtGui
@@ -20,6 +22,13 @@ class AreaScanFeature:
     Implements a 2D "area scan," displaying the full detector rows and columns
     rather than the usual 1D vertically-binned spectrum.
 
+    With "[x] Record" checked, every completed frame is appended to a
+    memory-mapped .npy file in the day's save directory (see AreaScanRecorder).
+    "Load Recording" opens one, and the "Frame" spinner pages through it
+    without reading the whole file.  Playback shares the live image, so it is
+    only available while the area scan is disabled, and enabling the area scan
+    ends it.
+
     This feature is primarily for manufacturing use.  It is not currently 
     very robust or efficient.
 
@@ -41,9 +50,13 @@ class AreaScanFeature:
     # ##########################################################################
 
     def __init__(self,
+            bt_load,
             bt_save,
             cb_enable,
             cb_fast,
+            cb_record,
+            config,
+            file_manager,
             frame_image,
             frame_live,
             graphics_view,
@@ -55,14 +68,19 @@ class AreaScanFeature:
             multispec,
             progress_bar,
             save_options,
+            sb_playback_frame,
             sb_start,
             sb_stop,
             sb_delay_ms,
             set_curve_data):
 
+        self.bt_load            = bt_load
         self.bt_save            = bt_save
         self.cb_enable          = cb_enable
         self.cb_fast            = cb_fast
+        self.cb_record          = cb_record
+        self.config             = config
+        self.file_manager       = file_manager
         self.frame_image        = frame_image
         self.frame_live         = frame_live
         self.graphics_view      = graphics_view
@@ -74,6 +92,7 @@ class AreaScanFeature:
         self.multispec          = multispec
         self.progress_bar       = progress_bar
         self.save_options       = save_options
+        self.sb_playback_frame  = sb_playback_frame
         self.sb_start           = sb_start
         self.sb_stop            = sb_stop
         self.sb_delay_ms        = sb_delay_ms
@@ -90,6 +109,12 @@ class AreaScanFeature:
         self.image = None
         self.name = "Area_Scan"
         self.last_received_time = None
+        self.recorder = None    # AreaScanRecorder while recording
+        self.recording = None   # AreaScanRecording being played back
+
+        # see AreaScanRenderer
+        self.incremental = self.config.get_bool ("area_scan", "incremental", default=True)
+        self.max_fps     = self.config.get_float("area_scan", "max_fps",     default=20)
 
         # create widgets we can't / don't pass in
         self.create_widgets()
@@ -97,8 +122,12 @@ class AreaScanFeature:
 
         self.cb_fast.setChecked(True)
         self.progress_bar.setVisible(False)
+        self.sb_playback_frame.setEnabled(False)
 
+        self.bt_load    .clicked        .connect(self.load_callback)
         self.bt_save    .clicked        .connect(self.save_callback)
+        self.cb_record  .stateChanged   .connect(self.record_callback)
+        self.sb_playback_frame.valueChanged.connect(self.playback_callback)
         self.cb_fast    .stateChanged   .connect(self.fast_callback)
         self.cb_enable  .stateChanged   .connect(self.enable_callback)
         self.sb_start   .valueChanged   .connect(self.roi_callback)
@@ -122,6 +151,7 @@ class AreaScanFeature:
         # QGraphicsScene used to hold the Area Scan image
         self.scene = QtWidgets.QGraphicsScene(parent=self.frame_image) 
         self.graphics_view.setScene(self.scene)
+        self.renderer = AreaScanRenderer(self.scene, max_fps=self.max_fps, callback=self.repaint_callback)
         #self.graphics_view.setViewportMargins(0, -20, 0, -20) # L, T, R, B
 
         # PyQtChart to hold the "summed" graph beneath
@@ -154,6 +184,12 @@ class AreaScanFeature:
         log.info(f"finished removing spec {spec}")
 
 
+    def stop(self):
+        """ called by Controller.close """
+        self.renderer.stop()
+        self.stop_recording()
+        self.stop_playback()
+
     def disconnect(self):
         log.debug("disconnecting")
         spec = self.multispec.current_spectrometer()
@@ -225,7 +261,11 @@ class AreaScanFeature:
             self.update_progress_bar()
 
             log.debug("rendering frame of area_scan_fast")
-            self.data = None
+            if self.data is None:
+                self.resize()
+            else:
+                self.data.fill(0)
+                self.renderer.mark_dirty()
             rows = len(reading.area_scan_data)
             for i in range(rows):
                 spectrum = reading.area_scan_data[i]
@@ -234,6 +274,7 @@ class AreaScanFeature:
                 self.process_spectrum(spectrum, row=row)
 
             self.finish_update()
+            self.record_frame()
 
             # update the on-screen frame counter
             self.frame_count += 1
@@ -245,6 +286,8 @@ class AreaScanFeature:
             log.debug(f"slow mode: using row {row} of spectrum {spectrum[:10]}")
             self.process_spectrum(spectrum, row=row)
             self.finish_update()
+            if row == self.stop_line:
+                self.record_frame()
 
     # ##########################################################################
     # callbacks
@@ -281,9 +324,12 @@ class AreaScanFeature:
         log.debug("disabling area scan")
         self.enabled = False
         self.data = None
+        self.renderer.set_data(None)
+        self.stop_recording()
         self.last_received_time = None
         self.frame_image.setVisible(False)
         self.cb_enable.setChecked(False)
+        self.update_playback_widgets()
 
     def enable_callback(self):
         """ The user clicked "[x] enable" on the widget """
@@ -306,6 +352,11 @@ class AreaScanFeature:
             spec.settings.state.ignore_timeouts_for(sec=5)
             self.disable()
 
+        # don't mix live rows into a recorded frame (or vice-versa)
+        if self.enabled:
+            self.stop_playback()
+        self.update_playback_widgets()
+
         self.update_visibility()
 
         # update sizing
@@ -336,6 +387,50 @@ class AreaScanFeature:
         # don't use .info, as Hardware Capture doesn't include the Drawer
         self.marquee.toast("saved %s" % basename)
 
+    def record_callback(self):
+        """ The user clicked "[x] Record" on the widget """
+        if not self.cb_record.isChecked():
+            self.stop_recording()
+
+    def load_callback(self):
+        """ The user clicked "Load Recording" """
+        if self.enabled:
+            return
+
+        pathname = self.file_manager.get_pathname(caption="Select area scan recording", filter_="Area Scan Recordings (*.npy *.json)")
+        if pathname is None:
+            return
+
+        try:
+            recording = AreaScanRecording(pathname)
+        except:
+            log.error(f"unable to load area scan recording {pathname}", exc_info=1)
+            self.marquee.error("unable to load area scan recording")
+            return
+
+        if len(recording) == 0:
+            self.marquee.error("area scan recording is empty")
+            return
+
+        if self.recording is not None:
+            self.recording.close()
+        self.recording = recording
+
+        self.frame_image.setVisible(True)
+        self.sb_playback_frame.blockSignals(True)
+        self.sb_playback_frame.setMaximum(len(recording) - 1)
+        self.sb_playback_frame.setValue(0)
+        self.sb_playback_frame.blockSignals(False)
+        self.update_playback_widgets()
+        self.show_frame(0)
+
+        self.marquee.toast(f"loaded {len(recording)} area scan frames")
+
+    def playback_callback(self):
+        """ The user changed the "Frame" spinner """
+        if self.recording is not None and not self.enabled:
+            self.show_frame(self.sb_playback_frame.value())
+
     # ##########################################################################
     # private methods
     # ##########################################################################
@@ -402,6 +497,75 @@ class AreaScanFeature:
 
             index = row - self.start_line # absolute (detector) vs ROI (image)
             self.data[index] = spectrum
+            self.renderer.mark_dirty(index)
+
+    def record_frame(self):
+        """ append the completed frame to the recording (if recording) """
+        if self.data is None or not self.cb_record.isChecked():
+            return
+
+        if self.recorder is not None and self.recorder.shape != self.data.shape:
+            log.info("area scan shape changed, so starting a new recording")
+            self.stop_recording()
+
+        if self.recorder is None:
+            spec = self.multispec.current_spectrometer()
+            if spec is None:
+                return
+            basename = "area-scan-%s-%s" % (datetime.datetime.now().strftime("%Y%m%d-%H%M%S"),
+                                            spec.settings.eeprom.serial_number)
+            pathname = os.path.join(self.save_options.generate_today_dir(), basename + ".npy")
+            try:
+                self.recorder = AreaScanRecorder(pathname, self.data.shape, dtype=self.data.dtype,
+                                                 serial_number=spec.settings.eeprom.serial_number)
+            except:
+                log.error(f"unable to record area scan to {pathname}", exc_info=1)
+                self.marquee.error("unable to record area scan")
+                self.cb_record.setChecked(False)
+                return
+
+        self.recorder.append(self.data, roi=(self.start_line, self.stop_line))
+
+    def stop_recording(self):
+        if self.recorder is None:
+            return
+
+        recorder = self.recorder
+        self.recorder = None
+        recorder.close()
+        self.marquee.toast("recorded %d frames to %s" % (len(recorder), os.path.basename(recorder.pathname)))
+
+    def stop_playback(self):
+        """ close the loaded recording, releasing the image for live frames """
+        if self.recording is None:
+            return
+
+        self.recording.close()
+        self.recording = None
+        self.data = None
+        self.renderer.set_data(None)
+        self.sb_playback_frame.setToolTip("")
+
+    def update_playback_widgets(self):
+        """ playback is only available while the area scan is disabled """
+        self.bt_load.setEnabled(not self.enabled)
+        self.sb_playback_frame.setEnabled(not self.enabled and self.recording is not None)
+
+    def show_frame(self, index):
+        """ display one frame of the loaded recording """
+        frame = self.recording.get_frame(index)
+        if self.data is None or self.data.shape != frame.shape:
+            self.data = np.zeros(frame.shape, dtype=np.float32)
+            self.renderer.set_data(self.data)
+
+        self.data[:] = frame
+        self.renderer.mark_dirty()
+
+        roi = self.recording.get_roi(index)
+        if roi is not None:
+            self.lb_current.setText("%d-%d" % roi)
+        self.sb_playback_frame.setToolTip(self.recording.get_timestamp(index).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3])
+        self.finish_update()
 
     def update_curve_color(self, spec):
         curve = self.multispec.get_hardware_feature_curve(self.name, spec.device_id)
@@ -418,6 +582,7 @@ class AreaScanFeature:
         data_w = spec.settings.pixels()
         log.debug("resize: data_w = %d, data_h = %d (start %d, stop %d)", data_w, data_h, self.start_line, self.stop_line)
         self.data = np.zeros((data_h, data_w), dtype=np.float32)
+        self.renderer.set_data(self.data)
 
         self.frame_image.setMinimumHeight(data_h + 40)
         self.graphics_view.setMinimumHeight(150)
@@ -427,19 +592,35 @@ class AreaScanFeature:
 
     def finish_update(self):
         """
-        @todo qimage2ndarray technically provides access to the existing QImage's 
-              underlying data, so we could probably simply update the existing 
-              QImage rather than make a whole new QPixmap.
+        Draws the matrix, by default through AreaScanRenderer (which updates
+        its persistent QImage in place, and repaints at most max_fps).
         """
         if self.data is None:
             return
 
+        if self.incremental:
+            self.renderer.request(self.frame_image.width())
+            return
+
         # graph the rotated 2D array
         self.image = qimage2ndarray.array2qimage(self.data, normalize=True)
         pixmap = QtGui.QPixmap(self.image).scaledToWidth(self.frame_image.width())
         self.scene.clear() # @todo - anything leak here? need to deleteLater old pixmap?
+        self.renderer.item = None
         self.scene.addPixmap(pixmap)
 
-        # vertically bin the on-screen image for the "live" spectrum
+        self.update_live_curve()
+
+    def repaint_callback(self):
+        """ AreaScanRenderer has drawn the matrix """
+        self.image = self.renderer.image
+        self.update_live_curve()
+
+    def update_live_curve(self):
+        """ vertically bin the on-screen image for the "live" spectrum """
+        spec = self.multispec.current_spectrometer()
+        if spec is None or self.data is None:
+            return
+
         total = np.sum(self.data, axis=0)
-        self.set_curve_data(self.curve_live, total, label="AreaScanFeature.finish_update")
+        self.set_curve_data(self.multispec.get_hardware_feature_curve(self.name, spec.device_id), total, label="AreaScanFeature.finish_update")
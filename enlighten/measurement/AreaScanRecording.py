@@ -0,0 +1,159 @@
+import os
+import json
+import logging
+import datetime
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+##
+# Appends area scan frames to a .npy file, with a JSON index beside it.
+#
+# Frames are written sequentially to the end of the file as they complete
+# (nothing is kept in memory), and the .npy header is rewritten in place
+# with the new frame count whenever the index is flushed, so at any time the
+# file is a valid (frames, rows, columns) array which numpy.load can
+# memory-map.  The header is padded to a fixed HEADER_BYTES so that growing
+# the frame count never moves the data.
+#
+# The index (<basename>.json) records the frame shape and dtype, the
+# spectrometer, and each frame's timestamp and ROI (first and last detector
+# row).
+#
+# A recording holds frames of a single shape; AreaScanFeature starts a new
+# recording if the ROI or pixel count changes.
+class AreaScanRecorder:
+
+    HEADER_BYTES = 128
+    MAGIC = b"\x93NUMPY\x01\x00"
+
+    ##
+    # @param pathname (Input) of the .npy file (the index will be alongside it)
+    # @param flush_every (Input) rewrite the header and index every this many frames
+    def __init__(self, pathname, shape, dtype=np.float32, serial_number=None, flush_every=50):
+        self.pathname = pathname
+        self.index_pathname = os.path.splitext(pathname)[0] + ".json"
+        self.shape = tuple(int(n) for n in shape)
+        self.dtype = np.dtype(dtype)
+        self.flush_every = max(1, flush_every)
+
+        self.frames = []    # per-frame index entries
+        self.index = {
+            "version": 1,
+            "data": os.path.basename(pathname),
+            "shape": list(self.shape),
+            "dtype": self.dtype.str,
+            "serial_number": serial_number,
+            "created": datetime.datetime.now().isoformat(),
+            "frames": self.frames
+        }
+
+        self.f = open(pathname, "w+b")
+        self.write_header()
+        log.info(f"recording area scan {self.shape} to {pathname}")
+
+    def __len__(self):
+        return len(self.frames)
+
+    ##
+    # @param frame (Input) 2D array of the recording's shape
+    # @param roi (Input) (first, last) detector row of the frame
+    # @param timestamp (Input) datetime (default now)
+    def append(self, frame, roi=None, timestamp=None):
+        frame = np.ascontiguousarray(frame, dtype=self.dtype)
+        if frame.shape != self.shape:
+            raise ValueError(f"area scan frame {frame.shape} doesn't match recording {self.shape}")
+
+        self.f.seek(0, os.SEEK_END)
+        self.f.write(frame.tobytes())
+
+        if timestamp is None:
+            timestamp = datetime.datetime.now()
+        self.frames.append({ "timestamp": timestamp.isoformat(),
+                             "roi": list(roi) if roi is not None else None })
+
+        if len(self.frames) % self.flush_every == 0:
+            self.flush()
+
+    def write_header(self):
+        header = repr({ "descr": np.lib.format.dtype_to_descr(self.dtype),
+                        "fortran_order": False,
+                        "shape": (len(self.frames),) + self.shape })
+        length = self.HEADER_BYTES - len(self.MAGIC) - 2
+        header = header.ljust(length - 1) + "\n"
+        if len(header) > length:
+            raise ValueError(f"area scan header too long: {header}")
+
+        self.f.seek(0)
+        self.f.write(self.MAGIC + length.to_bytes(2, "little") + header.encode("latin1"))
+
+    def flush(self):
+        """ make everything appended so far readable """
+        self.write_header()
+        self.f.flush()
+
+        # write the index atomically, so a reader never sees half of it
+        tmp = self.index_pathname + ".tmp"
+        with open(tmp, "w") as outfile:
+            json.dump(self.index, outfile, indent=2)
+        os.replace(tmp, self.index_pathname)
+
+    def close(self):
+        if self.f is None:
+            return
+        self.flush()
+        self.f.close()
+        self.f = None
+        log.info(f"recorded {len(self.frames)} area scan frames to {self.pathname}")
+
+##
+# Reads back an AreaScanRecorder recording, one frame at a time.
+#
+# The .npy file is memory-mapped, so opening a recording reads only its
+# header and index, and each frame is paged in from disk as it is shown.
+class AreaScanRecording:
+
+    ## @param pathname (Input) either the .npy file or its .json index
+    def __init__(self, pathname):
+        base = os.path.splitext(pathname)[0]
+        self.index_pathname = base + ".json"
+
+        with open(self.index_pathname) as infile:
+            self.index = json.load(infile)
+
+        self.pathname = os.path.join(os.path.dirname(self.index_pathname), self.index.get("data", os.path.basename(base) + ".npy"))
+        self.frames = self.index["frames"]
+        self.data = np.load(self.pathname, mmap_mode="r")
+
+        # the index may have been flushed before (or after) the header
+        # following a crash; trust whichever covers fewer frames
+        count = min(len(self.frames), len(self.data))
+        self.frames = self.frames[:count]
+        self.data = self.data[:count]
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def shape(self):
+        return tuple(self.data.shape[1:])
+
+    @property
+    def serial_number(self):
+        return self.index.get("serial_number", None)
+
+    ## @returns the given frame (a read-only view into the file)
+    def get_frame(self, index):
+        return self.data[index]
+
+    def get_timestamp(self, index):
+        return datetime.datetime.fromisoformat(self.frames[index]["timestamp"])
+
+    ## @returns (first, last) detector row of the given frame, or None
+    def get_roi(self, index):
+        roi = self.frames[index].get("roi", None)
+        return tuple(roi) if roi is not None else None
+
+    def close(self):
+        # np.memmap has no close; dropping the reference unmaps the file
+        self.data = None
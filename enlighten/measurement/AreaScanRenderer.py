@@ -0,0 +1,166 @@
+import time
+import logging
+import numpy as np
+
+from enlighten import common
+
+if common.use_pyside2():
+    from PySide2 import QtCore, QtGui, QtWidgets
+else:
+    from PySide6 import QtCore, QtGui, QtWidgets
+
+log = logging.getLogger(__name__)
+
+##
+# Draws AreaScanFeature's data matrix into its QGraphicsScene.
+#
+# AreaScanFeature.finish_update used to convert the whole matrix into a new
+# normalized QImage (qimage2ndarray.array2qimage), copy that into a new scaled
+# QPixmap, and clear and repopulate the scene, on every row in slow mode and
+# every frame in fast mode.  Instead:
+#
+# - one persistent 8-bit grayscale QImage is backed by a NumPy array
+#   (self.pixels), so writing to the array updates the image in place
+# - only the rows which changed since the last repaint are rescaled into it,
+#   unless the overall range changed, in which case every row is
+# - the range used for normalization is kept incrementally as the min/max of
+#   each row, so finding it costs one pass over the changed rows
+# - the scene keeps a single QGraphicsPixmapItem, scaled to the width of the
+#   view, whose pixmap is replaced at most max_fps times a second; rows
+#   arriving in between are only marked dirty
+#
+# Pixels are normalized as array2qimage(normalize=True) did: scaled so the
+# minimum is black and the maximum is white, then truncated to 8 bits.
+#
+# @verbatim
+# [area_scan]
+# incremental = True
+# max_fps = 20
+# @endverbatim
+class AreaScanRenderer:
+
+    def __init__(self, scene, max_fps=20, callback=None):
+        self.scene = scene
+        self.max_fps = max_fps
+        self.callback = callback    # called after each repaint
+
+        self.data = None            # the matrix being drawn (owned by AreaScanFeature)
+        self.pixels = None          # uint8 (rows, stride) backing self.image
+        self.image = None
+        self.item = None
+        self.row_min = None
+        self.row_max = None
+        self.lo = None
+        self.hi = None
+        self.dirty = None           # bool per row
+        self.scale_width = None
+
+        self.last_repaint = 0
+        self.repaints = 0
+        self.rows_rendered = 0
+
+        self.timer = QtCore.QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.repaint)
+
+    ##
+    # Start drawing the given matrix (after AreaScanFeature.resize).
+    def set_data(self, data):
+        self.timer.stop()
+        self.data = data
+        if data is None:
+            self.image = None
+            return
+
+        rows, cols = data.shape
+
+        # QImage needs each scanline 32-bit aligned
+        stride = (cols + 3) & ~3
+        self.pixels = np.zeros((rows, stride), dtype=np.uint8)
+        self.image = QtGui.QImage(self.pixels.data, cols, rows, stride, QtGui.QImage.Format_Grayscale8)
+
+        self.row_min = np.zeros(rows, dtype=np.float64)
+        self.row_max = np.zeros(rows, dtype=np.float64)
+        self.lo = self.hi = None
+        self.dirty = np.ones(rows, dtype=bool)
+
+        if self.item is None or self.item.scene() is not self.scene:
+            self.scene.clear()
+            self.item = QtWidgets.QGraphicsPixmapItem()
+            self.item.setTransformationMode(QtCore.Qt.SmoothTransformation)
+            self.scene.addItem(self.item)
+
+    ## AreaScanFeature has written the given row (or all rows, if None) of the matrix.
+    def mark_dirty(self, index=None):
+        if self.dirty is None:
+            return
+        if index is None:
+            self.dirty[:] = True
+        else:
+            self.dirty[index] = True
+
+    ##
+    # Repaint now if it's been at least 1/max_fps since the last one, otherwise
+    # once it has.
+    #
+    # @param width (Input) pixel width to scale the image to
+    def request(self, width):
+        self.scale_width = width
+        if self.timer.isActive():
+            return
+
+        if self.max_fps <= 0:
+            return self.repaint()
+
+        wait_sec = self.last_repaint + 1.0 / self.max_fps - time.monotonic()
+        if wait_sec <= 0:
+            self.repaint()
+        else:
+            self.timer.start(int(wait_sec * 1000))
+
+    ## rescale the dirty rows into the image and show it
+    def repaint(self):
+        if self.data is None or self.image is None:
+            return
+
+        self.last_repaint = time.monotonic()
+        self.update_pixels()
+
+        pixmap = QtGui.QPixmap.fromImage(self.image)
+        self.item.setPixmap(pixmap)
+        if self.scale_width:
+            self.item.setScale(self.scale_width / pixmap.width())
+        self.repaints += 1
+
+        if self.callback is not None:
+            self.callback()
+
+    def update_pixels(self):
+        dirty = np.flatnonzero(self.dirty)
+        if len(dirty) == 0:
+            return
+
+        if len(dirty) == len(self.dirty):
+            dirty = slice(None)
+        rows = self.data[dirty]
+        self.row_min[dirty] = rows.min(axis=1)
+        self.row_max[dirty] = rows.max(axis=1)
+
+        lo, hi = self.row_min.min(), self.row_max.max()
+        if lo != self.lo or hi != self.hi:
+            # the range changed, so every row needs rescaling
+            self.lo, self.hi = lo, hi
+            dirty = slice(None)
+            rows = self.data
+
+        cols = self.data.shape[1]
+        scaled = np.subtract(rows, lo, dtype=self.data.dtype)
+        if hi != lo:
+            scaled *= 255.0 / (hi - lo)  # (already within 0..255, as lo and hi are exact)
+        self.pixels[dirty, :cols] = scaled
+
+        self.rows_rendered += len(scaled)
+        self.dirty[:] = False
+
+    def stop(self):
+        self.timer.stop()
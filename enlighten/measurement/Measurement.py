@@ -86,7 +86,8 @@ log = logging.getLogger(__name__)
 # Thumbnail bar at any given time, and currently ENLIGHTEN's file-management
 # operations (rename, delete etc) only function on visible Thumbnails, so if
 # you're streaming vast BatchCollections to disk such that they get rotated out
-# of our buffer, you'll have to rename / delete them through other means.
+# of our buffer, you'll have to rename / delete them through other means (or
+# enable SessionStore, and restore them to the Clipboard from its History).
 #
 # @par Renaming Measurements
 #
@@ -265,6 +266,7 @@ class Measurement:
         self.timestamp                = None
         self.technique                = None
         self.roi_active               = False
+        self.session_row              = None   # see SessionStore
         self.note                     = ""
         self.prefix                   = ""
         self.suffix                   = ""
@@ -279,6 +281,10 @@ class Measurement:
     # - with spec (take latest from that Spectrometer)
     # - with source_pathname (deserializing from disk)
     # - with data (for instance, from processed plugin spectra)
+    #
+    # If interpolation is enabled, the ProcessedReading is interpolated unless
+    # interpolate is False (e.g. SessionStore.restore, whose arrays were
+    # archived after any interpolation).
     def __init__(self, 
             ctl                 = None,
             processed_reading   = None,
@@ -287,7 +293,8 @@ class Measurement:
             timestamp           = None,
             spec                = None,
             measurement         = None,
-            d                   = None):
+            d                   = None,
+            interpolate         = True):
 
         self.ctl = ctl
 
@@ -348,7 +355,7 @@ class Measurement:
         else:
             raise Exception("Measurement requires exactly one of (spec, source_pathname, measurement, dict)")
 
-        if self.ctl.interp.enabled:
+        if interpolate and self.ctl.interp.enabled:
             self.ctl.interp.process(self.processed_reading)
 
         self.generate_id()
@@ -362,6 +369,7 @@ class Measurement:
 
         # clean for exporting
         m.thumbnail_widget = None
+        m.session_row = None
         m.settings = copy.deepcopy(self.settings)
         m.processed_reading = copy.deepcopy(self.processed_reading)
 
@@ -405,6 +413,12 @@ class Measurement:
         self.pathname_by_ext = {}
         self.generate_id()
         self.generate_label()
+        self.reindex()
+
+    ## keep Measurements' indexes current
+    def reindex(self):
+        if self.ctl and self.ctl.measurements is not None:
+            self.ctl.measurements.reindex(self)
 
     def add_pathname(self, pathname):
         ext = pathname.split(".")[-1]
@@ -615,6 +629,9 @@ class Measurement:
 
         # Take extra care releasing Qt resources associated with the ThumbnailWidget
         if self.thumbnail_widget is not None:
+            if self.ctl and self.ctl.thumbnail_renderer is not None:
+                self.ctl.thumbnail_renderer.forget(self)
+
             # remove the trace from the graph
             self.thumbnail_widget.remove_curve_from_graph()
 
@@ -647,9 +664,11 @@ class Measurement:
         # if they removed the label, nothing more to do
         if label is None:
             self.label = label
+            self.reindex()
             return
 
         self.label = label
+        self.reindex()
 
         # rename the underlying file(s)
         if self.ctl:
@@ -1492,9 +1511,10 @@ class Measurement:
                     self.write_processed_reading_lines(csv_writer)
 
                 # you can neither delete nor rename spectra which were appended
-                # to an existing file
-                self.thumbnail_widget.disable_edit()
-                self.thumbnail_widget.disable_trash()
+                # to an existing file (SaveQueue does this on completion)
+                if self.thumbnail_widget is not None:
+                    self.thumbnail_widget.disable_edit()
+                    self.thumbnail_widget.disable_trash()
             else:
                 # we're creating a new file
                 verb = "saved"
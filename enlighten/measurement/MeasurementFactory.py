@@ -1,10 +1,7 @@
-import pyqtgraph.exporters
-import pyqtgraph
 import traceback
 import logging
 import json
 import os
-import re
 
 from enlighten.measurement.Measurement import Measurement
 from enlighten.parser.ColumnFileParser import ColumnFileParser
@@ -12,17 +9,12 @@ from enlighten.parser.ExportFileParser import ExportFileParser
 from enlighten.parser.TextFileParser import TextFileParser
 from enlighten.parser.DashFileParser import DashFileParser
 from enlighten.parser.SPCFileParser import SPCFileParser
+from enlighten.parser.FileSniffer import FileSniffer
 from enlighten.ui.ThumbnailWidget import ThumbnailWidget
 from enlighten.common import msgbox
-from enlighten import util, common
 
 from wasatch import utils as wasatch_utils
 
-if common.use_pyside2():
-    from PySide2 import QtGui
-else:
-    from PySide6 import QtGui
-
 log = logging.getLogger(__name__)
 
 ##
@@ -74,9 +66,12 @@ class MeasurementFactory:
             try:
                 for observer in self.observers:
                     observer(measurement=measurement, event="pre-save")
-                measurement.save()
-                for observer in self.observers:
-                    observer(measurement=measurement, event="save")
+
+                # a label would rename the files, so save those synchronously
+                if label is not None or not self.ctl.save_queue.submit(measurement, callback=self.saved_callback):
+                    measurement.save()
+                    for observer in self.observers:
+                        observer(measurement=measurement, event="save")
             except:
                 msgbox("Failed to dispatch save file.\n\n"+traceback.format_exc(), "Error")
 
@@ -85,9 +80,14 @@ class MeasurementFactory:
         
         return measurement
     
+    ## called by SaveQueue on the GUI thread once a Measurement has been saved
+    def saved_callback(self, job):
+        for observer in self.observers:
+            observer(measurement=job.measurement, event="save")
+
     ##
-    # Create the ThumbnailWidget for a Measurement, then render and emplace the 
-    # rasterized thumbnail image.  Also add Measurements back-reference.
+    # Create the ThumbnailWidget for a Measurement.  The rasterized thumbnail
+    # image is rendered by ThumbnailRenderer once the widget is shown.
     def create_thumbnail(self, measurement, is_collapsed=False):
         if measurement.plugin_name:
             log.debug(f"measurement came from a plugin so checking for second graph")
@@ -102,44 +102,6 @@ class MeasurementFactory:
             graph           = graph,        
             is_collapsed    = is_collapsed)
 
-        try:
-            pixmap = self.render_thumbnail_to_qpixmap(measurement)
-            measurement.thumbnail_widget.set_pixmap(pixmap)
-        except:
-            log.error("error rendering thumbnail to qpixmap", exc_info=1)
-
-    ## Render a Measurement's .processed array into a raster bitmap of the
-    # spectrum in a small image suitable for display via a ThumbnailWidget.
-    #
-    # @todo seems like this should be in ThumbnailWidget?
-    def render_thumbnail_to_qpixmap(self, measurement):
-
-        spectrum = measurement.processed_reading.get_processed()
-        if spectrum is None:
-            log.error("render_thumbnaiL_to_qpixmap: can't render thumbnail w/o spectrum")
-            return
-
-        # apply the spectrum to the curve
-        self.ctl.thumbnail_render_curve.setData(spectrum)
-
-        # instantiate an exporter (could we re-use one for all thumbnails?)
-        exporter = pyqtgraph.exporters.ImageExporter(self.ctl.thumbnail_render_graph.plotItem)
-
-        # configure the exporter
-        exporter.params.param('width' ).sigValueChanged.disconnect()
-        exporter.params.param('height').sigValueChanged.disconnect()
-
-        exporter.params['width' ] = 180
-        exporter.params['height'] = 120
-
-        # use the exporter to render the graph as an image
-        byte_result = exporter.export(toBytes=True)
-
-        # convert import the binary image into a QPixmap
-        pixmap = QtGui.QPixmap(byte_result)
-
-        return pixmap
-
     # ##########################################################################
     # From other Measurements
     # ##########################################################################
@@ -198,54 +160,58 @@ class MeasurementFactory:
     def create_from_file(self, pathname, is_collapsed=False, generate_thumbnail=True):
         log.debug("create_from_file: pathname %s, is_collapsed %s", pathname, is_collapsed)
 
+        try:
+            measurements = self.parse_file(pathname)
+        except:
+            log.error(f"failed to parse file {pathname}", exc_info=1)
+            msgbox(f"failed to parse file {pathname}")
+            return
+
+        return self.finish_from_file(measurements, is_collapsed=is_collapsed, generate_thumbnail=generate_thumbnail)
+
+    ##
+    # Parse the given file into a list of Measurement, without creating
+    # thumbnails or notifying observers (see finish_from_file).  This touches no
+    # widgets, so is safe to call from a worker thread (see MeasurementLoader).
+    #
+    # @returns list of Measurement, or None if the file wasn't recognized
+    # @throws exception on parse errors
+    def parse_file(self, pathname):
         if pathname is None or len(pathname.strip()) == 0:
-            log.error("create_from_file: invalid pathname %s", pathname)
+            log.error("parse_file: invalid pathname %s", pathname)
             return
 
         if not os.path.isfile(pathname):
-            log.error("create_from_file: can't find %s", pathname)
+            log.error("parse_file: can't find %s", pathname)
             return
 
+        # peek in the file and guess at the format (reading it only once, and
+        # keeping the contents if it's small enough)
+        sniffer = FileSniffer(pathname)
+        fmt = sniffer.sniff()
+        encoding = sniffer.encoding
+        text = sniffer.text
+        log.debug(f"parse_file: format {fmt}, encoding {encoding} ({pathname})")
+
         # Some files can hold many Measurement, so even though we're loading
         # one file, we may return a list of Measurement
-        measurements = None
-
-        # peek in the file and guess at the format
-        try:
-            encoding = util.determine_encoding(pathname)
-            log.debug(f"create_from_file: encoding {encoding} ({pathname})")
-            if pathname.lower().endswith(".csv"):
-                if self.looks_like_dash(pathname, encoding=encoding):
-                    log.debug("looks_like_dash")
-                    measurements = self.create_from_dash_file(pathname, encoding=encoding)
-                elif self.looks_like_labeled_columns(pathname, encoding=encoding):
-                    log.debug("looks_like_labeled_columns")
-                    measurements = [ self.create_from_columnar_file(pathname, encoding=encoding) ]
-                elif self.looks_like_enlighten_columns(pathname, encoding=encoding):
-                    log.debug("looks_like_enlighten_columns")
-                    measurements = [ self.create_from_columnar_file(pathname, encoding=encoding) ]
-                elif self.looks_like_enlighten_columns(pathname, test_export=True, encoding=encoding):
-                    log.debug("looks_like_enlighten_columns(export)")
-                    measurements = self.create_from_export_file(pathname, encoding=encoding)
-                elif self.looks_like_simple_columns(pathname, encoding=encoding):
-                    log.debug("looks_like_simple_columns")
-                    measurements = [ self.create_from_simple_columnar_file(pathname, encoding=encoding) ]
-                else:
-                    log.error("unrecognized CSV format %s", pathname)
-            elif pathname.lower().endswith(".asc"):
-                if self.looks_like_simple_columns(pathname, encoding=encoding):
-                    log.debug("looks_like_simple_columns")
-                    measurements = [ self.create_from_simple_columnar_file(pathname, encoding=encoding) ]
-                else:
-                    log.error("unrecognized ASC format %s", pathname)
-            elif pathname.lower().endswith(".json"):
-                measurements = self.create_from_json_file(pathname, encoding=encoding)
-            elif pathname.lower().endswith(".spc"):
-                measurements = self.create_from_spc_file(pathname)
-        except:
-            log.error(f"failed to parse file {pathname}", exc_info=1)
-            msgbox(f"failed to parse file {pathname}")
+        if fmt == FileSniffer.DASH:
+            return self.create_from_dash_file(pathname, encoding=encoding, text=text)
+        elif fmt in [ FileSniffer.LABELED_COLUMNS, FileSniffer.ENLIGHTEN_COLUMNS ]:
+            return [ self.create_from_columnar_file(pathname, encoding=encoding) ]
+        elif fmt == FileSniffer.EXPORT:
+            return self.create_from_export_file(pathname, encoding=encoding, text=text)
+        elif fmt == FileSniffer.SIMPLE_COLUMNS:
+            return [ self.create_from_simple_columnar_file(pathname, encoding=encoding, text=text) ]
+        elif fmt == FileSniffer.JSON:
+            return self.create_from_json_file(pathname, encoding=encoding, text=text)
+        elif fmt == FileSniffer.SPC:
+            return self.create_from_spc_file(pathname)
+        else:
+            log.error("unrecognized format %s", pathname)
 
+    ## Create thumbnails for, and announce, Measurements returned by parse_file.
+    def finish_from_file(self, measurements, is_collapsed=False, generate_thumbnail=True):
         if measurements is None:
             return
 
@@ -262,118 +228,15 @@ class MeasurementFactory:
 
         return measurements
 
-    ##
-    # Determine whether file looks like one of our row-ordered files (whether 
-    # individual spectrum, appended spectra, or a row-ordered export)
-    def looks_like_dash(self, pathname, encoding="utf-8"):
-        with open(pathname, "r", encoding=encoding) as infile:
-            return infile.readline().startswith("Dash Output")
-
-    ##
-    # Determine whether file looks like a raw columnar CSV with no metadata,
-    # such as saved by RamanSpecCal.  The sample input looked like:
-    #
-    # \verbatim
-    #     pixel, wavelength, wavenumber, corrected, raw, dark
-    #     0,     802.35,     275.46,     892,       892, 0
-    # \endverbatim
-    #
-    # Essentially, whether the FIRST valid (non-blank, non-column) line is an x-axis header
-    def looks_like_labeled_columns(self, pathname, encoding="utf-8"):
-        result = False
-        first_line = None
-        with open(pathname, "r", encoding=encoding) as infile:
-            for line in infile:
-                line = line.strip()
-                if line.startswith('#') or len(line) == 0:
-                    continue
-                tok = line.lower().split(",")
-                if re.match(r'^(pixel|wavelength|wavenumber)', tok[0]):
-                    result = True
-                first_line = line
-                break
-
-        log.debug(f"looks_like_labeled_columns: result {result}, first_line: {first_line}")
-        return result
-
-    ##
-    # Determine whether file looks like our individual column-ordered CSV files,
-    # i.e. with metadata at the top.
-    #
-    # Our columnar files start with the list of Measurement.CSV_FILE_HEADER 
-    # fields running down the top left (newer files lead with EXTRA_HEADER_FIELDS
-    # first).  
-    #
-    # No Dash file would have a line starting with "Integration Time" (header row
-    # starts with Line Number).
-    #
-    # Export files have very similar formats to columnar, so by adding one
-    # parameter we can use the same test for both formats.  (Export files have
-    # additional padding due to the leading px/nm/cm columns, so even an export
-    # of a single measurement would have more than 2 columns).
-    def looks_like_enlighten_columns(self, pathname, test_export=False, encoding="utf-8"):
-        linecount = 0
-        with open(pathname, "r", encoding=encoding) as infile:
-            for line in infile:
-                # not all "ENLIGHTEN-style" files will necessarily have any one 
-                # metadata field; check a couple common ones (that are unlikely 
-                # to include embedded commas)
-                for field in ["Integration Time", "Pixel Count", "Serial Number", "Model", "Laser Wavelength"]:
-                    if line.startswith(field):
-                        # count how many values (not empty comma-delimited nulls) appear
-                        count = sum([1 if len(x.strip()) > 0 else 0 for x in line.split(",")])
-                        if test_export:
-                            result = count > 2
-                            log.debug(f"looks_like_enlighten_columns: {result} (count {count}, required >2, line {line})")
-                            return count > 2
-                        else:
-                            result = count == 2
-                            log.debug(f"looks_like_enlighten_columns: {result} (count {count}, required 2, line {line})")
-                            return count == 2
-                linecount += 1
-                if linecount > 100:
-                    log.debug(f"looks_line_enlighten_columns: false because no typical metadata in {linecount} lines")
-                    break
-            
-    def looks_like_simple_columns(self, pathname, encoding="utf-8") -> bool:
-        """
-        Determine whether file looks like a simple 2-column set of (x, y) pairs
-        (floats, ints, whatever) with no metadata.  Supports tab- or comma-
-        delimited files.
-        
-        Ignores anything AFTER the first blank line (Solis .asc files put metadata
-        there).
-        """
-        with open(pathname, "r", encoding=encoding) as infile:
-            for line in infile:
-                line = line.strip()
-                if len(line) == 0:
-                    break
-
-                if "\t" in line:
-                    tok = [v.strip() for v in line.split("\t")]
-                else:
-                    tok = [v.strip() for v in line.split(",")]
-
-                if len(tok) != 2:
-                    log.debug(f"not a simple column file: {line}")
-                    return False
-                for v in tok:
-                    try:
-                        float(v)
-                    except:
-                        log.debug(f"not a simple column file: {line}")
-                        return False
-        log.debug(f"seems a simple column file")
-        return True
-
-    def create_from_dash_file(self, pathname, encoding="utf-8"):
+    def create_from_dash_file(self, pathname, encoding="utf-8", text=None):
         parser = DashFileParser(
             ctl         = self.ctl,
             pathname    = pathname,
-            encoding    = encoding)
+            encoding    = encoding,
+            text        = text)
         return parser.parse()
 
+    ## ColumnFileParser reads through wasatch.CSVLoader, which takes a pathname
     def create_from_columnar_file(self, pathname, encoding="utf-8"):
         parser = ColumnFileParser(
             ctl         = self.ctl,
@@ -381,17 +244,21 @@ class MeasurementFactory:
             encoding    = encoding)
         return parser.parse()
 
-    def create_from_export_file(self, pathname, encoding="utf-8"):
+    def create_from_export_file(self, pathname, encoding="utf-8", text=None):
         parser = ExportFileParser(
             ctl         = self.ctl,
             pathname    = pathname,
-            encoding    = encoding)
+            encoding    = encoding,
+            text        = text)
         return parser.parse()
 
-    def create_from_json_file(self, pathname, encoding="utf-8"):
+    def create_from_json_file(self, pathname, encoding="utf-8", text=None):
         try:
-            with open(pathname) as f:
-                data = json.load(f)
+            if text is not None:
+                data = json.loads(text)
+            else:
+                with open(pathname) as f:
+                    data = json.load(f)
         except:
             return log.error("unable to load JSON from %s", pathname, exc_info=1)
 
@@ -413,11 +280,13 @@ class MeasurementFactory:
             graph = self.ctl.graph)
         return parser.parse()
 
-    def create_from_simple_columnar_file(self, pathname, encoding="utf-8"):
+    def create_from_simple_columnar_file(self, pathname, encoding="utf-8", text=None):
         parser = TextFileParser(
             ctl = self.ctl,
             pathname = pathname,
-            graph = self.ctl.graph)
+            graph = self.ctl.graph,
+            encoding = encoding,
+            text = text)
         return parser.parse()
 
     def load_interpolated(self, settings):
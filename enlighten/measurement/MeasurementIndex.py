@@ -0,0 +1,156 @@
+import logging
+
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+##
+# The ordered collection of Measurements on the Clipboard, indexed for
+# constant-time lookup.
+#
+# Measurements used to keep a plain list, so get(measurement_id), the KnowItAll
+# id_callback and delete_measurement each scanned the whole list, and
+# delete_oldest popped from its head; with a large max_thumbnails, a
+# BatchCollection rotating Measurements through the Clipboard went quadratic.
+#
+# Here the Measurements are held in an OrderedDict keyed by the Measurement
+# itself (insertion order is Clipboard order, and removal is O(1) from either
+# end or the middle), with secondary indexes by measurement_id, label and
+# serial number.  The secondary indexes map each key to the (ordered) set of
+# Measurements having it, as loading the same file twice yields two
+# Measurements with the same measurement_id.  Lookups return the oldest match,
+# as the previous linear scans did.
+#
+# The keys each Measurement was indexed under are remembered, so it can be
+# removed even after Measurement.clear() or a rename.  Measurement.update_label
+# and replace_processed_reading call reindex() to keep the indexes current.
+#
+# For existing callers the class behaves like the previous list: it can be
+# iterated (oldest first), tested for truth and length, and indexed; [0] and
+# [-1] are O(1).
+class MeasurementIndex:
+
+    def __init__(self):
+        self.ordered   = OrderedDict()  # Measurement -> (measurement_id, label, serial_number)
+        self.by_id     = {}             # measurement_id -> { Measurement: None }
+        self.by_label  = {}             # label -> { Measurement: None }
+        self.by_serial = {}             # serial_number -> { Measurement: None }
+
+    def __len__(self):
+        return len(self.ordered)
+
+    def __iter__(self):
+        return iter(list(self.ordered))
+
+    def __reversed__(self):
+        return iter(list(reversed(self.ordered)))
+
+    def __contains__(self, measurement):
+        return measurement in self.ordered
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self.ordered)[index]
+        if index == 0 and self.ordered:
+            return next(iter(self.ordered))
+        if index == -1 and self.ordered:
+            return next(reversed(self.ordered))
+        return list(self.ordered)[index]
+
+    # ##########################################################################
+    # Modification
+    # ##########################################################################
+
+    def append(self, measurement):
+        if measurement in self.ordered:
+            log.debug("already indexed %s", measurement.measurement_id)
+            return
+
+        keys = self.get_keys(measurement)
+        self.ordered[measurement] = keys
+        self.add_key(self.by_id,     keys[0], measurement)
+        self.add_key(self.by_label,  keys[1], measurement)
+        self.add_key(self.by_serial, keys[2], measurement)
+
+    ## @returns True if the Measurement was found and removed
+    def remove(self, measurement):
+        keys = self.ordered.pop(measurement, None)
+        if keys is None:
+            return False
+
+        self.remove_key(self.by_id,     keys[0], measurement)
+        self.remove_key(self.by_label,  keys[1], measurement)
+        self.remove_key(self.by_serial, keys[2], measurement)
+        return True
+
+    ##
+    # Re-file a Measurement whose measurement_id, label or serial number has
+    # changed since it was added, keeping its position.
+    def reindex(self, measurement):
+        old = self.ordered.get(measurement, None)
+        if old is None:
+            return
+
+        new = self.get_keys(measurement)
+        if new == old:
+            return
+
+        for index, before, after in zip([self.by_id, self.by_label, self.by_serial], old, new):
+            if before != after:
+                self.remove_key(index, before, measurement)
+                self.add_key(index, after, measurement)
+        self.ordered[measurement] = new
+
+    def clear(self):
+        self.ordered.clear()
+        self.by_id.clear()
+        self.by_label.clear()
+        self.by_serial.clear()
+
+    # ##########################################################################
+    # Lookup
+    # ##########################################################################
+
+    ## @returns the oldest Measurement with the given measurement_id, or None
+    def get(self, measurement_id):
+        return self.first(self.by_id, measurement_id)
+
+    ## @returns the oldest Measurement with the given label, or None
+    def get_by_label(self, label):
+        return self.first(self.by_label, label)
+
+    ## @returns list of Measurements with the given label, oldest first
+    def find_by_label(self, label):
+        return list(self.by_label.get(label, ()))
+
+    ## @returns list of Measurements from the given spectrometer, oldest first
+    def find_by_serial_number(self, serial_number):
+        return list(self.by_serial.get(serial_number, ()))
+
+    # ##########################################################################
+    # Private
+    # ##########################################################################
+
+    def get_keys(self, measurement):
+        settings = measurement.settings
+        serial_number = settings.eeprom.serial_number if settings is not None else None
+        return (measurement.measurement_id, measurement.label, serial_number)
+
+    def first(self, index, key):
+        matches = index.get(key, None)
+        return next(iter(matches)) if matches else None
+
+    def add_key(self, index, key, measurement):
+        matches = index.get(key, None)
+        if matches is None:
+            index[key] = { measurement: None }
+        else:
+            matches[measurement] = None
+
+    def remove_key(self, index, key, measurement):
+        matches = index.get(key, None)
+        if matches is None:
+            return
+        matches.pop(measurement, None)
+        if not matches:
+            del index[key]
@@ -0,0 +1,175 @@
+import logging
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+
+from enlighten import common
+
+if common.use_pyside2():
+    from PySide2 import QtCore
+else:
+    from PySide6 import QtCore
+
+log = logging.getLogger(__name__)
+
+##
+# Carries parsed files from worker threads back to the GUI thread.
+class LoaderSignals(QtCore.QObject):
+
+    finished = QtCore.Signal(object)
+
+##
+# Loads many spectrum files at once (typically a whole folder, via the
+# "Load Folder" button), parsing them in parallel on worker threads.
+#
+# FileManager.select_files_to_load parses selected files one at a time on the
+# GUI thread, which is fine for a handful but slow for a folder of hundreds of
+# CSVs.  Here each file is parsed by MeasurementFactory.parse_file on a pool of
+# worker threads (file I/O, csv and numpy parsing all release the GIL for
+# much of the time); the resulting Measurements are posted back through a Qt
+# signal, and their ThumbnailWidgets created and added to Measurements on the
+# GUI thread, in filename order.
+#
+# Parsing only reads shared state (e.g. the SaveOptions filename and label
+# templates used to name each Measurement), so nothing here needs locking.
+#
+# @verbatim
+# [measurement_loader]
+# max_workers = 4
+# @endverbatim
+class MeasurementLoader:
+
+    SECTION = "measurement_loader"
+
+    EXTENSIONS = [ ".csv", ".json", ".spc", ".asc" ]
+
+    def __init__(self, ctl):
+        self.ctl = ctl
+
+        cfu = ctl.form.ui
+
+        self.max_workers = max(1, self.ctl.config.get_int(self.SECTION, "max_workers", default=4))
+
+        self.pool = None
+        self.batch = 0          # incremented for each load, so stale results can be ignored
+        self.pathnames = []
+        self.results = {}       # index -> list of Measurement (or None)
+        self.next_index = 0
+        self.load_count = 0
+        self.failures = []
+
+        self.signals = LoaderSignals()
+        self.signals.finished.connect(self.finished_callback)
+
+        cfu.pushButton_scope_capture_load_dir.clicked.connect(self.load_directory_callback)
+        cfu.pushButton_scope_capture_load_dir.setWhatsThis("Load all spectra in a folder for display on the graph")
+
+    def is_busy(self):
+        return self.next_index < len(self.pathnames)
+
+    def load_directory_callback(self):
+        directory = self.ctl.file_manager.get_directory()
+        if directory:
+            self.load_directory(directory)
+
+    ##
+    # Load every supported file in the given directory (not recursive).
+    #
+    # @returns number of files queued
+    def load_directory(self, directory):
+        try:
+            names = sorted(os.listdir(directory))
+        except:
+            log.error(f"unable to list {directory}", exc_info=1)
+            return 0
+
+        pathnames = []
+        for name in names:
+            pathname = os.path.join(directory, name)
+            if os.path.splitext(name)[1].lower() in self.EXTENSIONS and os.path.isfile(pathname):
+                pathnames.append(pathname)
+
+        self.ctl.file_manager.last_load_dir = directory
+        return self.load(pathnames)
+
+    ##
+    # Parse the given files on worker threads, and add the resulting
+    # Measurements (in the given order) as they complete.
+    #
+    # @returns number of files queued
+    def load(self, pathnames):
+        if self.is_busy():
+            log.error("already loading files")
+            return 0
+
+        if not pathnames:
+            self.ctl.marquee.info("no spectra found to load")
+            return 0
+
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="MeasurementLoader")
+
+        self.batch += 1
+        self.pathnames = list(pathnames)
+        self.results = {}
+        self.next_index = 0
+        self.load_count = 0
+        self.failures = []
+
+        log.info(f"loading {len(self.pathnames)} files with {self.max_workers} workers")
+        for index, pathname in enumerate(self.pathnames):
+            self.pool.submit(self.work, self.batch, index, pathname)
+        return len(self.pathnames)
+
+    def work(self, batch, index, pathname):
+        """ runs on a worker thread """
+        measurements = None
+        try:
+            measurements = self.ctl.measurement_factory.parse_file(pathname)
+        except:
+            log.error(f"failed to parse file {pathname}", exc_info=1)
+        self.signals.finished.emit((batch, index, measurements))
+
+    def finished_callback(self, result):
+        """ runs on the GUI thread """
+        batch, index, measurements = result
+        if batch != self.batch or self.ctl.shutting_down:
+            return
+
+        self.results[index] = measurements
+
+        # add in order, as far as we've got
+        measurements = self.ctl.measurements
+        while self.next_index in self.results:
+            parsed = self.results.pop(self.next_index)
+            pathname = self.pathnames[self.next_index]
+            self.next_index += 1
+
+            if parsed is None:
+                self.failures.append(pathname)
+                continue
+
+            try:
+                parsed = self.ctl.measurement_factory.finish_from_file(parsed,
+                    is_collapsed = measurements.is_collapsed,
+                    generate_thumbnail = not self.ctl.save_options.load_raw())
+                measurements.add_loaded(parsed)
+                self.load_count += 1
+            except:
+                log.error(f"failed to add measurements from {pathname}", exc_info=1)
+                self.failures.append(pathname)
+
+        if not self.is_busy():
+            self.ctl.marquee.info(f"loaded {self.load_count} files")
+            if self.failures:
+                log.error(f"unable to load {len(self.failures)} files: {self.failures}")
+
+    def stop(self):
+        """ called by Controller.close """
+        self.batch += 1
+        self.pathnames = []
+        self.results = {}
+        self.next_index = 0
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
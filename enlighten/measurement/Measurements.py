@@ -13,6 +13,7 @@ from enlighten import util
 from enlighten import common
 from enlighten.common import msgbox
 from enlighten.measurement.Measurement import Measurement
+from enlighten.measurement.MeasurementIndex import MeasurementIndex
 
 if common.use_pyside2():
     from PySide2 import QtWidgets
@@ -39,7 +40,7 @@ class Measurements:
 
         cfu = self.ctl.form.ui
 
-        self.measurements = []
+        self.measurements = MeasurementIndex()
 
         self.is_collapsed = False
         self.insert_top = True
@@ -83,10 +84,10 @@ class Measurements:
     ## called by KnowItAll.Feature on receiving a MatchResponse from KIA.Wrapper
     # which correponds to a MeasurementID.
     def id_callback(self, measurement_id, declared_match):
-        for m in self.measurements:
-            if m.measurement_id == measurement_id:
-                m.id_callback(declared_match)
-                return
+        m = self.measurements.get(measurement_id)
+        if m is not None:
+            m.id_callback(declared_match)
+            return
         log.error("received DeclaredMatch for missing measurement %s", measurement_id)
 
     def export_callback(self):
@@ -163,10 +164,14 @@ class Measurements:
     ##
     # Enable or disable the Identification button on all Measurement ThumbnailWidgets.
     #
+    # This necessarily visits every ThumbnailWidget, but only when KnowItAll is
+    # enabled or disabled (not per identification).
+    #
     # @todo fold into observers?
     def update_kia(self):
         for m in self.measurements:
-            m.thumbnail_widget.update_kia()
+            if m.thumbnail_widget is not None:
+                m.thumbnail_widget.update_kia()
 
     ##
     # This is the callback which the FileManager will call, one at a time, with
@@ -191,8 +196,14 @@ class Measurements:
             log.debug("create_from_file: no Measurements parsed from %s", pathname)
             return
 
+        self.add_loaded(measurements)
+
+    ##
+    # Reprocess (if configured) and add Measurements which have been loaded
+    # from disk, by create_from_file or MeasurementLoader.
+    def add_loaded(self, measurements):
         for m in measurements:
-            log.debug("create_from_file: completing new measurement")
+            log.debug("add_loaded: completing new measurement")
 
             # reprocess if requested
             if self.ctl.save_options.load_raw():
@@ -262,15 +273,26 @@ class Measurements:
             cfu.verticalLayout_scope_capture_save.insertWidget(-1, measurement.thumbnail_widget)
 
         self.measurements.append(measurement)
+        self.ctl.session_store.archive(measurement)
         self.update_count()
 
     def count(self):
         return len(self.measurements)
 
     def get(self, measurement_id):
-        for m in self.measurements:
-            if m.measurement_id == measurement_id:
-                return m
+        return self.measurements.get(measurement_id)
+
+    ## @returns list of Measurements with the given label, oldest first
+    def find_by_label(self, label):
+        return self.measurements.find_by_label(label)
+
+    ## @returns list of Measurements from the given spectrometer, oldest first
+    def find_by_serial_number(self, serial_number):
+        return self.measurements.find_by_serial_number(serial_number)
+
+    ## called by Measurement.update_label
+    def reindex(self, measurement):
+        self.measurements.reindex(measurement)
 
     def erase_all(self):
         """ Clears the list of Measurements (does not delete from disk). """
@@ -300,13 +322,13 @@ class Measurements:
     #
     # @see https://stackoverflow.com/a/20167458 re: deleteLater()
     def delete_measurement(self, measurement):
-        if measurement is None or measurement not in self.measurements:
+        if measurement is None or not self.measurements.remove(measurement):
             return
 
         log.debug("delete_measurement: %s", measurement.measurement_id)
+        self.ctl.session_store.update(measurement)
         measurement.delete()
         measurement.clear()
-        self.measurements.remove(measurement)
         self.update_count()
 
     ##
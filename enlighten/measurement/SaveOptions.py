@@ -422,6 +422,12 @@ class SaveOptions():
         self.le_note.setFocus()
         self.le_note.selectAll()
 
+    ##
+    # @returns a SaveOptionsSnapshot of the current settings, for use by
+    #          SaveQueue off the GUI thread
+    def snapshot(self):
+        return SaveOptionsSnapshot(self)
+
     # static
     def get_default_configuration():
         return {
@@ -455,3 +461,39 @@ class SaveOptions():
             "collated_export": True,
         }
 
+
+class SaveOptionsSnapshot:
+    """
+    The SaveOptions accessors (checkboxes, templates etc) as they were when the
+    snapshot was taken, so a Measurement can be saved from a worker thread
+    without reading widgets, and unaffected by later changes in the GUI.
+
+    Anything else (wrap_name, and the append_pathname / line_number state of
+    the current row-ordered file) passes through to the live SaveOptions.
+    """
+
+    ACCESSORS = [ "allow_rename_files", "append", "note", "prefix", "label_template",
+                  "filename_template", "filename_as_label", "load_raw", "save_all_spectrometers",
+                  "save_by_col", "save_by_row", "save_collated", "save_csv", "save_spc",
+                  "save_dark", "save_excel", "save_json", "save_dx", "save_pixel", "save_raw",
+                  "save_text", "save_reference", "save_something", "save_wavelength",
+                  "save_wavenumber", "suffix", "save_processed", "has_prefix", "has_suffix",
+                  "has_note", "get_directory", "generate_today_dir" ]
+
+    def __init__(self, save_options):
+        values = { name: getattr(save_options, name)() for name in self.ACCESSORS }
+        values["multipart_suffix"] = save_options.multipart_suffix
+
+        object.__setattr__(self, "save_options", save_options)
+        object.__setattr__(self, "values", values)
+
+    def __getattr__(self, name):
+        # only called for names not found on the snapshot itself
+        if name in self.values:
+            value = self.values[name]
+            return value if name == "multipart_suffix" else (lambda: value)
+        return getattr(self.save_options, name)
+
+    def __setattr__(self, name, value):
+        # e.g. line_number
+        setattr(self.save_options, name, value)
@@ -0,0 +1,253 @@
+import threading
+import logging
+import queue
+import time
+
+from enlighten import common
+
+if common.use_pyside2():
+    from PySide2 import QtCore
+else:
+    from PySide6 import QtCore
+
+log = logging.getLogger(__name__)
+
+##
+# Carries finished SaveJobs from the writer thread back to the GUI thread.
+class SaveSignals(QtCore.QObject):
+
+    finished = QtCore.Signal(object)
+
+##
+# ctl.gui as seen by a background save.  The writer thread can't prompt the
+# user, so it declines to overwrite existing files (unless [Measurement]
+# overwrite_existing is configured, which Measurement.verify_pathname checks
+# first).
+class BackgroundGUI:
+
+    def __init__(self, gui):
+        self.gui = gui
+        self.declined = []
+
+    def __getattr__(self, name):
+        return getattr(self.gui, name)
+
+    def msgbox_with_checkbox(self, title, text, checkbox_text=None):
+        log.error(f"declining to overwrite in background: {text}")
+        self.declined.append(text)
+        return { "ok": False, "checked": False }
+
+##
+# A business object (e.g. ctl.graph) as seen by a background save: the named
+# attributes keep the values they had when the save was queued.
+class FrozenAttributes:
+
+    def __init__(self, obj, names):
+        self.obj = obj
+        for name in names:
+            setattr(self, name, getattr(obj, name))
+
+    def __getattr__(self, name):
+        return getattr(self.obj, name)
+
+##
+# The Controller as seen by a background save: the same, except for a frozen
+# copy of SaveOptions, a GUI which won't prompt, and the GUI state which
+# Measurement reads while saving (x-axis for SPC and JCAMP-DX, EDC and preset
+# metadata) as it was when the save was queued, so that a save reflects the
+# moment of capture, and save_dx_file never finds an unsupported axis (and
+# opens a msgbox) on the writer thread.
+class SaveContext:
+
+    ## ctl attributes to freeze, and which of their attributes
+    FROZEN = { "graph":   [ "current_x_axis" ],
+               "edc":     [ "enabled" ],
+               "presets": [ "selected_preset" ] }
+
+    def __init__(self, ctl):
+        self.ctl = ctl
+        self.save_options = ctl.save_options.snapshot()
+        self.gui = BackgroundGUI(ctl.gui)
+
+        for name, fields in self.FROZEN.items():
+            obj = getattr(ctl, name, None)
+            setattr(self, name, FrozenAttributes(obj, fields) if obj is not None else None)
+
+    def __getattr__(self, name):
+        return getattr(self.ctl, name)
+
+class SaveJob:
+
+    def __init__(self, measurement, callback=None):
+        self.measurement = measurement  # the live Measurement on the Clipboard
+        self.callback = callback
+        self.error = None
+
+        # a private copy to write from the writer thread (see Measurement.clone)
+        self.context = SaveContext(measurement.ctl)
+        self.snapshot = measurement.clone()
+        self.snapshot.ctl = self.context
+        self.snapshot.pathname_by_ext = dict(measurement.pathname_by_ext)
+
+##
+# Writes Measurements to disk on a background thread.
+#
+# Measurement.save writes every format selected in SaveOptions (CSV, TXT,
+# Excel, JSON, SPC, JCAMP-DX), which used to happen on the GUI thread as each
+# Measurement was created, stalling acquisition and the live graph while the
+# disk caught up (particularly with BatchCollection saving at high rates).
+#
+# Instead, MeasurementFactory.create_from_spectrometer hands the new
+# Measurement to submit(), which takes a snapshot (a clone of the Measurement,
+# with its own copy of the spectra and settings, and of the SaveOptions as
+# they are right now) and queues it for a single writer thread, so files are
+# written in order (which row-ordered appends rely on).
+#
+# - backpressure: at most max_pending saves may be outstanding; beyond that
+#   submit() blocks the GUI thread until the disk catches up, rather than
+#   buffering spectra without limit
+# - completion: each finished save is posted back to the GUI thread through a
+#   Qt signal, the resulting pathnames are copied to the live Measurement, and
+#   its ThumbnailWidget is notified (renaming and deleting are disabled while
+#   the save is in flight); failures are reported on the Marquee
+# - shutdown: stop() (called by Controller.close) waits for everything queued
+#   to be written
+#
+# Saves which would report something to the user (no formats selected, or a
+# JCAMP-DX file on an axis it doesn't support) are still done synchronously.
+#
+# Disabled by default:
+#
+# @verbatim
+# [save_queue]
+# enabled = True
+# max_pending = 32
+# @endverbatim
+class SaveQueue:
+
+    SECTION = "save_queue"
+
+    def __init__(self, ctl):
+        self.ctl = ctl
+
+        self.enabled     = self.ctl.config.get_bool(self.SECTION, "enabled", default=False)
+        self.max_pending = max(1, self.ctl.config.get_int(self.SECTION, "max_pending", default=32))
+
+        self.jobs = queue.Queue(maxsize=self.max_pending)
+        self.thread = None
+        self.in_flight = 0
+        self.saved = 0
+        self.failed = 0
+        self.blocked_sec = 0
+
+        self.signals = SaveSignals()
+        self.signals.finished.connect(self.finished_callback)
+
+        if self.enabled:
+            self.start()
+            log.info(f"saving in background (up to {self.max_pending} pending)")
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="SaveQueue", daemon=True)
+        self.thread.start()
+
+    def is_busy(self):
+        return self.in_flight > 0
+
+    def can_save(self, measurement):
+        """ whether this Measurement can be saved in the background """
+        if self.thread is None or measurement.ctl is None:
+            return False
+
+        save_options = self.ctl.save_options
+        if not (save_options.save_something() or save_options.save_spc()):
+            return False # let Measurement.save complain
+        if save_options.save_dx() and self.ctl.graph.current_x_axis not in [ common.Axes.WAVELENGTHS, common.Axes.WAVENUMBERS ]:
+            return False # let Measurement.save_dx_file complain
+        return True
+
+    ##
+    # Queue a Measurement to be saved (blocking if max_pending are already
+    # queued).
+    #
+    # @param callback (Input) called on the GUI thread as callback(job) once saved
+    # @returns False if the caller should save it synchronously instead
+    def submit(self, measurement, callback=None):
+        if not self.can_save(measurement):
+            return False
+
+        job = SaveJob(measurement, callback)
+        if measurement.thumbnail_widget is not None:
+            measurement.thumbnail_widget.set_saving(True)
+
+        self.in_flight += 1
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            log.debug(f"save queue full ({self.max_pending}), waiting for disk")
+            start = time.monotonic()
+            self.jobs.put(job)
+            self.blocked_sec += time.monotonic() - start
+        return True
+
+    def run(self):
+        """ runs on the writer thread """
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+
+            try:
+                job.snapshot.save()
+                if job.context.gui.declined:
+                    job.error = "file already exists"
+            except Exception as ex:
+                log.error(f"error saving {job.snapshot.measurement_id}", exc_info=1)
+                job.error = str(ex)
+
+            self.signals.finished.emit(job)
+
+    def finished_callback(self, job):
+        """ runs on the GUI thread """
+        self.in_flight -= 1
+
+        m = job.measurement
+        if m.processed_reading is None:
+            # deleted from the Clipboard meanwhile
+            return
+
+        snapshot = job.snapshot
+        m.basename = snapshot.basename
+        m.appending = snapshot.appending
+        m.pathname_by_ext.update(snapshot.pathname_by_ext)
+
+        if job.error is None:
+            self.saved += 1
+        else:
+            self.failed += 1
+            self.ctl.marquee.error(f"failed to save {m.label}: {job.error}")
+
+        if m.thumbnail_widget is not None:
+            m.thumbnail_widget.set_saving(False, error=job.error)
+            if m.appending:
+                # see Measurement.save_csv_file_by_row
+                m.thumbnail_widget.disable_edit()
+                m.thumbnail_widget.disable_trash()
+
+        if job.callback is not None:
+            try:
+                job.callback(job)
+            except:
+                log.error("error in save callback", exc_info=1)
+
+    def stop(self):
+        """ called by Controller.close: writes everything still queued """
+        if self.thread is None:
+            return
+
+        if self.in_flight:
+            log.info(f"waiting for {self.in_flight} queued saves")
+        self.jobs.put(None)
+        self.thread.join()
+        self.thread = None
+        log.debug(f"saved {self.saved}, failed {self.failed}, blocked {self.blocked_sec:.2f}sec")
@@ -0,0 +1,319 @@
+import os
+import re
+import copy
+import json
+import shutil
+import logging
+import datetime
+import tempfile
+import numpy as np
+
+from wasatch.ProcessedReading import ProcessedReading
+
+from enlighten.measurement.Measurement import Measurement
+
+log = logging.getLogger(__name__)
+
+##
+# One array component (e.g. processed) of one spectrometer's spectra, of one
+# length, stored as consecutive float64 rows in a flat file.
+#
+# Rows are appended with ordinary (sequential) writes, and read back through a
+# read-only np.memmap which is re-mapped as the file grows, so only the rows
+# actually read are paged into memory.
+class SpectrumColumn:
+
+    def __init__(self, name, pathname, length):
+        self.name = name
+        self.pathname = pathname
+        self.length = length
+        self.count = 0
+        self.last = None    # last row appended (to skip storing repeats)
+        self.mapped = None
+
+        self.f = open(pathname, "w+b")
+
+    ## @returns row index
+    def append(self, a):
+        a = np.ascontiguousarray(a, dtype=np.float64)
+        self.f.write(a.tobytes())
+        self.last = a
+        self.count += 1
+        return self.count - 1
+
+    def get(self, row):
+        if self.mapped is None or row >= len(self.mapped):
+            self.f.flush()
+            self.mapped = np.memmap(self.pathname, dtype=np.float64, mode="r", shape=(self.count, self.length))
+        return np.array(self.mapped[row])
+
+    def close(self):
+        self.mapped = None
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+##
+# Keeps every Measurement of the session, including those which have rotated
+# off the Clipboard.
+#
+# Measurements.add enforces ctl.max_thumbnails by deleting the oldest
+# Measurement (and its ThumbnailWidget) from the Clipboard, so during long
+# BatchCollections earlier spectra became unreachable from the GUI.  With the
+# session store enabled, each Measurement is also archived here as it is added
+# to the Clipboard:
+#
+# - its arrays (processed, raw, dark, reference, wavelengths and wavenumbers)
+#   are appended to one SpectrumColumn file per spectrometer and component, in
+#   the store's directory; a component identical to the previous one stored
+#   for that spectrometer (typically dark, reference and the x-axes) is not
+#   stored again, just referenced
+# - its metadata (label, timestamp, serial number, technique, pathnames...)
+#   becomes one row of an in-memory table, also appended to session.jsonl
+# - its SpectrometerSettings are interned, so Measurements taken with the same
+#   settings share one copy
+#
+# Only the newest max_thumbnails Measurements remain materialized as
+# ThumbnailWidgets.  SessionBrowser (the "History" button) searches the table,
+# and restore() rebuilds any row as a Measurement to put back on the Clipboard
+# without re-parsing its files.
+#
+# When a Measurement leaves the Clipboard, its row is updated with its final
+# label and pathnames.  The store lasts for the session: by default it lives in
+# a temporary directory deleted at shutdown.
+#
+# @verbatim
+# [session_store]
+# enabled = True
+# directory = C:\path\to\scratch  (default: a new temporary directory)
+# @endverbatim
+class SessionStore:
+
+    SECTION = "session_store"
+
+    COMPONENTS = [ "processed", "raw", "dark", "reference", "wavelengths", "wavenumbers" ]
+
+    ## Measurement attributes kept in each row
+    FIELDS = [ "measurement_id", "label", "basename", "technique", "note", "prefix", "suffix",
+               "plugin_name", "baseline_correction_algo", "renamed_manually" ]
+
+    ## row fields matched by search()
+    SEARCHED = [ "label", "measurement_id", "serial_number", "technique", "note", "basename" ]
+
+    def __init__(self, ctl):
+        self.ctl = ctl
+
+        self.enabled = self.ctl.config.get_bool(self.SECTION, "enabled", default=False)
+
+        self.directory = None
+        self.temporary = False
+        self.table = None
+        self.rows = []              # row dicts, in archive order
+        self.row_by_id = {}         # measurement_id -> row index
+        self.haystacks = []         # lowercase searchable text of each row
+        self.columns = {}           # (serial_number, component, length) -> SpectrumColumn
+        self.column_by_name = {}    # SpectrumColumn.name -> SpectrumColumn
+        self.settings = []          # interned SpectrometerSettings
+        self.settings_index = {}    # settings fingerprint -> index into self.settings
+
+        cfu = self.ctl.form.ui
+        self.bt_history = cfu.pushButton_session_history
+        self.bt_history.setVisible(self.enabled)
+        self.bt_history.clicked.connect(self.history_callback)
+        self.bt_history.setWhatsThis("Search and re-display every spectrum of this session, including those no longer on the Clipboard")
+
+        if self.enabled:
+            directory = None
+            if self.ctl.config.has_option(self.SECTION, "directory"):
+                directory = self.ctl.config.get(self.SECTION, "directory", raw=True)
+            self.open(directory)
+
+    def open(self, directory=None):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        else:
+            directory = tempfile.mkdtemp(prefix="enlighten-session-")
+            self.temporary = True
+        self.directory = directory
+        self.table = open(os.path.join(directory, "session.jsonl"), "a")
+        log.info(f"archiving session spectra to {directory}")
+
+    def __len__(self):
+        return len(self.rows)
+
+    def history_callback(self):
+        self.ctl.session_browser.show()
+
+    # ##########################################################################
+    # Archiving
+    # ##########################################################################
+
+    ##
+    # Called by Measurements.add.
+    #
+    # @returns row index (or None if not archived)
+    def archive(self, measurement):
+        if self.table is None or measurement.processed_reading is None:
+            return
+
+        # already archived (e.g. a restored Measurement)
+        if measurement.session_row is not None:
+            return measurement.session_row
+
+        pr = measurement.processed_reading
+        settings = measurement.settings
+        serial_number = settings.eeprom.serial_number if settings is not None else None
+
+        arrays = {}
+        for component in self.COMPONENTS:
+            a = getattr(pr, "get_" + component)(fast=True)
+            if a is None or len(a) == 0:
+                continue
+            arrays[component] = self.store_array(serial_number, component, a)
+
+        row = { "row": len(self.rows),
+                "timestamp": measurement.timestamp.isoformat() if measurement.timestamp else None,
+                "serial_number": serial_number,
+                "pathnames": dict(measurement.pathname_by_ext),
+                "arrays": arrays,
+                "settings": self.intern_settings(settings) }
+        for field in self.FIELDS:
+            row[field] = getattr(measurement, field, None)
+
+        self.rows.append(row)
+        self.haystacks.append(self.make_haystack(row))
+        self.row_by_id[measurement.measurement_id] = row["row"]
+        measurement.session_row = row["row"]
+        self.write_row(row)
+        return row["row"]
+
+    ## @returns [ column name, row ]
+    def store_array(self, serial_number, component, a):
+        key = (serial_number, component, len(a))
+        column = self.columns.get(key, None)
+        if column is None:
+            name = re.sub(r"[^A-Za-z0-9_-]", "_", f"{serial_number}-{component}-{len(a)}")
+            column = SpectrumColumn(name, os.path.join(self.directory, name + ".f64"), len(a))
+            self.columns[key] = column
+            self.column_by_name[name] = column
+        elif column.last is not None and np.array_equal(column.last, a):
+            return [ column.name, column.count - 1 ]
+        return [ column.name, column.append(a) ]
+
+    ## @returns index of an equivalent SpectrometerSettings in self.settings
+    def intern_settings(self, settings):
+        if settings is None:
+            return None
+        fingerprint = json.dumps(settings.to_dict(), sort_keys=True, default=str)
+        index = self.settings_index.get(fingerprint, None)
+        if index is None:
+            index = len(self.settings)
+            self.settings.append(settings)
+            self.settings_index[fingerprint] = index
+        return index
+
+    def write_row(self, row):
+        try:
+            self.table.write(json.dumps(row, default=str) + "\n")
+        except:
+            log.error("unable to write session table", exc_info=1)
+
+    ##
+    # Called by Measurements.delete_measurement: record the label and pathnames
+    # the Measurement had when it left the Clipboard.
+    def update(self, measurement):
+        index = measurement.session_row
+        if self.table is None or index is None or index >= len(self.rows):
+            return
+
+        row = self.rows[index]
+        changes = {}
+        for field in [ "label", "basename", "renamed_manually" ]:
+            value = getattr(measurement, field, None)
+            if row[field] != value:
+                changes[field] = row[field] = value
+        if row["pathnames"] != measurement.pathname_by_ext:
+            changes["pathnames"] = row["pathnames"] = dict(measurement.pathname_by_ext)
+
+        if changes:
+            self.haystacks[index] = self.make_haystack(row)
+            changes["update"] = index
+            self.write_row(changes)
+
+    # ##########################################################################
+    # Retrieval
+    # ##########################################################################
+
+    def get_row(self, index):
+        return self.rows[index]
+
+    def get_timestamp(self, index):
+        ts = self.rows[index]["timestamp"]
+        return datetime.datetime.fromisoformat(ts) if ts else None
+
+    ## @returns dict of component -> numpy array
+    def get_arrays(self, index):
+        arrays = {}
+        for component, (name, row) in self.rows[index]["arrays"].items():
+            arrays[component] = self.column_by_name[name].get(row)
+        return arrays
+
+    def make_haystack(self, row):
+        return " ".join(str(row[k]) for k in self.SEARCHED if row[k] is not None).lower()
+
+    ##
+    # Find rows whose label, measurement_id, serial number, technique, note or
+    # filename contain the given text (case-insensitive).
+    #
+    # @returns row indices, newest first
+    def search(self, text=None, serial_number=None):
+        words = text.lower().split() if text else []
+        result = []
+        for index in range(len(self.rows) - 1, -1, -1):
+            if serial_number is not None and self.rows[index]["serial_number"] != serial_number:
+                continue
+            if words:
+                haystack = self.haystacks[index]
+                if not all(word in haystack for word in words):
+                    continue
+            result.append(index)
+        return result
+
+    ##
+    # Rebuild an archived Measurement (without a ThumbnailWidget).
+    def restore(self, index):
+        row = self.rows[index]
+        arrays = self.get_arrays(index)
+        settings = copy.deepcopy(self.settings[row["settings"]]) if row["settings"] is not None else None
+
+        pr = ProcessedReading(d={ component.capitalize(): a for component, a in arrays.items() }, settings=settings)
+        source = next(iter(row["pathnames"].values()), None) or os.path.join(self.directory, "session.jsonl")
+
+        # the archived arrays are already interpolated, if they were at all
+        m = Measurement(self.ctl,
+            source_pathname   = source,
+            processed_reading = pr,
+            settings          = settings,
+            timestamp         = self.get_timestamp(index),
+            interpolate       = False)
+
+        for field in self.FIELDS:
+            if field != "measurement_id":
+                setattr(m, field, row[field])
+        m.pathname_by_ext = dict(row["pathnames"])
+        m.session_row = index
+        return m
+
+    def stop(self):
+        """ called by Controller.close """
+        if self.table is None:
+            return
+
+        self.table.close()
+        self.table = None
+        for column in self.columns.values():
+            column.close()
+        log.debug(f"archived {len(self.rows)} session spectra in {len(self.columns)} columns")
+
+        if self.temporary:
+            shutil.rmtree(self.directory, ignore_errors=True)
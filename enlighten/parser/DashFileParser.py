@@ -1,6 +1,9 @@
 import datetime
 import logging
 import csv
+import io
+
+import numpy as np
 
 from enlighten.measurement.Measurement import Measurement
 
@@ -158,11 +161,12 @@ class DashFileParser:
     including those given).
     """
 
-    def __init__(self, ctl, pathname, encoding="utf-8"):
+    def __init__(self, ctl, pathname, encoding="utf-8", text=None):
 
         self.ctl = ctl
         self.pathname = pathname
         self.encoding = encoding
+        self.text = text        # file contents, if already read (see FileSniffer)
 
         # all the DashSpectrometers we've seen in this file
         self.specs = {}
@@ -227,7 +231,11 @@ class DashFileParser:
         # for the prefix metadata fields.  All of the array data (whether pixels,
         # wavelengths or wavenumbers, or processed, raw, dark or reference 
         # spectra) will go into a single array element csv_in['remainder'].
-        csv_in = csv.DictReader(open(self.pathname, 'r', encoding=self.encoding), Measurement.CSV_HEADER_FIELDS, 'remainder')
+        if self.text is not None:
+            infile = io.StringIO(self.text, newline=None)
+        else:
+            infile = open(self.pathname, 'r', encoding=self.encoding)
+        csv_in = csv.DictReader(infile, Measurement.CSV_HEADER_FIELDS, 'remainder')
 
         readcount       =  0 # physical file line 
         last_linenumber = -1 # Line Number
@@ -283,8 +291,9 @@ class DashFileParser:
                     log.debug("load_dash_file: ignoring line %s", note)
                     continue
 
-                # line must be processed/raw/dark/reference
-                spectrum = [float(x) for x in row['remainder']]
+                # line must be processed/raw/dark/reference (numpy converts
+                # the whole row in C, much faster than float() per value)
+                spectrum = np.asarray(row['remainder'], dtype=np.float64)
                 spec.update_processed_reading(note, spectrum)
 
         log.debug("done parsing %s", self.pathname)
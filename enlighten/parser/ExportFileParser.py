@@ -1,8 +1,11 @@
 import datetime
 import logging
 import csv
+import io
 import re
 
+import numpy as np
+
 from enlighten.measurement.Measurement import Measurement
 
 from wasatch.Reading import Reading
@@ -48,13 +51,31 @@ class ExportFileParser:
     A unit-test of sorts for this class can be found in 
     enlighten/scripts/split-spectra.py.
 
+    Batch exports can hold thousands of spectra, so by default the data block
+    (everything after the header row) is parsed in one go by numpy into a 2D
+    array, and each ExportedMeasurement takes its columns from that (see
+    load_data_block).  Files numpy can't parse that way (ragged rows, quoted
+    cells, literal NaN values etc) fall back to reading them line-by-line
+    with process_data.
+
     @warning this does not currently work with "collated" exports.
     """ 
-    def __init__(self, ctl, pathname, encoding="utf-8"):
+
+    ## ProcessedReading attribute for each recognized data header
+    HEADER_ATTRS = { "processed": "processed", "raw": "raw", "dark": "dark", "reference": "reference" }
+
+    ## empty cells (which process_data skips), and "NA" cells (which it reads as 0)
+    #  allowing for whitespace (slow, so only used if the data has any)
+    EMPTY_CELL = re.compile(r"(?:^|(?<=,))[ \t]*(?=,|$)", re.MULTILINE)
+    NA_CELL    = re.compile(r"(?:^|(?<=,))[ \t]*NA[ \t]*(?=,|$)", re.MULTILINE)
+
+    def __init__(self, ctl, pathname, encoding="utf-8", bulk=True, text=None):
 
         self.ctl      = ctl
         self.pathname = pathname
         self.encoding = encoding
+        self.text     = text    # file contents, if already read (see FileSniffer)
+        self.bulk     = bulk    # parse the data block with numpy if possible
 
         self.spectrometers = {}
         self.measurements  = []
@@ -448,12 +469,111 @@ class ExportFileParser:
                     else:
                         log.debug(f"array was none, not processing data value {value}")
 
+    def load_data_block(self, text):
+        """
+        Parse the entire data block at once, storing each column in the 
+        appropriate ExportedMeasurement (equivalent to calling process_data 
+        on each line).
+
+        @verbatim
+        EnlightenVer
+        MeasID      A        B        C       
+        Serial      S1       S1       S2       
+        Label       Aa       Bb       Cc 
+        m1          x        y        z      
+        m2          x        y        z     
+        
+        S1    S2    Aa       Bb       Cc       
+        px wl px wl pr rw dk pr rw dk pr rw dk 
+        0  1  0  2  1  2  1  2  3  2  5  6  1  <==
+        0  1  0  2  1  2  1  2  3  2  5  6  1  <==
+        @endverbatim
+
+        @returns False if the block must be parsed line-by-line instead
+        """
+        for em in self.exported_measurements:
+            headers = [ h.lower() for h in em.headers ]
+            if len(headers) < em.header_count or len(set(headers)) < len(headers):
+                log.debug("load_data_block: irregular headers")
+                return False
+
+        # loadtxt would read these, but process_data wouldn't (or would read 
+        # them differently)
+        # (any spelling of NaN contains "a" or "AN")
+        if '"' in text or "a" in text or "AN" in text:
+            log.debug("load_data_block: quotes or NaN in data")
+            return False
+
+        lines = [ line for line in text.splitlines() if line.strip() ]
+        if len(lines) == 0:
+            return True
+
+        # use NaN to mark empty cells, so they can be dropped from each column
+        if " " in text or "\t" in text:
+            text = "\n".join(lines)
+            text = self.NA_CELL.sub("0", text)
+            text = self.EMPTY_CELL.sub("nan", text)
+        else:
+            text = "\n".join([ self.fill_cells(line) for line in lines ])
+
+        try:
+            data = np.loadtxt(io.StringIO(text), delimiter=",", dtype=np.float64, ndmin=2)
+        except ValueError as ex:
+            log.debug(f"load_data_block: falling back to line-by-line ({ex})")
+            return False
+
+        # one contiguous row per column, and which columns had empty cells
+        columns = np.ascontiguousarray(data.T)
+        has_empty = np.isnan(columns).any(axis=1)
+
+        col = self.skip_fields
+        for em in self.exported_measurements:
+            for header in em.headers[:em.header_count]:
+                if col >= len(columns):
+                    break
+                column = columns[col]
+                if has_empty[col]:
+                    column = column[~np.isnan(column)]
+                col += 1
+
+                attr = self.HEADER_ATTRS.get(header.lower(), None)
+                if attr is None or not isinstance(getattr(em.processed_reading, attr), list):
+                    log.debug(f"array was none, not processing {header} column")
+                    continue
+
+                setattr(em.processed_reading, attr, column)
+
+        log.debug("load_data_block: read %d rows of %d columns", data.shape[0], data.shape[1])
+        return True
+
+    @staticmethod
+    def fill_cells(line):
+        """
+        @param line (Input) a data line, without spaces or tabs
+        @returns the line with empty cells replaced by "nan" and "NA" cells by "0"
+        """
+        if ",," not in line and "NA" not in line and line[0] != "," and line[-1] != ",":
+            return line
+
+        # bracket the line with commas, so every cell is delimited on both
+        # sides; each replacement is done twice, as neighboring matches overlap
+        line = "," + line + ","
+        for _ in range(2):
+            line = line.replace(",NA,", ",0,")
+        for _ in range(2):
+            line = line.replace(",,", ",nan,")
+        return line[1:-1]
+
     def load_data(self):
         """ Read in the export file line-by-line, slurping in data for later filing. """
         state = "reading_metadata"
         log.debug("loading %s", self.pathname)
         line_count = 0
-        with open(self.pathname, "r", encoding=self.encoding) as infile:
+        if self.text is not None:
+            infile = io.StringIO(self.text, newline=None)
+        else:
+            infile = open(self.pathname, "r", encoding=self.encoding)
+        with infile:
             csv_lines = csv.reader(infile)
             for line in csv_lines:
                 values = [ x.strip() for x in line ]
@@ -475,6 +595,13 @@ class ExportFileParser:
                     if values[0].lower() in ["pixel", "wavelength", "wavenumber"]:
                         self.process_header(values)
                         state = "reading_data"
+
+                        if self.bulk:
+                            text = infile.read()
+                            if not self.load_data_block(text):
+                                for line in csv.reader(io.StringIO(text)):
+                                    self.process_data([ x.strip() for x in line ])
+                            break
                     elif self.format > 1 and len(values[0]) > 0:
                         # assume this is the label row
                         self.process_labels(values)
@@ -0,0 +1,246 @@
+import codecs
+import logging
+import os
+import io
+import re
+
+log = logging.getLogger(__name__)
+
+##
+# Works out the encoding and format of a spectrum file in a single read.
+#
+# MeasurementFactory.create_from_file used to call util.determine_encoding and
+# then each looks_like_foo() test in turn, each re-opening the file and reading
+# it from the top.  FileSniffer instead reads a bounded prefix of the file once,
+# runs the same tests against the buffered lines, and (if the whole file fit in
+# the prefix, as is typical for individual spectra) hands the decoded text on
+# to the chosen parser, so most files are only read from disk once.
+#
+# The tests themselves are unchanged from the old MeasurementFactory methods.
+#
+# Note that everything here is GUI-free, so FileSniffer may be used from
+# worker threads (see MeasurementLoader).
+class FileSniffer:
+
+    ## read up to this many bytes when sniffing
+    PREFIX_BYTES = 1024 * 1024
+
+    DASH              = "dash"
+    LABELED_COLUMNS   = "labeled_columns"
+    ENLIGHTEN_COLUMNS = "enlighten_columns"
+    EXPORT            = "export"
+    SIMPLE_COLUMNS    = "simple_columns"
+    JSON              = "json"
+    SPC               = "spc"
+
+    ## metadata fields checked by looks_like_enlighten_columns
+    ENLIGHTEN_FIELDS = ["Integration Time", "Pixel Count", "Serial Number", "Model", "Laser Wavelength"]
+
+    def __init__(self, pathname, prefix_bytes=None):
+        self.pathname = pathname
+        self.prefix_bytes = prefix_bytes if prefix_bytes else self.PREFIX_BYTES
+
+        self.encoding = "utf-8"
+        self.complete = False   # whether the prefix holds the entire file
+        self.text = None        # entire decoded file, if complete and decodable
+        self.head = ""          # decoded complete lines in the prefix
+        self.format = None
+
+        self.read_prefix()
+
+    # ##########################################################################
+    # Reading
+    # ##########################################################################
+
+    def read_prefix(self):
+        with open(self.pathname, "rb") as infile:
+            prefix = infile.read(self.prefix_bytes + 1)
+
+        self.complete = len(prefix) <= self.prefix_bytes
+        prefix = prefix[:self.prefix_bytes]
+
+        self.encoding = self.determine_encoding(prefix, self.complete)
+
+        if self.complete:
+            try:
+                self.text = prefix.decode(self.encoding)
+                text = self.text
+            except UnicodeDecodeError:
+                # leave it to the parser to report (as it would have before)
+                text = prefix.decode(self.encoding, errors="replace")
+        else:
+            decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+            text = decoder.decode(prefix, final=False)
+
+        # don't sniff a line truncated by the end of the prefix
+        if not self.complete:
+            text = text[:max(text.rfind("\n"), text.rfind("\r")) + 1]
+        self.head = text
+
+        log.debug(f"read {len(prefix)} bytes (complete {self.complete}, encoding {self.encoding}) from {self.pathname}")
+
+    ## @see util.determine_encoding (which this replicates on the buffered first line)
+    @staticmethod
+    def determine_encoding(prefix, complete=True):
+        end = prefix.find(b"\n")
+        first_line = prefix if end < 0 else prefix[:end + 1]
+        try:
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            line = decoder.decode(first_line, final=complete or end >= 0)
+            return "utf-8-sig" if u'\ufeff' in line else "utf-8"
+        except:
+            # if it's not utf-8 or utf-8-sig we'll just assume it's using Central and Eastern Europe encoding
+            return "iso8859_2"
+
+    ## @returns an iterator over the lines in the prefix (read lazily, as most tests stop early)
+    def lines(self):
+        return io.StringIO(self.head, newline=None)
+
+    ##
+    # @returns a text stream of the file, from the buffer if the whole file was
+    #          read, otherwise by re-opening it
+    def open(self):
+        if self.text is not None:
+            return io.StringIO(self.text, newline=None)
+        return open(self.pathname, "r", encoding=self.encoding)
+
+    # ##########################################################################
+    # Format
+    # ##########################################################################
+
+    ## @returns one of the format constants, or None if unrecognized
+    def sniff(self):
+        ext = os.path.splitext(self.pathname)[1].lower()
+
+        fmt = None
+        if ext == ".csv":
+            if self.looks_like_dash():
+                fmt = self.DASH
+            elif self.looks_like_labeled_columns():
+                fmt = self.LABELED_COLUMNS
+            elif self.looks_like_enlighten_columns():
+                fmt = self.ENLIGHTEN_COLUMNS
+            elif self.looks_like_enlighten_columns(test_export=True):
+                fmt = self.EXPORT
+            elif self.looks_like_simple_columns():
+                fmt = self.SIMPLE_COLUMNS
+        elif ext == ".asc":
+            if self.looks_like_simple_columns():
+                fmt = self.SIMPLE_COLUMNS
+        elif ext == ".json":
+            fmt = self.JSON
+        elif ext == ".spc":
+            fmt = self.SPC
+
+        log.debug(f"sniff: {fmt} ({self.pathname})")
+        self.format = fmt
+        return fmt
+
+    ##
+    # Determine whether file looks like one of our row-ordered files (whether
+    # individual spectrum, appended spectra, or a row-ordered export)
+    def looks_like_dash(self):
+        return self.lines().readline().startswith("Dash Output")
+
+    ##
+    # Determine whether file looks like a raw columnar CSV with no metadata,
+    # such as saved by RamanSpecCal.  The sample input looked like:
+    #
+    # \verbatim
+    #     pixel, wavelength, wavenumber, corrected, raw, dark
+    #     0,     802.35,     275.46,     892,       892, 0
+    # \endverbatim
+    #
+    # Essentially, whether the FIRST valid (non-blank, non-column) line is an x-axis header
+    def looks_like_labeled_columns(self):
+        result = False
+        first_line = None
+        for line in self.lines():
+            line = line.strip()
+            if line.startswith('#') or len(line) == 0:
+                continue
+            tok = line.lower().split(",")
+            if re.match(r'^(pixel|wavelength|wavenumber)', tok[0]):
+                result = True
+            first_line = line
+            break
+
+        log.debug(f"looks_like_labeled_columns: result {result}, first_line: {first_line}")
+        return result
+
+    ##
+    # Determine whether file looks like our individual column-ordered CSV files,
+    # i.e. with metadata at the top.
+    #
+    # Our columnar files start with the list of Measurement.CSV_FILE_HEADER
+    # fields running down the top left (newer files lead with EXTRA_HEADER_FIELDS
+    # first).
+    #
+    # No Dash file would have a line starting with "Integration Time" (header row
+    # starts with Line Number).
+    #
+    # Export files have very similar formats to columnar, so by adding one
+    # parameter we can use the same test for both formats.  (Export files have
+    # additional padding due to the leading px/nm/cm columns, so even an export
+    # of a single measurement would have more than 2 columns).
+    def looks_like_enlighten_columns(self, test_export=False):
+        for linecount, line in enumerate(self.lines()):
+            # not all "ENLIGHTEN-style" files will necessarily have any one
+            # metadata field; check a couple common ones (that are unlikely
+            # to include embedded commas)
+            for field in self.ENLIGHTEN_FIELDS:
+                if line.startswith(field):
+                    # count how many values (not empty comma-delimited nulls) appear
+                    count = sum([1 if len(x.strip()) > 0 else 0 for x in line.split(",")])
+                    result = count > 2 if test_export else count == 2
+                    log.debug(f"looks_like_enlighten_columns: {result} (count {count}, test_export {test_export}, line {line})")
+                    return result
+            if linecount >= 100:
+                log.debug(f"looks_line_enlighten_columns: false because no typical metadata in {linecount + 1} lines")
+                break
+        return False
+
+    def looks_like_simple_columns(self) -> bool:
+        """
+        Determine whether file looks like a simple 2-column set of (x, y) pairs
+        (floats, ints, whatever) with no metadata.  Supports tab- or comma-
+        delimited files.
+
+        Ignores anything AFTER the first blank line (Solis .asc files put metadata
+        there).
+        """
+        result = self.check_simple_columns(self.lines())
+        if result is None:
+            if self.complete:
+                result = True
+            else:
+                # ran off the end of the prefix without a verdict, so scan the
+                # whole file (only for very long two-column files)
+                with open(self.pathname, "r", encoding=self.encoding, errors="replace") as infile:
+                    result = self.check_simple_columns(infile) is not False
+
+        if result:
+            log.debug(f"seems a simple column file")
+        return result
+
+    ## @returns False on a non-conforming line, True at a blank line, else None
+    def check_simple_columns(self, lines):
+        for line in lines:
+            line = line.strip()
+            if len(line) == 0:
+                return True
+
+            if "\t" in line:
+                tok = [v.strip() for v in line.split("\t")]
+            else:
+                tok = [v.strip() for v in line.split(",")]
+
+            if len(tok) != 2:
+                log.debug(f"not a simple column file: {line}")
+                return False
+            for v in tok:
+                try:
+                    float(v)
+                except:
+                    log.debug(f"not a simple column file: {line}")
+                    return False
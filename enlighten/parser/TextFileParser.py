@@ -1,5 +1,6 @@
 import datetime
 import logging
+import io
 
 from enlighten.measurement.Measurement import Measurement
 
@@ -31,10 +32,12 @@ class TextFileParser:
           excitation for that unit as the excitation — or even for full x-axis?
     """
 
-    def __init__(self, ctl, pathname, graph):
+    def __init__(self, ctl, pathname, graph, encoding=None, text=None):
         self.ctl = ctl
         self.pathname = pathname
         self.graph = graph
+        self.encoding = encoding
+        self.text = text        # file contents, if already read (see FileSniffer)
 
         self.timestamp = datetime.datetime.now()
         self.processed_reading = ProcessedReading()
@@ -45,7 +48,11 @@ class TextFileParser:
         x = []
         y = []
 
-        with open(self.pathname, "r") as infile:
+        if self.text is not None:
+            infile = io.StringIO(self.text, newline=None)
+        else:
+            infile = open(self.pathname, "r", encoding=self.encoding)
+        with infile:
             for line in infile:
                 line = line.strip()
                 if len(line) == 0:
@@ -1,5 +1,6 @@
 import logging
-import math
+
+from enlighten.post_processing.ReferenceEngine import ReferenceEngine
 
 log = logging.getLogger(__name__)
 
@@ -24,33 +25,18 @@ class AbsorbanceFeature:
         then stores it back into 'processed.'
 
         @returns False if transmission can't be computed, or value exceeds MAX_AU
-        @todo optimize with Numpy
         """
         pr = processed_reading
 
-        if not self.ctl.transmission.process(pr, settings, app_state):
+        trans = self.ctl.transmission.compute(pr, settings, app_state)
+        if trans is None:
             log.error("can't compute absorbance w/o transmission")
             return False
 
-        saturated = False
-        absorbance = []
-        trans = pr.get_processed()
-        for t_perc in trans:
-            au = 0
-            t = t_perc / 100.0
-            if t != 0:
-                if t >= 0:
-                    try:
-                        au = -1.0 * math.log10(t)
-                    except:
-                        pass
-                else:
-                    au = AbsorbanceFeature.MAX_AU
-                    saturated = True
-            absorbance.append(au)
+        absorbance, saturated = ReferenceEngine.absorbance(trans, AbsorbanceFeature.MAX_AU)
 
         log.debug(f"calling pr.set_processed({absorbance[:5]})")
-        pr.set_processed(absorbance)
+        pr.set_processed(absorbance.tolist())
 
         if saturated:
             self.ctl.marquee.error("absorbance out-of-range")
@@ -0,0 +1,154 @@
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+
+from enlighten import common
+
+if common.use_pyside2():
+    from PySide2 import QtCore
+else:
+    from PySide6 import QtCore
+
+log = logging.getLogger(__name__)
+
+##
+# Carries finished PipelineJobs from worker threads back to the GUI thread.
+#
+# The QObject is created on the GUI thread, so emitting from a worker thread
+# results in a queued connection and the slot runs in the Qt event loop.
+class ProcessingSignals(QtCore.QObject):
+
+    finished = QtCore.Signal(object)
+
+##
+# Runs the numeric tail of ProcessingPipeline (despiking, baseline correction,
+# Richardson-Lucy, boxcar, interpolation) on a small pool of worker threads,
+# so that an expensive baseline algorithm (FABC, Wavelet...) or deconvolution
+# doesn't stall the GUI for every connected spectrometer.
+#
+# Controller.process_reading still runs ProcessingPipeline.start() on the GUI
+# thread, then hands the PipelineJob to submit().  When the worker finishes,
+# the job is posted back through a Qt signal and the callback (the rest of
+# process_reading: plugins, graphing, KnowItAll etc) runs on the GUI thread.
+#
+# Each spectrometer has at most one job in flight, which keeps per-device
+# state in the processing features (e.g. WarmStartAirPLS, DespikingFeature's
+# temporal history) single-threaded.
+# If new frames arrive while a job is in flight, only the newest is kept
+# pending and older ones are dropped, so the display always catches up to the
+# latest Reading.  Frames answering a TakeOneRequest are never dropped.
+#
+# The numeric stages are mostly numpy/scipy, which release the GIL during
+# the heavy lifting, so threads suffice and avoid pickling spectra and
+# features across process boundaries.
+#
+# Disabled by default:
+#
+# @verbatim
+# [async_processing]
+# enabled = True
+# max_workers = 2
+# @endverbatim
+class AsyncProcessingExecutor:
+
+    SECTION = "async_processing"
+
+    def __init__(self, ctl):
+        self.ctl = ctl
+
+        self.enabled     = self.ctl.config.get_bool(self.SECTION, "enabled", default=False)
+        self.max_workers = max(1, self.ctl.config.get_int(self.SECTION, "max_workers", default=2))
+
+        self.pool = None
+        self.in_flight = {}     # device_id -> PipelineJob
+        self.pending = {}       # device_id -> list of (PipelineJob, callback)
+        self.dropped = {}       # device_id -> count of stale frames dropped
+
+        self.signals = ProcessingSignals()
+        self.signals.finished.connect(self.finished_callback)
+
+        if self.enabled:
+            self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ProcessingWorker")
+            log.info(f"asynchronous processing enabled ({self.max_workers} workers)")
+
+    def is_busy(self, spec=None):
+        if spec is None:
+            return len(self.in_flight) > 0
+        return spec.device_id in self.in_flight
+
+    def get_dropped(self, spec):
+        return self.dropped.get(spec.device_id, 0) if spec is not None else 0
+
+    ##
+    # Called by Controller.process_reading on the GUI thread.
+    #
+    # @param job      (Input) PipelineJob returned by ProcessingPipeline.start
+    # @param callback (Input) called on the GUI thread as callback(job) once finished
+    # @returns True if the job was accepted (caller should not process it further)
+    def submit(self, job, callback):
+        if self.pool is None or job.device_id is None:
+            return False
+
+        device_id = job.device_id
+        if device_id in self.in_flight:
+            queue = self.pending.setdefault(device_id, [])
+            kept = [ (j, cb) for (j, cb) in queue if self.is_precious(j) ]
+            self.dropped[device_id] = self.dropped.get(device_id, 0) + len(queue) - len(kept)
+            kept.append((job, callback))
+            self.pending[device_id] = kept
+            return True
+
+        self.dispatch(job, callback)
+        return True
+
+    def is_precious(self, job):
+        return job.reading is not None and job.reading.take_one_request is not None
+
+    def dispatch(self, job, callback):
+        self.in_flight[job.device_id] = job
+        self.pool.submit(self.work, job, callback)
+
+    def work(self, job, callback):
+        """ runs on a worker thread """
+        try:
+            self.ctl.processing_pipeline.finish(job)
+        except Exception as ex:
+            log.error(f"error processing {job.device_id} asynchronously", exc_info=1)
+            job.error = ex
+        self.signals.finished.emit((job, callback))
+
+    def finished_callback(self, result):
+        """ runs on the GUI thread """
+        job, callback = result
+        device_id = job.device_id
+
+        if self.in_flight.get(device_id, None) is job:
+            del self.in_flight[device_id]
+
+        # don't graph frames from spectrometers which disconnected meanwhile
+        if job.error is None and not self.ctl.shutting_down and self.ctl.multispec.get_spectrometer(device_id) is job.spec:
+            try:
+                callback(job)
+            except:
+                log.error(f"error completing {device_id} processing", exc_info=1)
+
+        queue = self.pending.get(device_id, None)
+        if queue and self.pool is not None:
+            next_job, next_callback = queue.pop(0)
+            if not queue:
+                del self.pending[device_id]
+            self.dispatch(next_job, next_callback)
+
+    def remove_spec(self, spec):
+        """ called by Controller.disconnect_device """
+        if spec is None:
+            return
+        self.pending.pop(spec.device_id, None)
+        self.dropped.pop(spec.device_id, None)
+
+    def stop(self):
+        """ called by Controller.close """
+        self.pending = {}
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
@@ -1,7 +1,9 @@
 import numpy as np
+import threading
 import logging
 
 from superman.baseline import BL_CLASSES, AirPLS
+from enlighten.post_processing.WarmStartAirPLS import WarmStartAirPLS
 from enlighten.ui.ScrollStealFilter import ScrollStealFilter
 
 from enlighten.util import unwrap
@@ -51,6 +53,21 @@ class BaselineCorrection:
     I wasn't able to get Mario working, and Wavelet had an unmet dependency (fixed),
     but most are now exposed by ENLIGHTEN.
     
+    @par Warm Start
+
+    Live spectra from the same sample have nearly identical baselines from one
+    frame to the next, so AirPLS can optionally resume each spectrometer's fit
+    from the weights its previous frame converged to (WarmStartAirPLS), with a
+    periodic full refit and a change-detection threshold which forces a refit
+    when the sample changes:
+
+    @verbatim
+    [baseline_correction]
+    airpls_warm_start = True
+    airpls_refit_interval = 50
+    airpls_refit_threshold = 0.05
+    @endverbatim
+
     @see https://link.springer.com/content/pdf/10.1007%2Fs13320-018-0512-y.pdf
     @see https://arxiv.org/ftp/arxiv/papers/1306/1306.4156.pdf 
     """
@@ -77,6 +94,15 @@ class BaselineCorrection:
         self.airpls_max_iters = 500
         self.airpls_conv_thresh = 8e-4
 
+        # warm-start AirPLS (see WarmStartAirPLS)
+        self.airpls_warm_start = False
+        self.airpls_refit_interval = 50
+        self.airpls_refit_threshold = 0.05
+        self.warm_start = None
+
+        # superman algos store their last fit on the (shared) algo object
+        self.fit_lock = threading.Lock()
+
         # first check whether one should be selected and/or enabled
         self.init_from_config()
 
@@ -153,6 +179,9 @@ class BaselineCorrection:
         set_field("airpls_max_iters",             self.ctl.config.get_int  (s, "airpls_max_iters",             default=None))
         set_field("airpls_smoothness_param",      self.ctl.config.get_int  (s, "airpls_smoothness_param",      default=None))
         set_field("airpls_conv_thresh",           self.ctl.config.get_float(s, "airpls_conv_thresh",           default=None))
+        set_field("airpls_warm_start",            self.ctl.config.get_bool (s, "airpls_warm_start",            default=None))
+        set_field("airpls_refit_interval",        self.ctl.config.get_int  (s, "airpls_refit_interval",        default=None))
+        set_field("airpls_refit_threshold",       self.ctl.config.get_float(s, "airpls_refit_threshold",       default=None))
 
     def init_algos(self):
         """
@@ -188,6 +217,12 @@ class BaselineCorrection:
                     algo = AirPLS(smoothness_param      = self.airpls_smoothness_param,
                                   max_iters             = self.airpls_max_iters,
                                   conv_thresh           = self.airpls_conv_thresh)
+                    if self.airpls_warm_start:
+                        self.warm_start = WarmStartAirPLS(smoothness_param = self.airpls_smoothness_param,
+                                                          max_iters        = self.airpls_max_iters,
+                                                          conv_thresh      = self.airpls_conv_thresh,
+                                                          refit_interval   = self.airpls_refit_interval,
+                                                          refit_threshold  = self.airpls_refit_threshold)
                 else:
                     algo = BL_CLASSES[abbr]()
                 self.algos[name] = algo
@@ -252,10 +287,31 @@ class BaselineCorrection:
         if self.enabled:
             self.ctl.guide.clear(token="enable_baseline_correction")
 
-    def process(self, pr, spec):
+    ##
+    # The x-axis process() needs, which depends on GUI state (the graph's
+    # x-axis unit and cropping), so ProcessingPipeline snapshots it on the GUI
+    # thread.
+    #
+    # @returns x-axis, or None if baseline correction has nothing to do
+    def get_x_axis(self, spec, pr):
+        if spec is None or pr is None or not (self.show_curve or self.enabled):
+            return
+        return self.ctl.generate_x_axis(spec=spec, cropped=pr.is_cropped())
+
+    def process(self, pr, spec, graph=True, scratch=None, x_axis=None, state=None):
         """
-        @param pr   (In/Out) ProcessedReading
-        @param spec (Input)  Spectrometer
+        @param pr    (In/Out) ProcessedReading
+        @param spec  (Input)  Spectrometer
+        @param graph (Input)  if False, don't touch the curve (e.g. when called
+                              from a worker thread)
+        @param scratch (Input) optional PipelineJob.scratch, providing a reusable
+                              array for the corrected spectrum
+        @param x_axis (Input) optional x-axis from get_x_axis (else generated here)
+        @param state (Output) object whose baseline_correction_algo is set to
+                              the algorithm applied (default spec.app_state; a
+                              PipelineJob when called from a worker thread)
+        @returns (x_axis, baseline) if the curve should be updated later via
+                 update_curve(), else None
         @note uses cropped spectrum if found
         """
         # log.debug("process: show_curve %s, enabled %s, algo %s, pr %s", self.show_curve, self.enabled, self.algo, pr)
@@ -263,8 +319,11 @@ class BaselineCorrection:
         if spec is None:
             return
 
+        if state is None:
+            state = spec.app_state
+
         # default to no correction applied
-        spec.app_state.baseline_correction_algo = None
+        state.baseline_correction_algo = None
 
         # if we're neither displaying nor subtracting the baseline, don't bother
         if not (self.show_curve or self.enabled):
@@ -274,47 +333,68 @@ class BaselineCorrection:
             return
 
         spectrum = pr.get_processed()
-        x_axis = self.ctl.generate_x_axis(spec=spec, cropped=pr.is_cropped())
+        if x_axis is None:
+            x_axis = self.ctl.generate_x_axis(spec=spec, cropped=pr.is_cropped())
 
-        baseline = self.generate_baseline(spectrum=spectrum, x_axis=x_axis)
+        baseline = self.generate_baseline(spectrum=spectrum, x_axis=x_axis, device_id=spec.device_id)
         if baseline is None:
             log.error("unable to generate baseline")
             return 
 
         # generate the baseline and optionally display it, even if we're not 
         # enabled and therefore not applying the corrected baseline
-        if self.show_curve and self.ctl.multispec.is_current_spectrometer(spec):
-            # log.debug("showing baseline: %s", baseline)
-            self.curve.setData(y=baseline, x=x_axis)
+        deferred = None
+        if self.show_curve:
+            if graph:
+                self.update_curve(spec, baseline, x_axis)
+            else:
+                deferred = (x_axis, baseline)
 
         if not self.enabled:
             # log.debug("not enabled, so returning unmodified spectrum")
-            return
+            return deferred
 
-        spec.app_state.baseline_correction_algo = self.current_algo_name
+        state.baseline_correction_algo = self.current_algo_name
 
         # log.debug("subtracting baseline of %d pixels", len(baseline))
-        corrected = np.subtract(spectrum, baseline)
-        corrected[corrected < 0] = 0
+        # set_processed copies, so the scratch array can be reused next frame
+        out = None if scratch is None else scratch("baseline", (len(spectrum),))
+        corrected = np.subtract(spectrum, baseline, out=out)
+        np.maximum(corrected, 0, out=corrected)
 
         pr.set_processed(corrected)
+        return deferred
 
-    def generate_baseline(self, spectrum, x_axis):
+    def update_curve(self, spec, baseline, x_axis):
+        if self.show_curve and self.ctl.multispec.is_current_spectrometer(spec):
+            # log.debug("showing baseline: %s", baseline)
+            self.curve.setData(y=baseline, x=x_axis)
+
+    def generate_baseline(self, spectrum, x_axis, device_id=None):
         intensities = np.array(spectrum, dtype=np.float64)
         bands       = np.array(x_axis, dtype=np.float64)
 
         try:
-            fitted = self.algo.fit(
-                bands       = bands, 
-                intensities = intensities, 
-                segment     = False,              # doesn't seem to matter?
-                invert      = False)
+            if self.warm_start is not None and device_id is not None and self.algo is self.algos.get("AirPLS", None):
+                return np.clip(self.warm_start.fit(device_id, intensities), -65535, 65535)
 
-            baseline = np.clip(fitted.baseline, -65535, 65535)
+            with self.fit_lock:
+                fitted = self.algo.fit(
+                    bands       = bands, 
+                    intensities = intensities, 
+                    segment     = False,              # doesn't seem to matter?
+                    invert      = False)
+
+                baseline = np.clip(fitted.baseline, -65535, 65535)
             return baseline
         except:
             log.error("exception in baseline_correction.generate_baseline with algo %s", self.current_algo_name, exc_info=1)
 
+    def remove_spec(self, spec):
+        """ called by Controller.disconnect_device """
+        if spec is not None and self.warm_start is not None:
+            self.warm_start.clear(spec.device_id)
+
     def set_enabled(self, value):
         value = value if isinstance(value, bool) else value.lower() == "true"
         self.cb_enabled.setChecked(value)
@@ -1,8 +1,8 @@
 import logging
+import numpy as np
 
 from enlighten.ui.ScrollStealFilter import ScrollStealFilter
 from enlighten.util import unwrap, incr_spinbox, decr_spinbox
-from wasatch.utils import apply_boxcar
 
 log = logging.getLogger(__name__)
 
@@ -76,10 +76,12 @@ class BoxcarFeature:
         if spec:
             spec.app_state.check_refs()
 
-    def process(self, pr, spec=None):
+    def process(self, pr, spec=None, scratch=None):
         """
         @param pr (In/Out) ProcessedReading
         @param spec (Input) Spectrometer
+        @param scratch (Input) optional PipelineJob.scratch, providing reusable
+                       work arrays
         @note supports cropped ProcessedReading
         """
         if pr is None:
@@ -94,14 +96,85 @@ class BoxcarFeature:
         if half_width < 1:
             return
 
-        pr.set_processed(apply_boxcar(pr.get_processed(), half_width))
-
+        # smooth processed and the recordable dark/reference together
+        arrays = { "processed": pr.get_processed() }
         if not self.ctl.page_nav.using_reference():
-            if pr.recordable_dark is not None:
-                pr.recordable_dark = apply_boxcar(pr.recordable_dark, half_width)
-            
-            if pr.recordable_reference is not None:
-                pr.recordable_reference = apply_boxcar(pr.recordable_reference, half_width)
+            for name in [ "recordable_dark", "recordable_reference" ]:
+                if getattr(pr, name) is not None:
+                    arrays[name] = getattr(pr, name)
+
+        # scratch arrays are reused next frame, so copy what the ProcessedReading
+        # keeps (set_processed already copies into a list)
+        for name, smoothed in self.apply_boxcar_many(arrays, half_width, scratch=scratch).items():
+            if name == "processed":
+                pr.set_processed(smoothed)
+            else:
+                setattr(pr, name, smoothed if scratch is None else np.copy(smoothed))
+
+    ##
+    # Moving average with the same edge behavior as wasatch.utils.apply_boxcar
+    # (the window shrinks symmetrically near either end, so pixel i is the mean
+    # of itself and min(i, half_width, N-1-i) pixels either side), computed from
+    # a single cumulative sum so the cost is O(N) regardless of half_width.
+    #
+    # @param a          (Input) 1D array, or 2D array of same-length spectra (one per row)
+    # @param half_width (Input) boxcar half-width in pixels
+    # @param out        (Output) optional array of a's shape to hold the result
+    # @param csum       (Input) optional work array of a's shape plus one column
+    # @returns smoothed np.ndarray of the same shape
+    @staticmethod
+    def apply_boxcar(a, half_width, out=None, csum=None):
+        a = np.asarray(a, dtype=np.float64)
+        n = a.shape[-1]
+        if n == 0 or half_width < 1:
+            return np.array(a)
+
+        i = np.arange(n)
+        hw = np.minimum(np.minimum(i, half_width), n - 1 - i)
+
+        if csum is None:
+            csum = np.zeros(a.shape[:-1] + (n + 1,))
+        else:
+            csum[..., 0] = 0
+        np.cumsum(a, axis=-1, out=csum[..., 1:])
+
+        if out is None:
+            return (csum[..., i + hw + 1] - csum[..., i - hw]) / (2 * hw + 1)
+
+        np.take(csum, i + hw + 1, axis=-1, out=out)
+        out -= csum[..., i - hw]
+        out /= 2 * hw + 1
+        return out
+
+    ##
+    # Smooths several named arrays in one pass, stacking those of equal length.
+    #
+    # @param arrays  (Input) dict of name -> 1D array
+    # @param scratch (Input) optional PipelineJob.scratch; if given, the results
+    #                are views of work arrays which will be reused
+    # @returns dict of name -> smoothed np.ndarray
+    @staticmethod
+    def apply_boxcar_many(arrays, half_width, scratch=None):
+        by_length = {}
+        for name, a in arrays.items():
+            if a is not None:
+                by_length.setdefault(len(a), []).append(name)
+
+        results = {}
+        for k, (length, names) in enumerate(by_length.items()):
+            if scratch is None:
+                smoothed = BoxcarFeature.apply_boxcar(np.vstack([ arrays[name] for name in names ]), half_width)
+            else:
+                shape = (len(names), length)
+                stacked = scratch(f"boxcar_in_{k}", shape)
+                for row, name in enumerate(names):
+                    stacked[row] = arrays[name]
+                smoothed = BoxcarFeature.apply_boxcar(stacked, half_width,
+                    out  = scratch(f"boxcar_out_{k}", shape),
+                    csum = scratch(f"boxcar_csum_{k}", (len(names), length + 1)))
+            for name, row in zip(names, smoothed):
+                results[name] = row
+        return results
 
     def get_half_width(self):
         return int(self.spinbox.value())
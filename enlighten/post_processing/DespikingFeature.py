@@ -1,5 +1,4 @@
 import logging
-from statistics import median
 
 import numpy as np
 
@@ -7,104 +6,218 @@ from wasatch.ProcessedReading import ProcessedReading
 
 log = logging.getLogger(__name__)
 
+##
+# The last K spectra from one spectrometer, used by DespikingFeature's
+# temporal mode.  Preallocated so steady-state despiking doesn't allocate.
+class DespikingHistory:
+
+    def __init__(self, frames, pixels):
+        self.frames = frames
+        self.pixels = pixels
+        self.spectra = np.zeros((frames, pixels), dtype=np.float64)
+        self.next_index = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, spectrum):
+        self.spectra[self.next_index] = spectrum
+        self.next_index = (self.next_index + 1) % self.frames
+        self.count = min(self.count + 1, self.frames)
+
+    def get(self):
+        return self.spectra[:self.count]
+
+    def clear(self):
+        self.next_index = 0
+        self.count = 0
+
 class DespikingFeature:
     """
     Provides access to the removal of cosmic spikes that could impact
-    analysis. Currently only implements the algorithm in the paper by
-    Whitaker and Hayes. Future improvements will provide different 
-    algorithms to choose from.
+    analysis.
+
+    Two modes are provided:
+
+    - "spectral": the single-spectrum algorithm by Whitaker and Hayes, flagging
+      pixels whose first difference has an outlying modified z-score (relative
+      to the median/MAD of the whole spectrum's differences), and replacing
+      each with the average of the non-spike pixels in a window around it.
+
+    - "temporal": compares each new spectrum against the per-pixel median and
+      MAD of the previous K spectra from the same spectrometer, replacing
+      pixels which jump above that rolling median by more than tau (cosmic
+      rays only ever add counts) with the median.  This is more selective than
+      the spectral mode (narrow Raman peaks aren't mistaken for spikes), but
+      needs a few frames of history; until then, or if too many pixels change
+      at once (i.e. the sample changed), the spectral mode is used and the
+      history restarted.
+
+    Both are vectorized so they can run live at full frame rate.  Configured
+    via enlighten.ini:
+
+    @verbatim
+    [despiking]
+    enabled = True
+    mode = temporal
+    tau = 6.5
+    window = 5
+    frames = 5
+    @endverbatim
+
+    Despiking runs as the "despiking" stage of ProcessingPipeline, before
+    baseline correction and Richardson-Lucy (both of which would smear a spike
+    across neighboring pixels).
     """
 
-    def __init__(self,
-                 spin_tau,
-                 spin_window):
-        self.spin_tau = spin_tau
-        self.spin_window = spin_window
+    SECTION = "despiking"
+    MODES = [ "spectral", "temporal" ]
 
-    def process(self, processed_reading: ProcessedReading) -> ProcessedReading:
-        # currently the only algorithm but will likely expand to accommodate more
-        return self.DarrenEtAlAlgo(processed_reading)
+    ## temporal mode requires at least this many frames of history
+    MIN_FRAMES = 3
 
-    def DarrenEtAlAlgo(self, processed_reading: ProcessedReading) -> ProcessedReading:
-        """
-        @see Whitaker, Darren, and Kevin Hayes. 
-        "A Simple Algorithm for Despiking Raman Spectra." ChemRxiv (2018)
-        """
-        spiky_spectra = processed_reading.processed
-        log.debug(f"got spiky_spectra {spiky_spectra}")
-        tau_outlier_criteria = self.spin_tau.value()
-        window_size_m = self.spin_window.value()
-        nabla_counts = np.asarray([yt - yt_last for yt, yt_last in zip(spiky_spectra[1:],spiky_spectra[:-1])]) # 0 idx vs paper 1 idx
-        med = median(nabla_counts)
-        mad = median(np.abs(nabla_counts - med))
-        mod_z_scores = (0.6745*(nabla_counts-med))/mad
-        # nabla_counts is 1 spectra length short since its a diffing
-        # paper says ends are auto set to spiky 
-        # so just insert a 0 at the beginning that will be overwritten anyway
-        np.insert(mod_z_scores, 0, 0) 
-        mod_z_scores[0] = tau_outlier_criteria + 1
-        mod_z_scores[-1] = tau_outlier_criteria + 1
-        candidate_idxs = [idx[0] for idx, value in np.ndenumerate(mod_z_scores) if abs(value) > tau_outlier_criteria]
-        self.interpolate_zs(spiky_spectra, mod_z_scores, candidate_idxs, tau_outlier_criteria, window_size_m)
-
-        log.debug(f"despiked spectra is {spiky_spectra}")
-        processed_reading.processed = spiky_spectra
-        return processed_reading
-
-    def interpolate_zs(self, 
-                       spectra: np.ndarray, 
-                       scores: np.ndarray, 
-                       candidate_idxs: list[int], 
-                       tau: float,
-                       m: int) -> None:
+    ## absolute temporal MAD floor (counts), so a near-constant history doesn't flag noise
+    MIN_MAD = 1.0
+
+    ## if more than this fraction of pixels are flagged, assume the sample changed
+    MAX_SPIKE_FRACTION = 0.05
+
+    def __init__(self, ctl):
+        self.ctl = ctl
+
+        s = self.SECTION
+        self.enabled = self.ctl.config.get_bool (s, "enabled", default=False)
+        self.mode    = "spectral"
+        if self.ctl.config.has_option(s, "mode"):
+            self.mode = self.ctl.config.get(s, "mode").lower()
+        self.tau     = self.ctl.config.get_float(s, "tau",     default=6.5)
+        self.window  = self.ctl.config.get_int  (s, "window",  default=5)
+        self.frames  = max(self.MIN_FRAMES, self.ctl.config.get_int(s, "frames", default=5))
+
+        if self.mode not in self.MODES:
+            log.error(f"unknown despiking mode {self.mode}, using spectral")
+            self.mode = "spectral"
+
+        self.histories = {} # device_id -> DespikingHistory
+
+    def remove_spec(self, spec):
+        if spec is not None:
+            self.histories.pop(spec.device_id, None)
+
+    def process(self, pr: ProcessedReading, spec=None) -> ProcessedReading:
         """
-        @param tau, sensitivity to spikes, lower means more likely to consider 
-            something a spike, Whitaker and Hayes used 6.5 for default
-        @param m window size, larger window means grabs more neighbors for averaging
-            in the moving window
-        takes the pre-identified indicies that are believed to be spikes
-        and applies the algorithm from the paper on them.
-        Modification is done in place
+        @param pr   (In/Out) ProcessedReading
+        @param spec (Input)  Spectrometer (required for temporal mode)
+        @note uses cropped spectrum if found
         """
-        indicator_func = lambda score, tau: 1 if abs(score) < tau else 0
-        log.debug(f"candidate idx are {candidate_idxs}")
-        for index in candidate_idxs:
-            log.debug(f"calculation for index {index}")
-            left_idx_bound = index - m
-            right_idx_bound = index + m
-            zs_window = [0 for x in range(2*m)] # preallocate, easiest to way imo
-            spectra_window = [0 for x in range(2*m)]
-            window_idx = 0
-            # generate summation windows
-            for i in range(left_idx_bound,right_idx_bound,1):
-                # handle edges
-                if i < 0:
-                    zs_window[window_idx] = scores[0]
-                    spectra_window[window_idx] = spectra[0]
-                elif i >= len(scores):
-                    zs_window[window_idx] = scores[-1]
-                    spectra_window[window_idx] = spectra[-1]
-                # set window values to index in main array
-                else:
-                    zs_window[window_idx] = scores[i]
-                    spectra_window[window_idx] = spectra[i]
-                window_idx += 1
-            # algorithm calculations
-            log.debug(f"zs window {zs_window}, spectra_window {spectra_window}")
-            w_calc = list(map(
-                lambda x : indicator_func(x,tau), zs_window
-                ))
-            w = sum(w_calc)
-            log.debug(f"w values were calculated as {w_calc} sum is {w}")
-            main_calc = list(map(
-                lambda x: x[1]*indicator_func(x[0],tau), zip(zs_window, spectra_window) 
-                ))
-            main_sum = sum(main_calc)
-            log.debug(f"main values were calculated as {main_calc} sum is {main_sum}")
-            if w == 0:
-                continue
-                log.debug("W VALUE WAS 0")
-            averaged_value = (1/w)*main_sum
-            log.debug(f"assigning value {averaged_value} to spiky point with original value {spectra[index]}")
-            spectra[index] = averaged_value
+        if not self.enabled or pr is None:
+            return pr
+
+        spectrum = pr.get_processed()
+        if spectrum is None or len(spectrum) < 3:
+            return pr
+
+        spectrum = np.array(spectrum, dtype=np.float64)
+        if self.mode == "temporal" and spec is not None:
+            despiked = self.despike_temporal(spec.device_id, spectrum)
+        else:
+            despiked = self.despike(spectrum, self.tau, self.window)
+
+        pr.set_processed(despiked)
+        return pr
+
+    ##
+    # Whitaker and Hayes, vectorized.
+    #
+    # This reproduces the original per-spike loop exactly, including its
+    # conventions: scores are computed on the first differences (so score k
+    # describes the step from pixel k to k+1), the first and last scores are
+    # forced to be spikes, and each spike is replaced by the mean of the
+    # non-spike pixels in the half-open window [k - m, k + m).  Because spikes
+    # are excluded from every window, replacing them all at once is equivalent
+    # to the original's sequential in-place updates.
+    #
+    # @see Whitaker, Darren, and Kevin Hayes.
+    #      "A Simple Algorithm for Despiking Raman Spectra." ChemRxiv (2018)
+    #
+    # @param spectrum (Input) 1D array
+    # @param tau      (Input) sensitivity to spikes, lower means more likely to
+    #                         consider something a spike (Whitaker and Hayes used 6.5)
+    # @param m        (Input) window size, larger window means more neighbors
+    #                         for averaging
+    # @returns despiked copy of spectrum
+    @staticmethod
+    def despike(spectrum, tau, m):
+        spectrum = np.array(spectrum, dtype=np.float64)
+        n = len(spectrum) - 1 # count of scores
+
+        scores = DespikingFeature.modified_z_scores(np.diff(spectrum))
+        scores[0] = tau + 1
+        scores[-1] = tau + 1
+
+        abs_scores = np.abs(scores)
+        candidates = np.flatnonzero(abs_scores > tau)
+        good = (abs_scores < tau).astype(np.float64)
+
+        # windowed sums of good pixels (and their intensities) via prefix sums;
+        # out-of-range window positions only ever map to the (forced-spike)
+        # end scores, which contribute nothing
+        good_sum = np.concatenate(([0.0], np.cumsum(good)))
+        value_sum = np.concatenate(([0.0], np.cumsum(good * spectrum[:n])))
+
+        lo = np.clip(candidates - m, 0, n)
+        hi = np.clip(candidates + m, 0, n)
+        w = good_sum[hi] - good_sum[lo]
+        total = value_sum[hi] - value_sum[lo]
+
+        replace = w > 0
+        spectrum[candidates[replace]] = total[replace] / w[replace]
+        return spectrum
+
+    @staticmethod
+    def modified_z_scores(values):
+        med = np.median(values)
+        mad = np.median(np.abs(values - med))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (0.6745 * (values - med)) / mad
+
+    ##
+    # Rejects cosmic rays by comparing against the rolling per-pixel median and
+    # MAD of the last K spectra from the same spectrometer.
+    #
+    # @returns despiked copy of spectrum
+    def despike_temporal(self, device_id, spectrum):
+        pixels = len(spectrum)
+        history = self.histories.get(device_id, None)
+        if history is None or history.pixels != pixels or history.frames != self.frames:
+            history = DespikingHistory(self.frames, pixels)
+            self.histories[device_id] = history
+
+        # Until there is a reference, frames enter the history as-is (the
+        # spectral algorithm's false positives on shot noise would bias it).
+        if len(history) < self.MIN_FRAMES:
+            history.append(spectrum)
+            return self.despike(spectrum, self.tau, self.window)
+
+        past = history.get()
+        med = np.median(past, axis=0)
+        mad = np.median(np.abs(past - med), axis=0)
+
+        # a handful of frames gives a noisy per-pixel MAD, so don't let any
+        # pixel's fall below the typical MAD across the spectrum
+        mad = np.maximum(mad, max(np.median(mad), self.MIN_MAD))
+        spikes = (0.6745 * (spectrum - med)) / mad > self.tau
+
+        if np.count_nonzero(spikes) > self.MAX_SPIKE_FRACTION * pixels:
+            log.debug(f"despike_temporal: {np.count_nonzero(spikes)} pixels changed on {device_id}, restarting history")
+            history.clear()
+            history.append(spectrum)
+            return self.despike(spectrum, self.tau, self.window)
 
+        # After that, the history holds despiked frames, so a cosmic ray
+        # doesn't linger in the reference (inflating the MAD) for K frames.
+        despiked = np.copy(spectrum)
+        despiked[spikes] = med[spikes]
+        history.append(despiked)
+        return despiked
@@ -15,6 +15,51 @@ else:
 
 log = logging.getLogger(__name__)
 
+##
+# Linear interpolation from one fixed x-axis onto another, precomputed as a
+# sparse operator: for each point on the new axis, the index of the old-axis
+# pixel to its left and the fractional weight of the pixel to its right.
+#
+# Applying it is equivalent to np.interp(new_axis, old_axis, y) (including
+# clamping to the end values outside the old axis), but the binary search is
+# done once rather than on every call, and any number of same-length arrays
+# can be interpolated in a single batched operation.
+class InterpolationOperator:
+
+    def __init__(self, old_axis, new_axis):
+        self.new_axis_source = new_axis
+        self.old_axis = np.array(old_axis, dtype=np.float64)
+        self.new_axis = np.array(new_axis, dtype=np.float64)
+
+        xp = self.old_axis
+        n = len(xp)
+
+        left = np.searchsorted(xp, self.new_axis, side="right") - 1
+        left = np.clip(left, 0, max(n - 2, 0))
+        right = np.minimum(left + 1, n - 1)
+
+        dx = xp[right] - xp[left]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weights = np.where(dx > 0, (self.new_axis - xp[left]) / dx, 0.0)
+
+        self.left = left
+        self.right = right
+        self.weights = np.clip(weights, 0.0, 1.0)
+
+    def __len__(self):
+        return len(self.old_axis)
+
+    def matches(self, old_axis, new_axis):
+        return new_axis is self.new_axis_source and len(old_axis) == len(self.old_axis) and np.array_equal(old_axis, self.old_axis)
+
+    ##
+    # @param arrays (Input) 1D or 2D (one row per spectrum) array(s) on the old axis
+    # @returns interpolated array of the same dimensionality
+    def apply(self, arrays):
+        y = np.asarray(arrays, dtype=np.float64)
+        lo = y[..., self.left]
+        return lo + self.weights * (y[..., self.right] - lo)
+
 ##
 # Encapsulates interpolation of a ProcessedReading.
 #
@@ -34,6 +79,7 @@ class InterpolationFeature:
 
         self.mutex = QtCore.QMutex()
         self.new_axis = None
+        self.operators = [] # InterpolationOperators onto new_axis, most recent last
         self.allowed = False
 
         self.bt_toggle          .clicked            .connect(self._toggle_callback)
@@ -135,6 +181,7 @@ class InterpolationFeature:
             self.bt_toggle.setEnabled(False)
             self.bt_toggle.setToolTip("Interpolation cannot be enabled until configured in Settings")
             self.new_axis = None
+            self.operators = []
             self.mutex.unlock()
             return
 
@@ -150,6 +197,7 @@ class InterpolationFeature:
             self.ctl.config.set(s, name, getattr(self, name))
 
         self.new_axis = self._generate_axis()
+        self.operators = []
 
         self.mutex.unlock()
 
@@ -184,6 +232,26 @@ class InterpolationFeature:
                 return excitation
         return generate_excitation(wavelengths=wavelengths, wavenumbers=wavenumbers)
 
+    ## operators are cached per distinct source axis (i.e. per wavecal / ROI /
+    #  Raman shift correction), which covers several spectrometers sharing one
+    #  output axis
+    MAX_OPERATORS = 16
+
+    ##
+    # @returns InterpolationOperator from old_axis onto the current new_axis,
+    #          reusing a cached one if the source axis hasn't changed
+    def get_operator(self, old_axis, new_axis):
+        old_axis = np.asarray(old_axis, dtype=np.float64)
+
+        operators = self.operators
+        for op in operators:
+            if op.matches(old_axis, new_axis):
+                return op
+
+        op = InterpolationOperator(old_axis, new_axis)
+        self.operators = (operators + [ op ])[-self.MAX_OPERATORS:]
+        return op
+
     def process(self, pr, save=True):
         """ 
         This does dark and reference as well as processed and raw.
@@ -211,6 +279,9 @@ class InterpolationFeature:
         wavelengths = pr.get_wavelengths()
         wavenumbers = pr.get_wavenumbers()
 
+        # in case the axis is regenerated on the GUI thread meanwhile
+        new_axis = self.new_axis
+
         interpolated = ProcessedReading()
         old_cropped_axis = None
         old_detector_axis = None
@@ -220,7 +291,7 @@ class InterpolationFeature:
                 log.debug("Missing required wavelengths")
                 return
 
-            interpolated.wavelengths = self.new_axis
+            interpolated.wavelengths = new_axis
             old_cropped_axis = wavelengths
             old_detector_axis = pr.get_wavelengths("orig")
 
@@ -234,7 +305,7 @@ class InterpolationFeature:
                 log.debug("Missing required wavenumbers")
                 return
 
-            interpolated.wavenumbers = self.new_axis
+            interpolated.wavenumbers = new_axis
             old_cropped_axis = wavenumbers
             old_detector_axis = pr.get_wavenumbers("orig")
 
@@ -247,41 +318,47 @@ class InterpolationFeature:
             log.debug("Old axis was none, returning none.")
             return None
 
-        processed = pr.get_processed()
-        if processed is not None:
-            interpolated.processed = np.interp(self.new_axis, old_cropped_axis, processed)
-            log.debug(f"interpolated processed to {len(interpolated.processed)} ({self.new_axis[0]:.2f}, {self.new_axis[-1]:.2f})")
-
         # Note that we are choosing to interpolate raw. That means this is no longer
         # really "raw". However, we're storing it in the ".interpolated" record of
         # ProcessedReading, so that should be fairly clear; they can always access
         # ProcessedReading.raw directly to get the original data.
-        raw = pr.get_raw()
-        if raw is not None:
-            if len(raw) == len(old_detector_axis):
-                interpolated.raw = np.interp(self.new_axis, old_detector_axis, raw)
-                log.debug(f"interpolated raw to {len(interpolated.raw)}")
+        #
+        # Processed is on the (possibly cropped) axis, while raw, dark and 
+        # reference are on the full detector axis; each group is interpolated
+        # in one batched operation (one group, if not cropped).
+        groups = [] # (InterpolationOperator, [ (name, array) ])
+
+        processed = pr.get_processed()
+        if processed is not None:
+            if len(processed) == len(old_cropped_axis):
+                groups.append((self.get_operator(old_cropped_axis, new_axis), [ ("processed", processed) ]))
             else:
-                log.debug(f"process: len(old_detector_axis) {len(old_detector_axis)} != len(raw) ({len(raw)})")
-                interpolated.raw = None
-
-        dark = pr.get_dark()
-        if dark is not None:
-            if len(dark) == len(old_detector_axis):
-                interpolated.dark = np.interp(self.new_axis, old_detector_axis, dark)
-                log.debug(f"interpolated dark to {len(interpolated.dark)}")
+                log.debug(f"process: len(old_cropped_axis) {len(old_cropped_axis)} != len(processed) ({len(processed)})")
+
+        detector = []
+        for name, array in [ ("raw",       pr.get_raw()), 
+                             ("dark",      pr.get_dark()), 
+                             ("reference", pr.get_reference()) ]:
+            if array is None:
+                continue
+            if len(array) == len(old_detector_axis):
+                detector.append((name, array))
             else:
-                log.debug(f"process: len(old_detector_axis) {len(old_detector_axis)} != len(dark) ({len(dark)})")
-                interpolated.dark = None
-
-        reference = pr.get_reference()
-        if reference is not None:
-            if len(reference) == len(old_detector_axis):
-                interpolated.reference = np.interp(self.new_axis, old_detector_axis, reference)
-                log.debug(f"interpolated reference to {len(interpolated.reference)}")
+                log.debug(f"process: len(old_detector_axis) {len(old_detector_axis)} != len({name}) ({len(array)})")
+                setattr(interpolated, name, None)
+
+        if detector:
+            op = self.get_operator(old_detector_axis, new_axis)
+            if groups and groups[0][0] is op:
+                groups[0][1].extend(detector)
             else:
-                log.debug(f"process: len(old_detector_axis) {len(old_detector_axis)} != len(reference) ({len(reference)})")
-                interpolated.reference = None
+                groups.append((op, detector))
+
+        for op, arrays in groups:
+            results = op.apply([ array for _, array in arrays ])
+            for (name, _), result in zip(arrays, results):
+                setattr(interpolated, name, result)
+                log.debug(f"interpolated {name} to {len(result)}")
 
         if save:
             pr.interpolated = interpolated
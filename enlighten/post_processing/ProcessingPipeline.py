@@ -0,0 +1,326 @@
+import logging
+import threading
+import numpy as np
+import time
+
+log = logging.getLogger(__name__)
+
+##
+# Per-spectrometer scratch state retained by ProcessingPipeline between frames.
+#
+# The main thing kept here is a read-only snapshot of the spectrometer's stored
+# reference.  Controller.process_reading used to np.copy() the reference into
+# every ProcessedReading "so plugins etc can access it," even though nothing
+# downstream writes to it (TransmissionFeature and AbsorbanceFeature copy
+# before dark-correcting, while Measurement and PluginController deepcopy the
+# whole ProcessedReading).  Now the copy is taken once per stored reference,
+# flagged non-writeable so any future in-place modification fails loudly, and
+# shared by every subsequent frame.
+#
+# It also holds scratch arrays which baseline correction and boxcar reuse from
+# frame to frame for their intermediate results, rather than allocating new
+# ones each time.  Their output is copied once, where it is stored into the
+# ProcessedReading (set_processed copies into a list), so nothing downstream
+# sees a scratch array.  (Dark correction isn't included, as it happens inside
+# ProcessedReading.correct_dark, which keeps its own copy of the dark.)
+#
+# Only one job at a time may use the scratch arrays (see claim()); another
+# frame of the same spectrometer processed meanwhile, e.g. a reprocessed
+# Measurement while AsyncProcessingExecutor has a job in flight, simply
+# allocates as before.
+class PipelineBuffers:
+
+    def __init__(self, device_id):
+        self.device_id = device_id
+        self.reference_source = None
+        self.reference = None
+
+        self.scratch = {}   # name -> np.ndarray
+        self.lock = threading.Lock()
+        self.in_use = False
+
+    ## @returns True if the caller may use the scratch arrays until release()
+    def claim(self):
+        with self.lock:
+            if self.in_use:
+                return False
+            self.in_use = True
+            return True
+
+    def release(self):
+        with self.lock:
+            self.in_use = False
+
+    ## @returns a reusable float64 array of the given shape (contents undefined)
+    def get_scratch(self, name, shape):
+        a = self.scratch.get(name, None)
+        if a is None or a.shape != shape:
+            a = np.empty(shape, dtype=np.float64)
+            self.scratch[name] = a
+        return a
+
+    def get_reference(self, reference):
+        if reference is None:
+            self.reference_source = None
+            self.reference = None
+        elif reference is not self.reference_source or self.reference is None or len(self.reference) != len(reference):
+            snapshot = np.copy(reference)
+            snapshot.flags.writeable = False
+            self.reference_source = reference
+            self.reference = snapshot
+        return self.reference
+
+##
+# One ProcessedReading passing through ProcessingPipeline.
+#
+# Decisions which depend on GUI state (technique, whether interpolation is
+# enabled, the x-axis for baseline correction) are snapshotted when the job is
+# started on the GUI thread, so that the remaining stages can be finished on a
+# worker thread.  Likewise, results destined for application state (the
+# baseline correction algorithm applied) are left on the job, and only copied
+# to the Spectrometer by complete() on the GUI thread.
+class PipelineJob:
+
+    def __init__(self, pr, spec, settings, reading=None):
+        self.pr = pr
+        self.spec = spec
+        self.settings = settings
+        self.reading = reading
+        self.device_id = spec.device_id if spec is not None else None
+
+        self.using_reference = False
+        self.interpolate = False
+        self.device_buffers = None  # spectrometer's PipelineBuffers
+        self.buffers = None         # device_buffers, once claimed by finish()
+
+        self.baseline_x_axis = None
+
+        self.timing = {}            # stage -> ms
+        self.baseline_curve = None  # (x_axis, baseline) to graph on the GUI thread
+        self.baseline_correction_algo = None
+        self.error = None
+
+    ## @returns a work array from the claimed PipelineBuffers, else a new one
+    def scratch(self, name, shape):
+        if self.buffers is None:
+            return np.empty(shape, dtype=np.float64)
+        return self.buffers.get_scratch(name, shape)
+
+    def stage(self, name, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.timing[name] = (time.perf_counter() - start) * 1000.0
+        return result
+
+##
+# Declares and runs the numeric post-processing stages which Controller.process_reading
+# applies to each new ProcessedReading, in the order documented in
+# ORDER_OF_OPERATIONS.md:
+#
+# - dark correction
+# - horizontal ROI (cropping)
+# - reference (snap the stored reference into the ProcessedReading)
+# - transmission / absorbance (reference techniques only)
+# - Raman intensity correction (non-reference techniques only)
+# - despiking (non-reference techniques only)
+# - baseline correction (non-reference techniques only)
+# - Richardson-Lucy (non-reference techniques only)
+# - boxcar
+# - interpolation
+#
+# Each stage simply delegates to the Business Object which has always owned that
+# transform, so the output is unchanged from the previous inline implementation;
+# what this class adds is an explicit, inspectable STAGES declaration, per-device
+# PipelineBuffers, and per-stage timing.
+#
+# Timing is recorded with time.perf_counter for every stage actually executed,
+# and the most recent frame's timings can be retrieved through get_timing().
+# Stages which were skipped (feature disabled, wrong technique) don't appear in
+# that frame's timings.
+#
+# run() is split into start() (GUI thread), finish() (numeric stages, safe to
+# run on a worker thread) and complete() (GUI thread), which lets
+# AsyncProcessingExecutor move the expensive stages off the GUI thread.
+#
+# @see Controller.process_reading
+class ProcessingPipeline:
+
+    STAGES = [ "dark",
+               "horiz_roi",
+               "reference",
+               "transmission",
+               "absorbance",
+               "raman_intensity_correction",
+               "despiking",
+               "baseline_correction",
+               "richardson_lucy",
+               "boxcar",
+               "interpolation" ]
+
+    def __init__(self, ctl):
+        self.ctl = ctl
+
+        self.buffers = {}   # device_id -> PipelineBuffers
+        self.timing = {}    # device_id -> { stage: ms } from most recent frame
+        self.observers = set()
+
+    ##
+    # Observers are called as callback(device_id, timing) after each frame
+    # processed by run(), where timing is a dict of stage -> milliseconds.
+    def register_observer(self, callback):
+        self.observers.add(callback)
+
+    def unregister_observer(self, callback):
+        self.observers.discard(callback)
+
+    def get_buffers(self, device_id):
+        if device_id not in self.buffers:
+            self.buffers[device_id] = PipelineBuffers(device_id)
+        return self.buffers[device_id]
+
+    def get_timing(self, spec=None):
+        if spec is None:
+            spec = self.ctl.multispec.current_spectrometer()
+        if spec is None:
+            return
+        return self.timing.get(spec.device_id, None)
+
+    def remove_spec(self, spec):
+        if spec is None:
+            return
+        self.buffers.pop(spec.device_id, None)
+        self.timing.pop(spec.device_id, None)
+
+    ##
+    # Apply all configured post-processing stages to the given ProcessedReading.
+    #
+    # @param pr       (In/Out) ProcessedReading (fresh from the Reading)
+    # @param spec     (Input)  Spectrometer (may be None when reprocessing)
+    # @param settings (Input)  SpectrometerSettings
+    # @param dark     (Input)  optional dark overriding spec.app_state.dark
+    # @param ref      (Input)  optional reference used if spec.app_state has none
+    # @returns dict of stage -> milliseconds
+    def run(self, pr, spec, settings, dark=None, ref=None):
+        job = self.start(pr, spec, settings, dark=dark, ref=ref)
+        self.finish(job)
+        self.complete(job)
+        return job.timing
+
+    ##
+    # Runs the stages which interact with the GUI or application state (dark
+    # through Raman intensity correction) on the calling (GUI) thread.
+    #
+    # @returns PipelineJob to be passed to finish()
+    def start(self, pr, spec, settings, dark=None, ref=None, reading=None):
+        app_state = spec.app_state if spec is not None else None
+        job = PipelineJob(pr, spec, settings, reading=reading)
+
+        page_nav = self.ctl.page_nav
+        job.using_reference = page_nav.using_reference()
+        job.interpolate = self.ctl.interp.enabled
+        if job.device_id is not None:
+            job.device_buffers = self.get_buffers(job.device_id)
+
+        if app_state is not None:
+            job.stage("dark", pr.correct_dark, app_state.dark if dark is None else dark)
+
+        # This should be done before any processing that involves multiple
+        # pixels, e.g. offset, boxcar, baseline correction, or Richardson-Lucy.
+        # It should be done BEFORE interpolation.
+        job.stage("horiz_roi", self.ctl.horiz_roi.process, pr)
+
+        # add reference to ProcessedReading whether or not we're actively in a
+        # reference view, so plugins etc can access it
+        job.stage("reference", self.process_reference, pr, app_state, job.device_id, ref)
+
+        if job.using_reference:
+            if page_nav.doing_transmission():
+                job.stage("transmission", self.ctl.transmission.process, pr, settings, app_state)
+            elif page_nav.doing_absorbance():
+                job.stage("absorbance", self.ctl.absorbance.process, pr, settings, app_state)
+        else:
+            # This MUST be done before interpolation.
+            if page_nav.doing_raman():
+                job.stage("raman_intensity_correction", self.ctl.raman_intensity_correction.process, pr, spec)
+
+            job.baseline_x_axis = self.ctl.baseline_correction.get_x_axis(spec, pr)
+
+        return job
+
+    ##
+    # Runs the purely numeric stages (baseline correction onwards).  These
+    # don't touch Qt widgets, so may be called from AsyncProcessingExecutor's
+    # worker threads; anything to be graphed is left on the PipelineJob.
+    def finish(self, job):
+        if job.device_buffers is not None and job.device_buffers.claim():
+            job.buffers = job.device_buffers
+        try:
+            self.finish_stages(job)
+        finally:
+            if job.buffers is not None:
+                job.buffers.release()
+                job.buffers = None
+
+    def finish_stages(self, job):
+        pr = job.pr
+        spec = job.spec
+
+        if not job.using_reference:
+            # remove cosmic rays before anything spreads them across neighboring pixels
+            if self.ctl.despiking_feature.enabled:
+                job.stage("despiking", self.ctl.despiking_feature.process, pr, spec)
+
+            # Dieter goes back and forth on the order of these next two:
+            #
+            # a potentially better approach might be:
+            # - trim spectrum to useful range
+            # - intensity correction using SRM on nominal wavenumber axis
+            # - BASELINE CORRECTION
+            # - DECONVOLUTION
+            # - wavenumber axis calibration --WP-00413 report, p200
+            #
+            # If we invert the order of operation, applying the intensity
+            # correction first, then the DECONVOLUTION, and the BASELINE
+            # CORRECTION last, we see a better performance, especially with the
+            # alternate baseline method "ALS". --WP-00413 report, p217
+            job.baseline_curve = job.stage("baseline_correction", self.ctl.baseline_correction.process, pr, spec,
+                graph=False, scratch=job.scratch, x_axis=job.baseline_x_axis, state=job)
+
+            # on 2020-05-19 Deiter asked this to be moved before cropping
+            # (yet clearly we haven't...)
+            job.stage("richardson_lucy", self.ctl.richardson_lucy.process, pr, spec)
+
+        # One could argue whether boxcar should be before or after interpolation;
+        # however, it currently calls ProcessedReading.set_processed which does
+        # NOT update .interpolated, so for now it must remain before.
+        job.stage("boxcar", self.ctl.boxcar.process, pr, spec, scratch=job.scratch)
+
+        if job.interpolate:
+            job.stage("interpolation", self.ctl.interp.process, pr)
+
+    ##
+    # Graphs any deferred output and reports timing (call on the GUI thread).
+    def complete(self, job):
+        if job.spec is not None:
+            job.spec.app_state.baseline_correction_algo = job.baseline_correction_algo
+
+        if job.baseline_curve is not None:
+            x_axis, baseline = job.baseline_curve
+            self.ctl.baseline_correction.update_curve(job.spec, baseline, x_axis)
+
+        if job.device_id is not None:
+            self.timing[job.device_id] = job.timing
+
+        for callback in self.observers:
+            callback(job.device_id, job.timing)
+
+    def process_reference(self, pr, app_state, device_id, ref):
+        if app_state is not None and app_state.reference is not None:
+            if device_id is None:
+                pr.reference = np.copy(app_state.reference)
+            else:
+                pr.reference = self.get_buffers(device_id).get_reference(app_state.reference)
+        elif ref is not None:
+            pr.reference = np.copy(ref)
+        else:
+            pr.reference = None
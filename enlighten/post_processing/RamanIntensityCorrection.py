@@ -1,4 +1,5 @@
 import logging
+import numpy as np
 
 from enlighten.util import unwrap
 
@@ -35,6 +36,13 @@ class RamanIntensityCorrection:
         and "allowed" become true (such as a new dark was successfully stored).
         This is essentially used to decide whether the button is red (allowed and
         enabled) or orange (disallowed and enabled).
+
+    The factors covering the current horizontal ROI are sliced out of the
+    full-detector SpectrometerSettings.raman_intensity_factors once and cached
+    per spectrometer, then applied with a single vector multiply.  The cache is
+    dropped whenever the ROI changes (HorizROIFeature observer) or the EEPROM
+    is written (EEPROMWriter observer), and is also rebuilt if the settings
+    regenerate their factors (e.g. after editing the SRM coefficients).
     """
     
     def __init__(self, ctl):
@@ -48,6 +56,8 @@ class RamanIntensityCorrection:
         self.enabled             = False
         self.enable_when_allowed = False
 
+        self.factor_cache = {} # device_id -> RamanIntensityFactors
+
         self.button.clicked.connect(self.button_callback)
 
         self.button.setWhatsThis(unwrap("""
@@ -76,6 +86,8 @@ class RamanIntensityCorrection:
         self.ctl.page_nav.register_observer("mode", self.update_visibility)
         self.ctl.dark_feature.register_observer(self.update_visibility)
         self.ctl.horiz_roi.register_observer(self.update_visibility)
+        self.ctl.horiz_roi.register_observer(self.invalidate)
+        self.ctl.eeprom_writer.register_observer(self.invalidate)
 
         self.update_visibility()
 
@@ -220,13 +232,74 @@ class RamanIntensityCorrection:
         if pr.cropped:
             log.debug("applying SRM correction to ROI")
             roi = spec.settings.eeprom.get_horizontal_roi()
-            for i in range(len(pr.cropped.processed)):
-                pr.cropped.processed[i] *= factors[i + roi.start]
+            cropped_factors = self.get_factors(spec, factors, roi)
+            spectrum = pr.cropped.processed
+            if cropped_factors is None or len(spectrum) != len(cropped_factors):
+                log.error("process: SRM factors don't match cropped spectrum")
+                return
+
+            # cropped.processed is normally a view onto pr.processed, so
+            # correcting it in-place updates both (as the old loop did)
+            if isinstance(spectrum, np.ndarray) and spectrum.dtype.kind == "f":
+                np.multiply(spectrum, cropped_factors, out=spectrum)
+            else:
+                pr.cropped.processed = np.asarray(spectrum, dtype=np.float64) * cropped_factors
             pr.raman_intensity_corrected = True
 
+    ##
+    # @returns the slice of factors covering the given ROI, from cache if still valid
+    def get_factors(self, spec, factors, roi):
+        device_id = spec.device_id
+        cached = self.factor_cache.get(device_id, None)
+        if cached is not None and cached.matches(factors, roi):
+            return cached.cropped
+
+        if roi is None or not roi.valid() or roi.end >= len(factors):
+            return
+
+        log.debug(f"get_factors: caching SRM factors for {device_id} over {roi}")
+        cached = RamanIntensityFactors(factors, roi)
+        self.factor_cache[device_id] = cached
+        return cached.cropped
+
+    ##
+    # Drops cached factors, for all spectrometers unless one is specified.
+    #
+    # Called by HorizROIFeature and EEPROMWriter observers (which don't pass spec).
+    def invalidate(self, spec=None):
+        if spec is None:
+            self.factor_cache = {}
+        else:
+            self.factor_cache.pop(spec.device_id, None)
+
+    def remove_spec(self, spec):
+        """ called by Controller.disconnect_device """
+        self.invalidate(spec)
+
     def set_enable_when_allowed(self, value):
         self.enable_when_allowed = value if isinstance(value, bool) else value.lower() == "true"
         self.update_visibility()
 
     def get_enable_when_allowed(self):
         return self.enable_when_allowed
+
+##
+# The portion of one spectrometer's SRM factors covering its horizontal ROI.
+#
+# The source array is retained (rather than its id) so that regenerated
+# factors are always detected, even if the new array reuses the old address.
+class RamanIntensityFactors:
+
+    def __init__(self, factors, roi):
+        self.source = factors
+        self.start = roi.start
+        self.end = roi.end
+
+        self.cropped = np.array(factors[roi.start:roi.end+1], dtype=np.float64)
+        self.cropped.flags.writeable = False
+
+    def matches(self, factors, roi):
+        return factors is self.source and \
+               roi is not None and \
+               roi.start == self.start and \
+               roi.end == self.end
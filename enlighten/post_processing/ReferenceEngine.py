@@ -0,0 +1,126 @@
+import logging
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+##
+# The dark-corrected (and possibly cropped) reference for one spectrometer,
+# along with what it was computed from.
+class CachedReference:
+
+    def __init__(self, reference, dark, dark_corrected, roi, corrected):
+        self.reference      = reference         # pr.reference (ProcessingPipeline's read-only snapshot)
+        self.dark           = dark              # copy of the dark subtracted (if any)
+        self.dark_corrected = dark_corrected    # app_state.reference_is_dark_corrected
+        self.roi            = roi               # (start, end) cropped to, or None
+        self.corrected      = corrected         # read-only float64 array
+
+    def matches(self, reference, dark, dark_corrected, roi):
+        if reference is not self.reference or dark_corrected != self.dark_corrected or roi != self.roi:
+            return False
+        if dark_corrected:
+            return True
+        return dark is not None and self.dark is not None and len(dark) == len(self.dark) and np.array_equal(dark, self.dark)
+
+##
+# Vectorized reference-mode math for TransmissionFeature and AbsorbanceFeature.
+#
+# Those used to loop over every pixel in Python (with a try/except around each
+# division, then math.log10 for each pixel of absorbance), and dark-correct
+# and crop the reference afresh for every reading.  Here:
+#
+# - %T and AU are computed over whole NumPy arrays, with the division and
+#   logarithm masked to the pixels where they're defined, and clamping and
+#   out-of-range flags taken in the same pass
+# - the dark-corrected and cropped reference is cached per spectrometer, and
+#   only recomputed when the reference, dark or horizontal ROI changes
+#   (ProcessingPipeline hands every reading the same read-only snapshot of
+#   app_state.reference until a new one is taken, so identity suffices for the
+#   reference; darks are copied into each reading, so are compared by value)
+#
+# Results match the previous loops, including for zero, negative and NaN
+# pixels (bit-for-bit for %T; numpy's log10 may differ from math.log10 in the
+# last bit).
+class ReferenceEngine:
+
+    def __init__(self):
+        self.cache = {} # device_id -> CachedReference
+        self.hits = 0
+        self.misses = 0
+
+    def remove_spec(self, spec):
+        if spec is None:
+            return
+        self.cache.pop(spec.device_id, None)
+
+    ##
+    # @param pr       (Input) ProcessedReading with .reference and .dark
+    # @param settings (Input) SpectrometerSettings (optional, provides device_id and ROI)
+    # @param dark_corrected (Input) whether pr.reference was already dark-corrected
+    # @param crop     (Input) function(spectrum, roi) to crop with (HorizROIFeature.crop)
+    # @returns the reference to divide by, dark-corrected and cropped to match pr.get_processed()
+    def get_reference(self, pr, settings, dark_corrected, crop):
+        roi = None
+        if pr.is_cropped() and settings is not None:
+            roi = settings.eeprom.get_horizontal_roi()
+        roi_key = (roi.start, roi.end) if roi is not None else None
+
+        # readings cropped against the current spectrometer's ROI (no settings
+        # or no ROI) are unusual enough not to cache
+        device_id = settings.device_id if settings is not None else None
+        cacheable = device_id is not None and (roi is not None or not pr.is_cropped())
+
+        if cacheable:
+            cached = self.cache.get(device_id, None)
+            if cached is not None and cached.matches(pr.reference, pr.dark, dark_corrected, roi_key):
+                self.hits += 1
+                return cached.corrected
+
+        ref = np.array(pr.reference, dtype=np.float64)
+        if not dark_corrected:
+            ref -= pr.dark
+        if pr.is_cropped() and settings is not None:
+            ref = np.asarray(crop(ref, roi=roi), dtype=np.float64)
+
+        if cacheable:
+            self.misses += 1
+            ref.flags.writeable = False
+            dark = None if dark_corrected else np.array(pr.dark, dtype=np.float64)
+            self.cache[device_id] = CachedReference(pr.reference, dark, dark_corrected, roi_key, ref)
+        return ref
+
+    ##
+    # 100 * sample / reference, or 0 wherever the reference is 0.
+    #
+    # @param max_perc (Input) if not None, clamp %T to at most this
+    # @returns (transmission as float64 array, whether any pixel is negative)
+    @staticmethod
+    def transmission(sample, reference, max_perc=None):
+        sample = np.asarray(sample, dtype=np.float64)
+        reference = np.asarray(reference, dtype=np.float64)
+
+        perc = np.zeros(len(sample), dtype=np.float64)
+        with np.errstate(all="ignore"):
+            np.divide(100.0 * sample, reference, out=perc, where=(reference != 0))
+        if max_perc is not None:
+            np.minimum(perc, max_perc, out=perc)
+        return perc, bool((perc < 0).any())
+
+    ##
+    # -log10(%T / 100), or 0 where transmission is 0, and max_au where it is
+    # negative (or NaN).
+    #
+    # @returns (absorbance as float64 array, whether any pixel was saturated to max_au)
+    @staticmethod
+    def absorbance(transmission, max_au):
+        t = np.asarray(transmission, dtype=np.float64) / 100.0
+
+        positive = t > 0
+        au = np.zeros(len(t), dtype=np.float64)
+        with np.errstate(all="ignore"):
+            np.log10(t, out=au, where=positive)
+        np.negative(au, out=au, where=positive)
+
+        saturated = ~(t >= 0) & (t != 0)
+        au[saturated] = max_au
+        return au, bool(saturated.any())
@@ -1,11 +1,99 @@
 import logging
 import numpy as np
 import math
+import threading
 
 from enlighten.util import unwrap
 
 log = logging.getLogger(__name__)
 
+##
+# Full NxN Gaussian point-spread matrix, where row i is a normalized Gaussian
+# centered on pixel i with width pixel_sigma[i].
+#
+# Simple and exact, but both construction and each matvec are O(N²) in time,
+# and the matrix itself is N² doubles (32MB for a 2048-pixel detector).
+class DenseGaussianKernel:
+
+    def __init__(self, pixel_sigma):
+        num_pixels = len(pixel_sigma)
+        pixel_range = np.arange(num_pixels, dtype=np.double)
+
+        # distance of each column from each row's center pixel
+        delta = pixel_range[np.newaxis, :] - pixel_range[:, np.newaxis]
+        pixel_sigma_2 = np.asarray(pixel_sigma, dtype=np.double) ** 2
+
+        h = np.exp(-0.5 * delta * delta / pixel_sigma_2[:, np.newaxis])
+        h /= h.sum(axis=1)[:, np.newaxis]
+        self.h = h
+
+    def matvec(self, x):
+        return np.matmul(self.h, x)
+
+    def rmatvec(self, x):
+        return np.matmul(self.h.T, x)
+
+    def to_dense(self):
+        return self.h
+
+##
+# The same Gaussian point-spread matrix as DenseGaussianKernel, but truncated at
+# ±sigmas·max(pixel_sigma) around the diagonal and stored as an Nx(2w+1) array
+# of diagonals, where w is the band half-width in pixels.
+#
+# Construction and matvec are O(N·w), and since w is typically a few dozen 
+# pixels, this is far cheaper than the dense form on large detectors.  Rows are 
+# re-normalized over the truncated band, so with sigmas >= 4 the output 
+# matches the dense kernel to well within a count.
+class BandedGaussianKernel:
+
+    def __init__(self, pixel_sigma, sigmas=4.0):
+        pixel_sigma = np.asarray(pixel_sigma, dtype=np.double)
+        num_pixels = len(pixel_sigma)
+
+        self.num_pixels = num_pixels
+        self.half_width = max(1, min(num_pixels - 1, int(math.ceil(sigmas * np.abs(pixel_sigma).max()))))
+
+        # offsets[j] is the column offset of diagonal j from the row's center
+        offsets = np.arange(-self.half_width, self.half_width + 1, dtype=np.double)
+        self.offsets = offsets.astype(int)
+
+        # weights[i, j] is element h[i, i + offsets[j]] of the dense matrix
+        weights = np.exp(-0.5 * offsets[np.newaxis, :] ** 2 / (pixel_sigma ** 2)[:, np.newaxis])
+
+        # zero any weights which would fall off either end of the spectrum
+        cols = np.arange(num_pixels)[:, np.newaxis] + self.offsets[np.newaxis, :]
+        weights[(cols < 0) | (cols >= num_pixels)] = 0
+        weights /= weights.sum(axis=1)[:, np.newaxis]
+        self.weights = weights
+
+    def matvec(self, x):
+        """ returns h·x """
+        w = self.half_width
+        padded = np.zeros(self.num_pixels + 2 * w)
+        padded[w:w + self.num_pixels] = x
+        windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * w + 1)
+        return np.einsum("ij,ij->i", self.weights, windows)
+
+    def rmatvec(self, x):
+        """ returns hᵀ·x """
+        w = self.half_width
+        n = self.num_pixels
+        scaled = self.weights * np.asarray(x, dtype=np.double)[:, np.newaxis]
+        padded = np.zeros(n + 2 * w)
+        for j in range(2 * w + 1):
+            padded[j:j + n] += scaled[:, j]
+        return padded[w:w + n]
+
+    def to_dense(self):
+        n = self.num_pixels
+        h = np.zeros((n, n))
+        rows = np.repeat(np.arange(n), len(self.offsets))
+        cols = (np.arange(n)[:, np.newaxis] + self.offsets[np.newaxis, :]).ravel()
+        valid = (cols >= 0) & (cols < n)
+        h[rows[valid], cols[valid]] = self.weights.ravel()[valid]
+        return h
+
 ##
 # This class provides a deconvolution filter which sharpens peaks back to their 
 # original optical resolution by removing the Gaussian blur point-spread function.
@@ -13,10 +101,23 @@ log = logging.getLogger(__name__)
 # This class is responsible for the "[x] Sharpen Peaks" checkbox on the KnowItAll
 # settings.
 #
+# The point-spread function can be represented as a full NxN matrix ("dense", 
+# the original implementation) or as a truncated band around the diagonal 
+# ("banded"), selected through enlighten.ini:
+#
+# @verbatim
+# [RichardsonLucy]
+# kernel = banded
+# band_sigmas = 4
+# @endverbatim
+#
+# @see scripts/benchmark-richardson-lucy.py
+#
 # @see https://en.wikipedia.org/wiki/Richardson%E2%80%93Lucy_deconvolution
 class RichardsonLucy:
 
     SECTION = "RichardsonLucy"
+    KERNELS = ["dense", "banded"]
 
     ##
     # @param iterations how many Richardson-Lucy iterations to run
@@ -31,6 +132,8 @@ class RichardsonLucy:
 
         self.cb_enable = cfu.checkBox_richardson_lucy
 
+        self.lock = threading.Lock()    # guards cache (@see get_gaussian)
+        self.generation = 0             # incremented by reset()
         self.reset()
 
         self.update_from_config()
@@ -65,8 +168,17 @@ class RichardsonLucy:
 
     def update_from_config(self):
         # when are these actually set?
-        self.iterations = self.ctl.config.get_int  (self.SECTION, "iterations", default=5)
-        self.downgrade  = self.ctl.config.get_float(self.SECTION, "downgrade",  default=1.0)
+        self.iterations  = self.ctl.config.get_int  (self.SECTION, "iterations",  default=5)
+        self.downgrade   = self.ctl.config.get_float(self.SECTION, "downgrade",   default=1.0)
+        self.band_sigmas = self.ctl.config.get_float(self.SECTION, "band_sigmas", default=4.0)
+
+        self.kernel = "dense"
+        if self.ctl.config.has_option(self.SECTION, "kernel"):
+            kernel = self.ctl.config.get(self.SECTION, "kernel").lower()
+            if kernel in self.KERNELS:
+                self.kernel = kernel
+            else:
+                log.error(f"unsupported kernel {kernel} (expected {self.KERNELS})")
 
     def update_from_gui(self):
         self.enabled = self.cb_enable.isChecked()
@@ -97,8 +209,8 @@ class RichardsonLucy:
             return 
 
         # generate convolution
-        resolution_h = self.get_gaussian(spec)
-        if resolution_h is None:
+        kernel = self.get_gaussian(spec)
+        if kernel is None:
             return 
 
         spectrum = pr.get_processed()
@@ -112,16 +224,28 @@ class RichardsonLucy:
         deconvolved[deconvolved < eps] = eps 
 
         # apply convolution
-        for _ in range(self.iterations):
-            h_times_x = np.matmul(resolution_h, deconvolved)
-            y_over_h_times_x = orig / h_times_x
-            full_sum = np.matmul(np.transpose(resolution_h), y_over_h_times_x)
-            deconvolved = deconvolved * full_sum
-            deconvolved[deconvolved < eps] = eps 
+        deconvolved = self.deconvolve(kernel, orig, deconvolved, self.iterations)
         
         pr.set_processed(deconvolved)
         pr.deconvolved = True
 
+    ##
+    # The Richardson-Lucy iteration proper, independent of kernel representation.
+    #
+    # @param kernel (Input) DenseGaussianKernel or BandedGaussianKernel
+    # @param orig (Input) observed spectrum
+    # @param deconvolved (Input) initial estimate (typically orig clamped to eps)
+    # @returns deconvolved spectrum
+    @staticmethod
+    def deconvolve(kernel, orig, deconvolved, iterations, eps=1e-5):
+        for _ in range(iterations):
+            h_times_x = kernel.matvec(deconvolved)
+            y_over_h_times_x = orig / h_times_x
+            full_sum = kernel.rmatvec(y_over_h_times_x)
+            deconvolved = deconvolved * full_sum
+            deconvolved[deconvolved < eps] = eps 
+        return deconvolved
+
     ##
     # There are various ways we could decide what unit to use for average 
     # FWHM. We could just use whatever was currently displayed on-screen 
@@ -132,15 +256,26 @@ class RichardsonLucy:
     # an emission source (like we'd know) -- and wavelengths otherwise.
     def get_gaussian(self, spec):
         unit = "cm" if spec.has_excitation() else "nm"
-        key = spec.label + unit
+        key = spec.label + unit + self.kernel
 
         # check to see if we've already generated the Gaussian for this 
         # spectrometer in this unit
-        if key not in self.cache:
-            log.debug("generating Gaussian for key %s", key)
-            self.cache[key] = self.generate_gaussian(spec, unit)
-
-        return self.cache[key]
+        #
+        # process() may run on AsyncProcessingExecutor's worker threads while
+        # reset() is called on the GUI thread, hence the lock.  The kernel is
+        # generated outside it, and not cached if reset() was called meanwhile.
+        with self.lock:
+            if key in self.cache:
+                return self.cache[key]
+            generation = self.generation
+
+        log.debug("generating Gaussian for key %s", key)
+        kernel = self.generate_gaussian(spec, unit)
+
+        with self.lock:
+            if generation == self.generation:
+                self.cache[key] = kernel
+        return kernel
 
     ##
     # Generating the Gaussian is somewhat intensive, so cache it.
@@ -148,13 +283,15 @@ class RichardsonLucy:
     # has changed the ROI), flush so it will be regenerated.
     def reset(self):
         log.debug("flushing cache")
-        self.cache = {}
+        with self.lock:
+            self.cache = {}
+            self.generation += 1
 
     def generate_gaussian(self, spec, unit):
         if spec is None:
             return
 
-        x_axis = self.ctl.generate_x_axis(unit=unit, cropped=True)
+        x_axis = self.ctl.generate_x_axis(spec=spec, unit=unit, cropped=True)
         if x_axis is None:
             log.debug("no x-axis")
             return 
@@ -164,24 +301,21 @@ class RichardsonLucy:
             log.debug("can't apply Richardson-Lucy without estimated optical resolution in FWHM (%s)", unit)
             return
 
-        num_pixels = len(x_axis)
-        pixel_range = np.arange(num_pixels)
+        pixel_sigma = self.compute_pixel_sigma(x_axis, resolution_per_unit, self.downgrade)
+
+        if self.kernel == "banded":
+            return BandedGaussianKernel(pixel_sigma, sigmas=self.band_sigmas)
+        return DenseGaussianKernel(pixel_sigma)
 
+    ##
+    # Convert the optical resolution (FWHM in x-axis units) into a per-pixel
+    # Gaussian sigma, given the local dispersion of the x-axis.
+    @staticmethod
+    def compute_pixel_sigma(x_axis, resolution_per_unit, downgrade=1.0):
         unit_per_pixel = np.diff(x_axis)
         unit_per_pixel = np.insert(unit_per_pixel, 0, unit_per_pixel[0])
         pixel_fwhm = resolution_per_unit / unit_per_pixel
 
         pixel_sigma = pixel_fwhm / (2.0 * math.sqrt(2.0 * math.log(2.0)))
-        pixel_sigma *= self.downgrade
-        pixel_sigma_2 = pixel_sigma * pixel_sigma
-        resolution_h = np.zeros((num_pixels, num_pixels))
-
-        for row in pixel_range:
-            tmp = (pixel_range - row).astype(np.double)
-            tmp = tmp * tmp
-            tmp *= -0.5 
-            tmp /= pixel_sigma_2[row]
-            resolution_spectrum = np.exp(tmp)
-            resolution_h[row] = resolution_spectrum / sum(resolution_spectrum)
-
-        return resolution_h
+        pixel_sigma *= downgrade
+        return pixel_sigma
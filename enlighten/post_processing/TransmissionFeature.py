@@ -1,11 +1,13 @@
 import logging
 
 from enlighten.ui.ScrollStealFilter import ScrollStealFilter
+from enlighten.post_processing.ReferenceEngine import ReferenceEngine
 
 log = logging.getLogger(__name__)
 
 ##
-# @todo redo process() math with numpy
+# Computes percent transmission against the stored reference (the arithmetic
+# is in ReferenceEngine).
 class TransmissionFeature:
     
     def __init__(self, ctl):
@@ -15,69 +17,64 @@ class TransmissionFeature:
         self.cb_max_enable  = cfu.checkBox_enable_max_transmission
         self.sb_max_perc    = cfu.spinBox_max_transmission_perc
 
+        self.engine = ReferenceEngine()
+
         self.update_from_gui()
 
         self.cb_max_enable  .stateChanged       .connect(self.update_from_gui)
         self.sb_max_perc    .valueChanged       .connect(self.update_from_gui)
         self.sb_max_perc                        .installEventFilter(ScrollStealFilter(self.sb_max_perc))
 
+    def remove_spec(self, spec):
+        self.engine.remove_spec(spec)
+
     ## transmission processing is: 100 * (sample - dark) / (reference - dark)
     # (if no dark is available, just use sample / reference)
     #
     # @returns True if ProcessedReading.processed successfully updated
     def process(self, processed_reading, settings, app_state):
+        transmission = self.compute(processed_reading, settings, app_state)
+        if transmission is None:
+            return False
+
+        processed_reading.set_processed(transmission.tolist())
+        log.debug("trans = %s", transmission[0:5])
+        return True
+
+    ##
+    # Computes transmission from the current processed spectrum, without
+    # storing it back (so AbsorbanceFeature can carry on from the array).
+    #
+    # @returns %T as a numpy array, or None if it can't be computed
+    def compute(self, processed_reading, settings, app_state):
         pr = processed_reading
 
         if pr.dark is None:
             self.ctl.marquee.error("Please take dark")
-            return False
+            return
 
-        ref = pr.reference
-        if ref is None:
+        if pr.reference is None:
             self.ctl.marquee.error("Please take reference")
-            return False
-
-        # dark-correct reference if not already done
-        if not app_state.reference_is_dark_corrected:
-            ref = ref.copy()
-            ref -= pr.dark
+            return
 
         sample = pr.get_processed()
         if sample is None:
             log.error("can't compute transmission without a sample")
-            return False
+            return
 
-        if pr.is_cropped() and settings is not None:
-            roi = settings.eeprom.get_horizontal_roi()
-            ref = self.ctl.horiz_roi.crop(ref, roi=roi)
+        # dark-corrected and cropped (cached until the reference, dark or ROI changes)
+        ref = self.engine.get_reference(pr, settings, app_state.reference_is_dark_corrected, self.ctl.horiz_roi.crop)
 
         if len(ref) != len(sample):
             self.ctl.marquee.error("reference and sample must be same size")
-            return False
+            return
 
-        transmission = []
-        has_neg = False
-        for i in range(len(sample)):
-            value = 0
-            if ref[i] != 0:
-                try:
-                    value = 100.0 * float(sample[i]) / float(ref[i])
-                except:
-                    log.debug(f"error computing transmission at pixel {i} (sample len {len(sample)}, orig ref len {len(pr.reference)})")
-                    pass
-            if self.max_enabled:
-                value = min(value, self.max_perc)
-            transmission.append(value)
-
-            if value < 0:
-                has_neg = True
+        transmission, has_neg = ReferenceEngine.transmission(sample, ref, self.max_perc if self.max_enabled else None)
 
         if has_neg:
             self.ctl.marquee.error("measurement out-of-range")
 
-        pr.set_processed(transmission)
-        log.debug("trans = %s", transmission[0:5])
-        return True
+        return transmission
 
     def update_from_gui(self):
         self.max_enabled = self.cb_max_enable.isChecked()
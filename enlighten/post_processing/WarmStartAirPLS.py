@@ -0,0 +1,155 @@
+import logging
+import numpy as np
+
+from superman.baseline.common import WhittakerSmoother
+
+log = logging.getLogger(__name__)
+
+##
+# AirPLS (adaptive iteratively reweighted penalized least squares), identical
+# to superman.baseline.airpls.airpls_baseline except that the caller may seed
+# the weights (and iteration count) from a previous fit, and receives them back.
+#
+# With weights=None and first_iter=1 this performs exactly the same arithmetic
+# as superman's implementation.
+#
+# @param smoother    (Input) WhittakerSmoother whose .y is the spectrum to fit
+# @param weights     (Input) seed weights (e.g. from previous frame), else ones
+# @param first_iter  (Input) iteration number to resume from (scales the reweighting exponent)
+# @returns (baseline, weights, iteration, converged)
+def airpls_fit(smoother, max_iters, conv_thresh, weights=None, first_iter=1):
+    intensities = smoother.y
+    total_intensity = np.abs(intensities).sum()
+
+    w = np.ones(intensities.shape[0]) if weights is None else np.array(weights, dtype=np.float64)
+
+    last_iter = first_iter + max_iters - 1
+    for i in range(first_iter, last_iter + 1):
+        baseline = smoother.smooth(w)
+
+        # compute error (sum of distances below the baseline)
+        corrected = intensities - baseline
+        mask = corrected < 0
+        baseline_error = -corrected[mask]
+        total_error = baseline_error.sum()
+
+        # check convergence as a fraction of total intensity
+        if total_error / total_intensity < conv_thresh:
+            return baseline, w, i, True
+
+        # peak weights to zero, baseline weights grow with the iteration count
+        w[~mask] = 0
+        baseline_error /= total_error
+        w[mask] = np.exp(i * baseline_error)
+        w[0] = np.exp(i * baseline_error.min())
+        w[-1] = w[0]
+
+    return baseline, w, last_iter, False
+
+##
+# What WarmStartAirPLS remembers about one spectrometer between frames.
+class AirPLSFitState:
+
+    def __init__(self, pixels, smoother):
+        self.pixels = pixels
+        self.smoother = smoother        # banded penalty matrix depends only on pixels and smoothness
+        self.weights = None             # converged weights from the last full refit
+        self.iteration = 1              # iteration at which the last full refit converged
+        self.reference = None           # spectrum at the last full refit
+        self.frames_since_refit = 0
+
+        self.last_iterations = 0        # iterations spent on the most recent frame
+        self.last_warm = False          # whether the most recent frame was warm-started
+
+##
+# Warm-started AirPLS for live spectra.
+#
+# Consecutive frames of the same sample have nearly identical baselines, so
+# rather than starting every fit from uniform weights, each spectrometer's fit
+# resumes from the weights (and iteration count) at which its last full fit
+# converged, usually meeting the convergence threshold within one or two
+# iterations.  Because the same convergence test is applied, a warm fit meets
+# the same tolerance as a cold one.
+#
+# Note that warm fits always resume from the cached full fit, not from the
+# previous warm fit: AirPLS's result depends on where it stops iterating, and
+# chaining warm fits frame-to-frame lets the baseline sink progressively
+# deeper into the noise.
+#
+# A full (cold) refit is forced:
+#
+# - on the first frame, or if the pixel count changes (e.g. horizontal ROI)
+# - every refit_interval frames (0 disables periodic refits)
+# - when the spectrum differs from the one at the last full refit by more than
+#   refit_threshold (sum of absolute differences relative to total intensity)
+# - if the warm fit fails to converge within max_iters
+#
+# @see BaselineCorrection
+class WarmStartAirPLS:
+
+    def __init__(self, smoothness_param, max_iters, conv_thresh, refit_interval=50, refit_threshold=0.05):
+        self.smoothness_param = smoothness_param
+        self.max_iters = max_iters
+        self.conv_thresh = conv_thresh
+        self.refit_interval = refit_interval
+        self.refit_threshold = refit_threshold
+
+        self.states = {} # device_id -> AirPLSFitState
+
+    def clear(self, device_id=None):
+        if device_id is None:
+            self.states = {}
+        else:
+            self.states.pop(device_id, None)
+
+    def get_state(self, device_id):
+        return self.states.get(device_id, None)
+
+    def needs_refit(self, state, intensities):
+        if state.weights is None or state.reference is None:
+            return True
+        if self.refit_interval > 0 and state.frames_since_refit >= self.refit_interval:
+            return True
+
+        total = np.abs(state.reference).sum()
+        if total <= 0:
+            return True
+        change = np.abs(intensities - state.reference).sum() / total
+        return change > self.refit_threshold
+
+    ##
+    # @param device_id   (Input) key under which fit state is kept
+    # @param intensities (Input) spectrum to fit (np.float64)
+    # @returns baseline
+    def fit(self, device_id, intensities):
+        pixels = len(intensities)
+
+        state = self.states.get(device_id, None)
+        if state is None or state.pixels != pixels:
+            state = AirPLSFitState(pixels, WhittakerSmoother(intensities, self.smoothness_param))
+            self.states[device_id] = state
+        state.smoother.y = intensities
+
+        iterations = 0
+        if not self.needs_refit(state, intensities):
+            baseline, _, iteration, converged = airpls_fit(state.smoother, self.max_iters, self.conv_thresh,
+                weights=state.weights, first_iter=state.iteration)
+            iterations = iteration - state.iteration + 1
+            if converged:
+                state.frames_since_refit += 1
+                state.last_iterations = iterations
+                state.last_warm = True
+                return baseline
+            log.debug("warm-started AirPLS failed to converge on %s, refitting", device_id)
+
+        baseline, weights, iteration, converged = airpls_fit(state.smoother, self.max_iters, self.conv_thresh)
+        if not converged:
+            log.debug("AirPLS did not converge in %d iterations", self.max_iters)
+
+        state.weights = weights
+        state.iteration = iteration
+        state.reference = np.copy(intensities)
+        state.frames_since_refit = 0
+        state.last_iterations = iterations + iteration
+        state.last_warm = False
+        return baseline
@@ -193,8 +193,7 @@ class Cursor:
             #     from "state" or "history" or anything.  That's probably the right
             #     thing to do for a graph cursor.
             curve = spec.curve
-            x_axis   = curve.getData()[ 0]
-            spectrum = curve.getData()[-1] 
+            x_axis, spectrum = self.ctl.graph.get_data(curve)
             log.debug(f"in update x axis from graph is len {len(x_axis)}")
 
             # Find the CLOSEST index on the x-axis to the cursor's x-index
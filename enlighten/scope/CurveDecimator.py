@@ -0,0 +1,101 @@
+import logging
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+##
+# Reduces a curve to what can actually be seen on-screen before it is handed to
+# pyqtgraph, so redraw cost scales with the graph's width in pixels rather than
+# the number of points.
+#
+# - clip() drops points outside the visible x-range (keeping one point beyond
+#   each edge, so the line still runs off the side of the graph)
+# - decimate() splits the remaining points into one bin per pixel column and
+#   keeps each bin's minimum and maximum, so peaks, spikes and dips survive
+#   (unlike simple subsampling, which skips over them)
+#
+# Both are pure NumPy, and return their inputs unchanged when there is nothing
+# to gain.  Graph holds on to the full-resolution data, and re-renders from it
+# when the view is zoomed, panned or resized.
+class CurveDecimator:
+
+    ## don't bother decimating unless there are more than this many points per pixel
+    MIN_POINTS_PER_PIXEL = 2
+
+    ##
+    # @param x (Input) array-like, or None for 0..len(y)-1
+    # @param y (Input) array-like
+    # @param width (Input) visible width of the graph in pixels
+    # @param x_range (Input) optional (min, max) visible x-range to clip to
+    # @returns x, y (as float ndarrays) for display
+    @staticmethod
+    def reduce(x, y, width, x_range=None):
+        y = np.asarray(y, dtype=np.float64)
+        if x is None:
+            x = np.arange(len(y), dtype=np.float64)
+        else:
+            x = np.asarray(x, dtype=np.float64)
+
+        if len(x) != len(y):
+            return x, y
+
+        if x_range is not None:
+            x, y = CurveDecimator.clip(x, y, *x_range)
+        return CurveDecimator.decimate(x, y, width)
+
+    ##
+    # @returns the slices of x, y which fall within [x_min, x_max], plus one
+    #          point either side; unchanged if x isn't monotonic
+    @staticmethod
+    def clip(x, y, x_min, x_max):
+        n = len(x)
+        if n < 3:
+            return x, y
+
+        if x[0] <= x[-1]:
+            if not np.all(x[1:] >= x[:-1]):
+                return x, y
+            start = np.searchsorted(x, x_min, side="left")
+            end   = np.searchsorted(x, x_max, side="right")
+        else:
+            # e.g. RollingDataSet ages, which run from oldest to newest
+            if not np.all(x[1:] <= x[:-1]):
+                return x, y
+            start = n - np.searchsorted(x[::-1], x_max, side="right")
+            end   = n - np.searchsorted(x[::-1], x_min, side="left")
+
+        start = max(0, int(start) - 1)
+        end   = min(n, int(end) + 1)
+        return x[start:end], y[start:end]
+
+    ##
+    # Peak-preserving (min/max) decimation.
+    #
+    # @returns x, y with at most 2 points per pixel column (plus any remainder
+    #          which didn't fill a whole bin)
+    @staticmethod
+    def decimate(x, y, width):
+        n = len(y)
+        width = int(width)
+        if width < 1 or n <= width * CurveDecimator.MIN_POINTS_PER_PIXEL:
+            return x, y
+
+        per_bin = n // width
+        bins = n // per_bin
+        used = bins * per_bin
+
+        blocks = y[:used].reshape(bins, per_bin)
+
+        # fmin/fmax ignore NaN (e.g. missing temperature readings) unless a
+        # whole bin is NaN
+        y_dec = np.empty(2 * bins + n - used, dtype=np.float64)
+        y_dec[0:2*bins:2] = np.fmin.reduce(blocks, axis=1)
+        y_dec[1:2*bins:2] = np.fmax.reduce(blocks, axis=1)
+        y_dec[2*bins:] = y[used:]
+
+        x_dec = np.empty(len(y_dec), dtype=np.float64)
+        x_dec[0:2*bins:2] = x[0:used:per_bin]
+        x_dec[1:2*bins:2] = x[per_bin-1:used:per_bin]
+        x_dec[2*bins:] = x[used:]
+
+        return x_dec, y_dec
@@ -0,0 +1,105 @@
+import time
+import logging
+
+from enlighten import common
+
+if common.use_pyside2():
+    from PySide2 import QtCore
+else:
+    from PySide6 import QtCore
+
+log = logging.getLogger(__name__)
+
+##
+# Coalesces curve updates from Controller.set_curve_data (every connected
+# spectrometer's processed curve, plus the Scope Setup live_curve) into at most
+# one graph update per display frame.
+#
+# Without it, each Reading from each spectrometer is drawn as soon as it
+# arrives, so N devices streaming at R Hz cost N*R setData calls and repaints
+# per second.  With it, set_data() just records the newest data for each curve
+# (replacing any not yet drawn) and a single-shot QTimer flushes them all
+# together, no more than max_fps times per second.  Superseded data is never
+# drawn.
+#
+# Flushed data is passed to Graph.set_data, so decimation etc still apply.
+#
+# Disabled by default, in which case updates are drawn immediately as before:
+#
+# @verbatim
+# [frame_scheduler]
+# enabled = True
+# max_fps = 30
+# @endverbatim
+class FrameScheduler:
+
+    SECTION = "frame_scheduler"
+
+    def __init__(self, ctl):
+        self.ctl = ctl
+
+        self.enabled = self.ctl.config.get_bool (self.SECTION, "enabled", default=False)
+        self.max_fps = self.ctl.config.get_float(self.SECTION, "max_fps", default=30)
+        if self.max_fps <= 0:
+            self.enabled = False
+
+        self.pending = {}       # id(curve) -> (curve, y, x, label)
+        self.last_flush = 0
+        self.frames = 0
+        self.superseded = 0
+
+        self.timer = QtCore.QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+        if self.enabled:
+            log.info(f"coalescing curve updates at up to {self.max_fps} fps")
+
+    ##
+    # Draw the given data on the curve, now or at the next frame.
+    #
+    # @param curve (Input) a curve on ctl.graph
+    def set_data(self, curve, y, x=None, label=None):
+        if not self.enabled:
+            self.ctl.graph.set_data(curve=curve, y=y, x=x, label=label)
+            return
+
+        key = id(curve)
+        if key in self.pending:
+            self.superseded += 1
+        self.pending[key] = (curve, y, x, label)
+
+        if not self.timer.isActive():
+            wait_sec = self.last_flush + 1.0 / self.max_fps - time.monotonic()
+            self.timer.start(max(0, int(wait_sec * 1000)))
+
+    ## draw all pending updates (e.g. before rescaling curves to a new x-axis)
+    def flush(self):
+        self.timer.stop()
+        if not self.pending:
+            return
+
+        pending = self.pending
+        self.pending = {}
+        self.last_flush = time.monotonic()
+        self.frames += 1
+
+        for curve, y, x, label in pending.values():
+            try:
+                self.ctl.graph.set_data(curve=curve, y=y, x=x, label=label)
+            except:
+                log.error(f"error drawing {label}", exc_info=1)
+
+    ## drop any update not yet drawn to the curve (e.g. before clearing it)
+    def remove_curve(self, curve):
+        if curve is not None:
+            self.pending.pop(id(curve), None)
+
+    ## don't draw to the curve of a disconnected spectrometer
+    def remove_spec(self, spec):
+        if spec is not None:
+            self.remove_curve(spec.curve)
+
+    def stop(self):
+        self.timer.stop()
+        self.pending = {}
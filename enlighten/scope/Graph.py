@@ -1,9 +1,11 @@
 import logging
+import numpy as np
 
 import pyqtgraph
 
 from enlighten import common
 from enlighten.util import unwrap
+from enlighten.scope.CurveDecimator import CurveDecimator
 from enlighten.ui.ScrollStealFilter import ScrollStealFilter
 
 if common.use_pyside2():
@@ -36,6 +38,17 @@ log = logging.getLogger(__name__)
 #   change Multispec selected spectrometer (or select a ThumbnailWidget, if that
 #   was useful) by clicking a curve on-screen
 #
+# @par Fast Rendering
+#
+# With several spectrometers and many displayed Measurement traces, pushing
+# every pixel of every curve to pyqtgraph on each frame can cost more than the
+# acquisition itself.  When "Fast Render" is checked, curves are passed through
+# CurveDecimator: clipped to the visible x-range (once the user has zoomed in)
+# and reduced to the min/max of each pixel column.  The full-resolution data is
+# kept on the curve (@see get_data), and the displayed points are recomputed
+# whenever the view is zoomed, panned or resized.  Markers show physical pixels,
+# so curves are not decimated while markers are shown.
+#
 class Graph:
 
     ##
@@ -65,6 +78,7 @@ class Graph:
         self.button_lock_axes           = cfu.pushButton_lock_axes
         self.button_zoom                = cfu.pushButton_zoom_graph
         self.cb_marker                  = cfu.checkBox_graph_marker
+        self.cb_decimate                = cfu.checkBox_graph_decimate
         self.combo_axis                 = cfu.displayAxis_comboBox_axis
 
         # these are the "main graph" widgets we will populate IFF no ready-made 
@@ -83,21 +97,31 @@ class Graph:
         self.x_axis_locked  = False  # EnlightenPluginConfiguration specified an x_axis_label
         self.show_marker    = False
         self.inverted       = False
+        self.decimate       = ctl.config.get_bool("graphs", "decimate", default=False)
+        self.clipped        = False  # some curves are clipped to the zoomed x-range
 
         self.observers = {}
 
         self.combo_axis.setCurrentIndex(self.current_x_axis)
+        self.cb_decimate.setChecked(self.decimate)
 
         # if we weren't passed a pre-populated plot, then create one
         if not self.plot:
             self.populate_scope_setup()
             self.populate_scope_capture()
 
+        # re-render decimated curves when the visible region changes
+        box = self.plot.getViewBox()
+        box.sigXRangeChanged.connect(self.x_range_changed_callback)
+        box.sigStateChanged.connect(self.view_state_changed_callback)
+        box.sigResized.connect(self.resized_callback)
+
         # bindings
         self.combo_axis         .currentIndexChanged    .connect(self.update_axis_callback)
         self.combo_axis         .installEventFilter(ScrollStealFilter(self.combo_axis))
         self.button_invert      .clicked                .connect(self.invert_x_axis)
         self.cb_marker          .stateChanged           .connect(self.update_marker)
+        self.cb_decimate        .stateChanged           .connect(self.update_decimate)
         self.button_lock_axes   .clicked                .connect(self.toggle_lock_axes)
         self.button_zoom        .clicked                .connect(self.toggle_zoom)
         self.button_copy        .clicked                .connect(self.copy_to_clipboard_callback)
@@ -105,6 +129,12 @@ class Graph:
         self.combo_axis         .setWhatsThis("Change the current graph x-axis. By default, Raman shift in wavenumbers (cm⁻¹) is selected in Raman mode, and wavelengths (nm) in Non-Raman mode.")
         self.button_invert      .setWhatsThis("Flip the graph's x-axis direction from increasing wavelength/wavenumbers to decreasing, as is common in Raman spectroscopy")
         self.cb_marker          .setWhatsThis("Show visible graph markers on each physical datapoint on the graph, making it easier to see individual pixels")
+        self.cb_decimate        .setWhatsThis(unwrap("""
+            Only draw what can be seen: curves are clipped to the zoomed region,
+            and reduced to the highest and lowest point in each column of 
+            screen pixels, so peaks are preserved while redraws stay fast with
+            many spectra displayed. Copy to clipboard and the cursor still use
+            the full-resolution data."""))
         self.button_zoom        .setWhatsThis("Hide the Clipboard and Control Palettes to maximize the on-screen graph")
         self.button_copy        .setWhatsThis("Copy all spectra currently displayed on the graph to the system copy-paste clipboard, where it can be easily pasted into programs like Microsoft Excel")
         self.button_lock_axes   .setWhatsThis(unwrap("""
@@ -185,6 +215,12 @@ class Graph:
     def update_marker(self):
         self.show_marker = self.cb_marker.isChecked()
         self.rescale_curves()
+        self.render_all()
+
+    def update_decimate(self):
+        self.decimate = self.cb_decimate.isChecked()
+        self.ctl.config.set("graphs", "decimate", self.decimate)
+        self.render_all()
 
     def register_observer(self, event, callback):
         if event not in self.observers:
@@ -320,6 +356,11 @@ class Graph:
             )
 
         self.update_curve_marker(curve)
+        self.store_data(curve, y=y, x=x)
+        if self.is_decimating(curve):
+            self.render(curve)
+        else:
+            curve.rendered_y = curve.yData
         log.debug("add_curve: added a %s (%s)", type(curve), str(curve))
 
         # if this new curve is tied to a live Spectrometer or a captured Measurement, 
@@ -382,7 +423,86 @@ class Graph:
             pass
 
         self.update_curve_marker(curve)
+        self.store_data(curve, y=y, x=x)
+        self.render(curve)
+
+    ##
+    # Keep the full-resolution data on the curve, as when decimating,
+    # curve.getData() only returns what is displayed.
+    def store_data(self, curve, y=None, x=None):
+        curve.full_x = x
+        curve.full_y = y
+
+    ##
+    # Some features update curves created by add_curve with curve.setData()
+    # directly, in which case the stored full-resolution data is stale and
+    # must not be rendered (or returned) again.  pyqtgraph replaces yData on
+    # every setData, so compare it with what render() last displayed.
+    #
+    # @returns whether the curve has current full-resolution data
+    def has_full_data(self, curve):
+        if not hasattr(curve, "full_y"):
+            return False
+        if getattr(curve, "rendered_y", None) is not curve.yData:
+            del curve.full_x, curve.full_y
+            return False
+        return True
+
+    ##
+    # @returns the (x, y) most recently passed to set_data or add_curve, 
+    #          regardless of any decimation
+    def get_data(self, curve):
+        if not self.has_full_data(curve):
+            return curve.getData()
+        if curve.full_y is None:
+            return None, None
+
+        y = np.asarray(curve.full_y)
+        x = np.arange(len(y)) if curve.full_x is None else np.asarray(curve.full_x)
+        return x, y
+
+    ##
+    # Curves drawn with markers (or as scatter plots) show every point.  So do
+    # curves on other plots (e.g. Scope Setup's dark and reference), as the
+    # re-rendering on zoom, pan and resize only follows this Graph's plot.
+    def is_decimating(self, curve):
+        return self.decimate and curve.opts.get("symbol") is None and curve.getViewBox() is self.plot.getViewBox()
+
+    ## pass the curve's full-resolution data to pyqtgraph, decimated if enabled
+    def render(self, curve):
+        x, y = curve.full_x, curve.full_y
+        if y is not None and self.is_decimating(curve):
+            box = self.plot.getViewBox()
+            width = box.width() * self.plot.devicePixelRatioF()
+
+            # while auto-ranging, the view follows the data, so there's nothing to clip
+            x_range = None if box.autoRangeEnabled()[0] else box.viewRange()[0]
+            x, y = CurveDecimator.reduce(x, y, width, x_range)
+            self.clipped = self.clipped or x_range is not None
+
         curve.setData(y=y, x=x)
+        curve.rendered_y = curve.yData
+
+    def render_all(self):
+        self.clipped = False
+        for curve in self.plot.listDataItems():
+            if self.has_full_data(curve):
+                self.render(curve)
+
+    ## the user zoomed or panned the graph
+    def x_range_changed_callback(self, *args):
+        # while auto-ranging, the range only changes to follow the data
+        if self.decimate and not self.plot.getViewBox().autoRangeEnabled()[0]:
+            self.render_all()
+
+    ## auto-range was re-enabled, so it needs to see the unclipped curves
+    def view_state_changed_callback(self, *args):
+        if self.clipped and self.plot.getViewBox().autoRangeEnabled()[0]:
+            self.render_all()
+
+    def resized_callback(self, *args):
+        if self.decimate:
+            self.render_all()
 
     def invert_x_axis(self):
         self.inverted = not self.inverted
@@ -398,13 +518,17 @@ class Graph:
 
         axis = self.current_x_axis
 
+        # draw any deferred updates first, so they don't land on the old axis
+        if self.ctl.frame_scheduler:
+            self.ctl.frame_scheduler.flush()
+
         # handle live spectrometers
         if self.ctl.multispec is not None:
             for spec in self.ctl.multispec.get_spectrometers():
                 curve = spec.curve
                 if curve is None:
                     continue
-                (xData, yData) = curve.getData()
+                (xData, yData) = self.get_data(curve)
                 xData = self.ctl.generate_x_axis(spec=spec)
                 if xData is not None and yData is not None:
                     if len(yData) < len(xData) and self.ctl.horiz_roi:
@@ -427,7 +551,7 @@ class Graph:
                 measurement_id = getattr(curve, "measurement_id")
                 log.debug("curve %s is from measurement %s", name, measurement_id)
 
-                (xData, yData) = curve.getData()
+                (xData, yData) = self.get_data(curve)
                 if yData is None:
                     continue
 
@@ -463,7 +587,7 @@ class Graph:
 
             # iterate over every curve on the graph
             for curve in self.plot.listDataItems():
-                spectrum = curve.getData()[-1]
+                spectrum = self.get_data(curve)[-1]
                 if spectrum is not None:
                     if len(spectrum) == len(x_axis):
                         spectra.append(spectrum)
@@ -475,7 +599,7 @@ class Graph:
             # multiple spectrometers, so x-axis and lengths can vary
             spectra = []
             for curve in self.plot.listDataItems():
-                data = curve.getData()
+                data = self.get_data(curve)
                 x = data[0]
                 y = data[-1]
                 spectra.append(x)
@@ -0,0 +1,185 @@
+import os
+import time
+import logging
+import datetime
+import numpy as np
+
+from collections import deque
+from contextlib import contextmanager
+
+from wasatch import applog
+
+log = logging.getLogger(__name__)
+
+##
+# Rolling window of latency samples (in milliseconds) for one processing stage
+# on one spectrometer.
+#
+# Samples are kept in a bounded deque, so the statistics always describe the
+# most recent WINDOW frames (about 30sec at 10Hz) rather than the whole session.
+class LatencyHistogram:
+
+    WINDOW = 300
+
+    ## upper edges of each histogram bin (ms); the last bin catches everything slower
+    BIN_EDGES_MS = [ 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250 ]
+
+    def __init__(self, window=None):
+        self.samples = deque(maxlen=window if window else self.WINDOW)
+        self.total_count = 0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.total_count += 1
+
+    def __len__(self):
+        return len(self.samples)
+
+    def latest(self):
+        return self.samples[-1] if self.samples else None
+
+    def mean(self):
+        return float(np.mean(self.samples)) if self.samples else 0
+
+    def max(self):
+        return float(np.max(self.samples)) if self.samples else 0
+
+    def percentile(self, p):
+        return float(np.percentile(self.samples, p)) if self.samples else 0
+
+    def histogram(self):
+        """ @returns list of counts, one per BIN_EDGES_MS plus a final overflow bin """
+        counts = [0] * (len(self.BIN_EDGES_MS) + 1)
+        if self.samples:
+            indices = np.searchsorted(self.BIN_EDGES_MS, np.asarray(self.samples), side="left")
+            for i, n in zip(*np.unique(indices, return_counts=True)):
+                counts[i] = int(n)
+        return counts
+
+##
+# Always-on, lightweight profiler recording how long each stage of
+# Controller.process_reading takes, per spectrometer.
+#
+# The numeric post-processing stages are received from ProcessingPipeline's
+# timing observer; the remaining stages (plugin round trip, KnowItAll, graph
+# update) are measured in Controller.process_reading using measure().
+#
+# Rolling statistics are shown on the Hardware Setup page (via
+# ResourceMonitorFeature), and can be saved as a CSV alongside the ENLIGHTEN
+# logfile for offline review.
+class ProcessingProfiler:
+
+    ## stages beyond ProcessingPipeline.STAGES which Controller reports
+    EXTRA_STAGES = [ "plugin", "kia", "graph" ]
+
+    def __init__(self, ctl):
+        self.ctl = ctl
+        cfu = ctl.form.ui
+
+        self.bt_save = cfu.pushButton_save_processing_timing
+        self.bt_save.clicked.connect(self.save_callback)
+        self.bt_save.setToolTip("Save per-stage processing latency statistics to CSV (next to the logfile)")
+
+        self.histograms = {} # device_id -> { stage: LatencyHistogram }
+        self.stages = list(self.ctl.processing_pipeline.STAGES) + self.EXTRA_STAGES
+
+        self.ctl.processing_pipeline.register_observer(self.pipeline_callback)
+
+    def pipeline_callback(self, device_id, timing):
+        if device_id is None:
+            return
+        for stage, ms in timing.items():
+            self.record(device_id, stage, ms)
+
+    def record(self, device_id, stage, ms):
+        if device_id not in self.histograms:
+            self.histograms[device_id] = {}
+        hists = self.histograms[device_id]
+        if stage not in hists:
+            hists[stage] = LatencyHistogram()
+        hists[stage].add(ms)
+
+    ##
+    # Usage:
+    #
+    #   with self.processing_profiler.measure(spec, "kia"):
+    #       self.kia_feature.process(pr, settings)
+    @contextmanager
+    def measure(self, spec, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if spec is not None:
+                self.record(spec.device_id, stage, (time.perf_counter() - start) * 1000.0)
+
+    def remove_spec(self, spec):
+        if spec is not None:
+            self.histograms.pop(spec.device_id, None)
+
+    def get_histograms(self, spec=None):
+        if spec is None:
+            spec = self.ctl.multispec.current_spectrometer()
+        if spec is None:
+            return {}
+        return self.histograms.get(spec.device_id, {})
+
+    ##
+    # @returns (stage, mean_ms, p95_ms) tuples for the given spectrometer, in
+    #          pipeline order, followed by a synthetic "total"
+    def summarize(self, spec=None):
+        hists = self.get_histograms(spec)
+        rows = []
+        total = 0
+        for stage in self.stages:
+            if stage in hists and len(hists[stage]) > 0:
+                h = hists[stage]
+                rows.append((stage, h.mean(), h.percentile(95)))
+                total += h.mean()
+        if rows:
+            rows.append(("total", total, None))
+        return rows
+
+    def get_summary_text(self, spec=None):
+        lines = []
+        for stage, mean, p95 in self.summarize(spec):
+            if p95 is None:
+                lines.append(f"{stage}: {mean:.2f}ms")
+            else:
+                lines.append(f"{stage}: {mean:.2f}ms (p95 {p95:.2f})")
+        return "\n".join(lines) if lines else "no data"
+
+    def get_pathname(self):
+        log_dir = os.path.dirname(applog.get_location())
+        now = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        return os.path.join(log_dir, f"enlighten-timing-{now}.csv")
+
+    def save_callback(self):
+        pathname = self.save()
+        if pathname:
+            self.ctl.marquee.info(f"saved {os.path.basename(pathname)}")
+
+    def save(self, pathname=None):
+        """ @returns pathname if successful """
+        if pathname is None:
+            pathname = self.get_pathname()
+
+        bins = [ f"<={edge}ms" for edge in LatencyHistogram.BIN_EDGES_MS ] + [ f">{LatencyHistogram.BIN_EDGES_MS[-1]}ms" ]
+        header = [ "Device", "Stage", "Count", "Latest", "Mean", "P50", "P95", "Max" ] + bins
+
+        try:
+            with open(pathname, "w") as outfile:
+                outfile.write(",".join(header) + "\n")
+                for device_id, hists in self.histograms.items():
+                    for stage in self.stages:
+                        h = hists.get(stage, None)
+                        if h is None or len(h) == 0:
+                            continue
+                        values = [ str(device_id).replace(",", ";"), stage, str(h.total_count) ]
+                        values.extend([ "%.3f" % v for v in [ h.latest(), h.mean(), h.percentile(50), h.percentile(95), h.max() ] ])
+                        values.extend([ str(n) for n in h.histogram() ])
+                        outfile.write(",".join(values) + "\n")
+            log.info(f"saved processing timing to {pathname}")
+            return pathname
+        except:
+            log.error(f"failed to save processing timing to {pathname}", exc_info=1)
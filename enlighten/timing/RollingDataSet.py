@@ -1,8 +1,8 @@
+import time
 import logging
 import numpy as np
 from datetime import timedelta
 from datetime import datetime as dt
-from collections import deque
 
 log = logging.getLogger(__name__)
 
@@ -10,17 +10,36 @@ log = logging.getLogger(__name__)
 # Encapsulates a "moving window" dataset such as used for detector temperature,
 # laser temperature etc.
 #
+# Samples are kept in preallocated NumPy arrays of monotonic (time.monotonic)
+# timestamps and float values.  New samples are appended after the newest, and
+# samples older than the window are trimmed by advancing the head index (found
+# with a binary search, as timestamps are sorted), so the live window is always
+# one contiguous slice and window queries are vectorized.  When the tail reaches
+# the end of the buffer the live samples are moved back to the front, or the
+# buffer doubled if it is more than half full, so appending and trimming are
+# O(1) amortized.
+#
+# Wall-clock datetimes (for latest(), .data and CSV export) are reconstructed
+# from the monotonic timestamps.
+#
 # @todo We may need to track these by timestamp, so that things like StatusIndicators
 #       can base an LED's color on "all_within(-55C, 1C, window=10sec)" (more-or-less).
-#       We need to be able to discriminate between the graph window size and the 
+#       We need to be able to discriminate between the graph window size and the
 #       analytical / status window size.
 class RollingDataSet:
+
+    INITIAL_CAPACITY = 256
+
     def __init__(self, size_seconds):
-        self.data = deque()
         self.window_limit = timedelta(minutes=0, seconds=size_seconds, milliseconds=0)
+        self.capacity = self.INITIAL_CAPACITY
+        self.clear()
+
+        # offset from time.monotonic() to epoch seconds, for reporting datetimes
+        self.wall_offset = time.time() - time.monotonic()
 
     def __str__(self):
-        return "RollingDataSet(size %d, latest %s)" % (self.size, self.latest())
+        return "RollingDataSet(size %d, latest %s)" % (len(self), self.latest())
 
     def add(self, value):
         if value and type(value) is list:
@@ -28,66 +47,110 @@ class RollingDataSet:
         else:
             values = [ value ]
 
-        for value in values:
-            self.data.append((dt.now(),value))
+        now = time.monotonic()
+        self.reserve(len(values))
+        for v in values:
+            self.timestamps[self.tail] = now
+            self.values[self.tail] = np.nan if v is None else v
+            self.tail += 1
 
-        self.filter_limit()
+        self.filter_limit(now)
 
-    def filter_limit(self):
-        if len(self.data) == 0:
+    def reserve(self, n):
+        """ ensure there's room to append n samples after the tail """
+        if self.tail + n <= self.capacity:
             return
-        while (dt.now()-self.data[0][0]) > self.window_limit:
-            self.data.popleft()
+
+        count = len(self)
+        if count + n > self.capacity // 2:
+            while count + n > self.capacity // 2:
+                self.capacity *= 2
+            timestamps = np.empty(self.capacity, dtype=np.float64)
+            values = np.empty(self.capacity, dtype=np.float64)
+        else:
+            timestamps = self.timestamps
+            values = self.values
+
+        timestamps[:count] = self.timestamps[self.head:self.tail]
+        values[:count] = self.values[self.head:self.tail]
+        self.timestamps = timestamps
+        self.values = values
+        self.head = 0
+        self.tail = count
+
+    def filter_limit(self, now=None):
+        if len(self) == 0:
+            return
+        if now is None:
+            now = time.monotonic()
+        cutoff = now - self.window_limit.total_seconds()
+        if self.timestamps[self.head] >= cutoff:
+            return # the usual case: nothing has expired
+        self.head += int(np.searchsorted(self.timestamps[self.head:self.tail], cutoff, side="left"))
 
     def __len__(self):
-        return len(self.data)
+        return self.tail - self.head
 
     def full(self):
-        return len(self.data) == self.size
+        return len(self) == self.capacity
 
     def empty(self):
-        return len(self.data) == 0
+        return len(self) == 0
 
     def average(self):
         return float(np.average(self.get_values()))
 
+    def get_timestamps(self):
+        """ @returns monotonic timestamps (seconds) of the samples in the window """
+        return self.timestamps[self.head:self.tail]
+
     def get_values(self):
-        return [y for x,y in self.data]
+        return self.values[self.head:self.tail].copy()
+
+    def get_ages(self, now=None):
+        """ @returns elapsed seconds since each sample """
+        if now is None:
+            now = time.monotonic()
+        return now - self.timestamps[self.head:self.tail]
 
     def get_relative_to_now(self):
         """ Return graphable x, y arrays by elapsed sec """
-        now = dt.now()
-        x = []
-        y = []
-        for k, v in self.data:
-            x.append((now-k).total_seconds())
-            y.append(v)
-        return x, y
+        return self.get_ages(), self.get_values()
+
+    @property
+    def data(self):
+        """ the window as a list of (datetime, value), as previously stored """
+        return list(zip(self.get_datetimes(), self.values[self.head:self.tail].tolist()))
+
+    def get_datetimes(self):
+        return [ dt.fromtimestamp(t + self.wall_offset) for t in self.timestamps[self.head:self.tail] ]
+
+    def within_window(self, window_sec):
+        """ @returns a mask of samples no older than window_sec (all if None) """
+        if window_sec is None:
+            return np.ones(len(self), dtype=bool)
+        return self.get_ages() <= window_sec
 
     def all_within(self, value, delta, window_sec=None) -> bool:
-        now = dt.now()
-        for k, v in self.data:
-            if abs(value - v) > delta:
-                if window_sec is not None:
-                    if (now - k).total_seconds() > window_sec:
-                        continue
-                log.debug("all_within: at least one of %d elements not within delta %.2f of value %.2f", len(self.data), delta, value)
-                return False
+        outside = np.abs(value - self.values[self.head:self.tail]) > delta
+        outside &= self.within_window(window_sec)
+        if np.any(outside):
+            log.debug("all_within: at least one of %d elements not within delta %.2f of value %.2f", len(self), delta, value)
+            return False
         return True
 
     def one_within(self, value, delta, window_sec=None):
-        now = dt.now()
-        for k, v in self.data:
-            if abs(value - v) <= delta:
-                if window_sec is not None:
-                    if (now - k).total_seconds() > window_sec:
-                        continue
-                log.debug("one_within: at least one of %d elements within delta %.2f of value %.2f", len(self.data), delta, value)
-                return True
+        inside = np.abs(value - self.values[self.head:self.tail]) <= delta
+        inside &= self.within_window(window_sec)
+        if np.any(inside):
+            log.debug("one_within: at least one of %d elements within delta %.2f of value %.2f", len(self), delta, value)
+            return True
+        return False
 
     def latest(self):
-        if len(self.data) > 0:
-            return self.data[-1]
+        if len(self) > 0:
+            t = self.timestamps[self.tail - 1]
+            return (dt.fromtimestamp(t + self.wall_offset), float(self.values[self.tail - 1]))
         else:
             return None
 
@@ -97,7 +160,10 @@ class RollingDataSet:
         return csv_str
 
     def clear(self):
-        self.data = deque()
+        self.timestamps = np.empty(self.capacity, dtype=np.float64)
+        self.values = np.empty(self.capacity, dtype=np.float64)
+        self.head = 0
+        self.tail = 0
 
     def update_window(self, size_seconds):
         self.window_limit = timedelta(minutes=0,seconds=size_seconds,milliseconds=000)
@@ -12,6 +12,10 @@ class ResourceMonitorFeature:
     only presented on Linux. Fear not, the leak was isolated and resolved (it was
     in wasatch.applog). However, we're keeping the class as it could be handy
     down the road.
+
+    It also displays the rolling per-stage processing latency collected by
+    ProcessingProfiler, so users can see which post-processing options are
+    costing them frame rate.
     """
 
     UPDATE_RATE_SEC = 5
@@ -22,6 +26,7 @@ class ResourceMonitorFeature:
 
         self.lb_growth       = cfu.label_process_growth_mb
         self.lb_size         = cfu.label_process_size_mb
+        self.lb_latency      = cfu.label_processing_latency
 
         self.process_id = os.getpid()
 
@@ -42,8 +47,15 @@ class ResourceMonitorFeature:
             self.exit_code = 1
             return False
 
+        self.update_latency()
+
         return True
 
+    def update_latency(self):
+        if self.ctl.processing_profiler is None:
+            return
+        self.lb_latency.setText(self.ctl.processing_profiler.get_summary_text())
+
     def check_runtime(self, now):
         """ @returns True if copacetic """
         if self.ctl.run_sec > 0 and self.ctl.run_sec >= (datetime.datetime.now() - self.start_time).total_seconds():
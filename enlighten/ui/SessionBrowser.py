@@ -0,0 +1,157 @@
+import logging
+
+from enlighten import common
+
+if common.use_pyside2():
+    from PySide2 import QtCore
+    from PySide2.QtWidgets import QDialog, QHBoxLayout, QVBoxLayout, QLabel, QLineEdit, QPushButton, QTableView, QAbstractItemView, QHeaderView
+else:
+    from PySide6 import QtCore
+    from PySide6.QtWidgets import QDialog, QHBoxLayout, QVBoxLayout, QLabel, QLineEdit, QPushButton, QTableView, QAbstractItemView, QHeaderView
+
+log = logging.getLogger(__name__)
+
+##
+# Presents a list of SessionStore rows to a QTableView.
+#
+# The view only asks for the rows it is showing, so paging through tens of
+# thousands of spectra reads just those rows' metadata.
+class SessionTableModel(QtCore.QAbstractTableModel):
+
+    HEADERS = [ "Timestamp", "Label", "Serial Number", "Technique" ]
+
+    def __init__(self, store):
+        super().__init__()
+        self.store = store
+        self.indices = []   # SessionStore row indices, in display order
+
+    def set_indices(self, indices):
+        self.beginResetModel()
+        self.indices = indices
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.indices)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole or not index.isValid():
+            return
+        row = self.store.get_row(self.indices[index.row()])
+        column = index.column()
+        if column == 0:
+            return (row["timestamp"] or "").replace("T", " ")[:23]
+        elif column == 1:
+            return row["label"]
+        elif column == 2:
+            return row["serial_number"]
+        elif column == 3:
+            return row["technique"]
+
+##
+# The "History" dialog: search every spectrum archived in the SessionStore
+# this session, and put selected ones back on the Clipboard.
+#
+# @verbatim
+#  ____________________________________________
+# | Session History                        [X] |
+# |                                            |
+# | Search: [____________]        1234 spectra |
+# | Timestamp | Label | Serial Number | Tech.. |
+# | ...                                        |
+# |                  [Show on Clipboard] [Close]|
+# |____________________________________________|
+# @endverbatim
+class SessionBrowser:
+
+    def __init__(self, ctl):
+        self.ctl = ctl
+        self.dialog = None
+
+    def create_dialog(self):
+        self.dialog = QDialog(parent=self.ctl.form)
+        self.dialog.setWindowTitle("Session History")
+        self.dialog.setSizeGripEnabled(True)
+        self.dialog.resize(640, 480)
+
+        self.le_search = QLineEdit(parent=self.dialog)
+        self.le_search.setPlaceholderText("label, serial number, technique, note...")
+        self.le_search.setClearButtonEnabled(True)
+        self.lb_count = QLabel(parent=self.dialog)
+
+        hbox_top = QHBoxLayout()
+        hbox_top.addWidget(QLabel("Search:", parent=self.dialog))
+        hbox_top.addWidget(self.le_search)
+        hbox_top.addWidget(self.lb_count)
+
+        self.model = SessionTableModel(self.ctl.session_store)
+        self.table = QTableView(parent=self.dialog)
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+
+        self.bt_show = QPushButton("Show on Clipboard", parent=self.dialog)
+        self.bt_close = QPushButton("Close", parent=self.dialog)
+
+        hbox_bottom = QHBoxLayout()
+        hbox_bottom.addStretch()
+        hbox_bottom.addWidget(self.bt_show)
+        hbox_bottom.addWidget(self.bt_close)
+
+        vbox = QVBoxLayout(self.dialog)
+        vbox.addLayout(hbox_top)
+        vbox.addWidget(self.table)
+        vbox.addLayout(hbox_bottom)
+
+        self.le_search.textChanged.connect(self.refresh)
+        self.table.doubleClicked.connect(self.show_selected)
+        self.bt_show.clicked.connect(self.show_selected)
+        self.bt_close.clicked.connect(self.dialog.close)
+
+    def show(self):
+        if self.dialog is None:
+            self.create_dialog()
+        self.refresh()
+        self.dialog.show()
+        self.dialog.raise_()
+
+    def refresh(self):
+        store = self.ctl.session_store
+        indices = store.search(self.le_search.text())
+        self.model.set_indices(indices)
+        self.lb_count.setText(f"{len(indices)} of {len(store)} spectra")
+
+    ## restore the selected rows to the Clipboard
+    def show_selected(self):
+        rows = sorted(set(index.row() for index in self.table.selectionModel().selectedRows()))
+        if not rows:
+            return
+
+        measurements = self.ctl.measurements
+        restored = []
+        for row in rows:
+            index = self.model.indices[row]
+            if measurements.get(self.ctl.session_store.get_row(index)["measurement_id"]) is not None:
+                log.debug(f"session row {index} is already on the Clipboard")
+                continue
+            try:
+                restored.append(self.ctl.session_store.restore(index))
+            except:
+                log.error(f"unable to restore session row {index}", exc_info=1)
+
+        if not restored:
+            self.ctl.marquee.info("already on the Clipboard")
+            return
+
+        restored = self.ctl.measurement_factory.finish_from_file(restored, is_collapsed=measurements.is_collapsed)
+        for m in restored:
+            measurements.add(m)
+        self.ctl.marquee.info(f"restored {len(restored)} spectra to the Clipboard")
@@ -0,0 +1,183 @@
+import logging
+import numpy as np
+
+from collections import OrderedDict
+
+import pyqtgraph
+import pyqtgraph.exporters
+
+from enlighten import common
+from enlighten.scope.CurveDecimator import CurveDecimator
+
+if common.use_pyside2():
+    from PySide2 import QtCore, QtGui
+else:
+    from PySide6 import QtCore, QtGui
+
+log = logging.getLogger(__name__)
+
+##
+# Renders the little spectrum images shown in each ThumbnailWidget.
+#
+# These used to be rendered by MeasurementFactory as each Measurement was
+# created (including every spectrum saved during a BatchCollection), by
+# instantiating a new pyqtgraph ImageExporter around the hidden
+# Controller.thumbnail_render_graph and exporting it to a QImage.
+#
+# Now:
+#
+# - thumbnails are drawn directly with a QPainter from the spectrum, after
+#   min/max decimation (CurveDecimator) to the width of the image
+# - nothing is drawn until a ThumbnailWidget is actually painted, i.e. scrolled
+#   into view (and expanded) in the Clipboard; requests are batched through a
+#   zero-length timer
+# - rendered pixmaps are cached by measurement_id (which changes if the
+#   Measurement is reprocessed), up to cache_size
+#
+# The previous pyqtgraph rendering is still available (with a single exporter
+# shared by all thumbnails):
+#
+# @verbatim
+# [thumbnails]
+# painter = True
+# cache_size = 500
+# @endverbatim
+class ThumbnailRenderer:
+
+    SECTION = "thumbnails"
+
+    WIDTH = 180
+    HEIGHT = 120
+    MARGIN = 4
+
+    def __init__(self, ctl):
+        self.ctl = ctl
+
+        self.painter    = self.ctl.config.get_bool(self.SECTION, "painter",    default=True)
+        self.cache_size = self.ctl.config.get_int (self.SECTION, "cache_size", default=500)
+
+        self.cache = OrderedDict()  # measurement_id -> QPixmap
+        self.pending = {}           # id(ThumbnailWidget) -> ThumbnailWidget
+        self.exporter = None
+        self.rendered = 0
+
+        self.timer = QtCore.QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.render_pending)
+
+    ##
+    # Called by ThumbnailWidget when it is painted without a thumbnail.
+    def request(self, widget):
+        pixmap = self.cache.get(widget.measurement.measurement_id, None)
+        if pixmap is not None:
+            widget.set_pixmap(pixmap)
+            return
+
+        self.pending[id(widget)] = widget
+        if not self.timer.isActive():
+            self.timer.start(0)
+
+    def render_pending(self):
+        pending = self.pending
+        self.pending = {}
+        for widget in pending.values():
+            try:
+                pixmap = self.get_pixmap(widget.measurement)
+                if pixmap is not None:
+                    widget.set_pixmap(pixmap)
+            except:
+                log.error("error rendering thumbnail", exc_info=1)
+
+    ## @returns the (possibly cached) thumbnail QPixmap of a Measurement
+    def get_pixmap(self, measurement):
+        key = measurement.measurement_id
+        pixmap = self.cache.get(key, None)
+        if pixmap is not None:
+            self.cache.move_to_end(key)
+            return pixmap
+
+        spectrum = measurement.processed_reading.get_processed()
+        if spectrum is None:
+            log.error("get_pixmap: can't render thumbnail w/o spectrum")
+            return
+
+        if self.painter:
+            pixmap = self.render(spectrum)
+        else:
+            pixmap = self.render_with_exporter(spectrum)
+        self.rendered += 1
+
+        self.cache[key] = pixmap
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return pixmap
+
+    ## Draw the spectrum with a QPainter, scaled to fill the image (as pyqtgraph would autorange it).
+    def render(self, spectrum):
+        pixmap = QtGui.QPixmap(self.WIDTH, self.HEIGHT)
+        pixmap.fill(self.get_background())
+
+        y = np.asarray(spectrum, dtype=np.float64)
+        x = np.arange(len(y), dtype=np.float64)
+        finite = np.isfinite(y)
+        if not finite.all():
+            x, y = x[finite], y[finite]
+        if len(y) < 2:
+            return pixmap
+
+        x, y = CurveDecimator.decimate(x, y, self.WIDTH - 2 * self.MARGIN)
+
+        lo, hi = y.min(), y.max()
+        if hi <= lo:
+            lo, hi = lo - 1, hi + 1
+
+        px = self.MARGIN + (x - x[0]) * ((self.WIDTH - 2 * self.MARGIN) / (x[-1] - x[0]))
+        py = (self.HEIGHT - self.MARGIN) - (y - lo) * ((self.HEIGHT - 2 * self.MARGIN) / (hi - lo))
+
+        path = pyqtgraph.arrayToQPath(px, py)
+
+        painter = QtGui.QPainter(pixmap)
+        try:
+            painter.setRenderHint(QtGui.QPainter.Antialiasing)
+            painter.setPen(self.ctl.gui.make_pen(widget="thumbnail"))
+            painter.drawPath(path)
+        finally:
+            painter.end()
+        return pixmap
+
+    ## Render the spectrum through Controller.thumbnail_render_graph, as before.
+    def render_with_exporter(self, spectrum):
+        self.ctl.thumbnail_render_curve.setData(spectrum)
+
+        if self.exporter is None:
+            self.exporter = pyqtgraph.exporters.ImageExporter(self.ctl.thumbnail_render_graph.plotItem)
+
+            # don't let width and height track each other's aspect ratio
+            self.exporter.params.param('width' ).sigValueChanged.disconnect()
+            self.exporter.params.param('height').sigValueChanged.disconnect()
+
+            self.exporter.params['width' ] = self.WIDTH
+            self.exporter.params['height'] = self.HEIGHT
+
+        # follow theme changes
+        self.exporter.params['background'] = self.get_background()
+
+        image = self.exporter.export(toBytes=True)
+        return QtGui.QPixmap.fromImage(image)
+
+    def get_background(self):
+        graph = getattr(self.ctl, "thumbnail_render_graph", None)
+        if graph is not None:
+            return graph.backgroundBrush().color()
+        return pyqtgraph.mkColor(pyqtgraph.getConfigOption("background"))
+
+    ## called when a Measurement is deleted
+    def forget(self, measurement):
+        self.cache.pop(measurement.measurement_id, None)
+        if measurement.thumbnail_widget is not None:
+            self.pending.pop(id(measurement.thumbnail_widget), None)
+
+    def stop(self):
+        """ called by Controller.close """
+        self.timer.stop()
+        self.pending = {}
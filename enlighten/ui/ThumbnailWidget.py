@@ -23,9 +23,8 @@ log = logging.getLogger(__name__)
 # itself to the graph as a visible trace, and also so it can determine the
 # current x-axis unit.
 #
-# These objects are created by MeasurementFactory.
-#
-# Bizarrely, creation of the all-important thumbnail is still in MeasurementFactory?
+# These objects are created by MeasurementFactory.  The thumbnail itself is
+# rendered by ThumbnailRenderer, the first time the widget is painted.
 class ThumbnailWidget(QtWidgets.QFrame):
 
     BUTTON_PADDING = 5
@@ -60,6 +59,8 @@ class ThumbnailWidget(QtWidgets.QFrame):
         self.curve = None
         self.old_name = None
         self.last_editted = None
+        self.pixmap_pending = True
+        self.saving_buttons = []
 
         ########################################################################
         # Widget styling
@@ -185,10 +186,17 @@ class ThumbnailWidget(QtWidgets.QFrame):
         return self.measurement.technique and "raman" == self.measurement.technique.lower()
 
     ##
-    # Called by MeasurementFactory to set the rendered thumbnail image
+    # Called by ThumbnailRenderer to set the rendered thumbnail image
     def set_pixmap(self, pixmap):
+        self.pixmap_pending = False
         self.body.setPixmap(pixmap)
 
+    ## Qt only paints widgets which are visible, so defer rendering until then
+    def paintEvent(self, event):
+        if self.pixmap_pending and not self.is_collapsed:
+            self.ctl.thumbnail_renderer.request(self)
+        super().paintEvent(event)
+
     def create_label_widget(self):
         font = QtGui.QFont()
         font.setPointSize(8)
@@ -462,6 +470,22 @@ class ThumbnailWidget(QtWidgets.QFrame):
     def disable_edit(self):
         self.button_edit.setEnabled(False)
 
+    ##
+    # Called by SaveQueue while the Measurement is being written in the
+    # background, as there are not yet any files to rename or delete.
+    def set_saving(self, flag, error=None):
+        if flag:
+            self.saving_buttons = [ b for b in [ self.button_edit, self.button_trash ] if b.isEnabled() ]
+            for button in self.saving_buttons:
+                button.setEnabled(False)
+        else:
+            for button in self.saving_buttons:
+                button.setEnabled(True)
+            self.saving_buttons = []
+
+            if error is not None:
+                self.setToolTip(f"Failed to save: {error}")
+
     ## Called by Measurement.save_csv_file_by_row to prevent attempts to delete
     # spectra appended as lines to an existing file. (All they can do is click
     # the eraser icon to remove the whole list, or click the trash icon on the
@@ -0,0 +1,74 @@
+import time
+import logging
+import datetime
+
+from EnlightenPlugin import EnlightenPluginBase,    \
+                            EnlightenPluginField,    \
+                            EnlightenPluginResponse,  \
+                            EnlightenPluginConfiguration
+
+log = logging.getLogger(__name__)
+
+##
+# Benchmark plug-in for comparing threaded and process-isolated plug-in
+# execution (see PluginWorker and PluginProcessWorker).
+#
+# Reports how long each request took to reach the plug-in after ENLIGHTEN
+# created it, and optionally burns a configurable amount of pure-Python CPU
+# time per request (holding the GIL, like a heavy analysis plug-in would).
+# Connect it with and without [plugins] process_isolation = True and compare
+# the latency, and how responsive the GUI stays, at a given "Work (ms)".
+#
+# scripts/benchmark-plugin-workers.py drives this plug-in headlessly to
+# measure full round-trip latency and GIL contention for both workers.
+class Latency(EnlightenPluginBase):
+
+    def __init__(self, ctl):
+        super().__init__(ctl)
+        self.reset()
+
+    def get_configuration(self):
+        fields = [
+            EnlightenPluginField(name="Work (ms)",    datatype="float", direction="input",  initial=0, minimum=0, maximum=1000, step=5, tooltip="CPU time to burn per request"),
+            EnlightenPluginField(name="Isolated",     datatype="bool",  direction="output", tooltip="Whether running in a separate process"),
+            EnlightenPluginField(name="Latency (ms)", datatype="float", direction="output", tooltip="Delay from request creation to processing"),
+            EnlightenPluginField(name="Mean (ms)",    datatype="float", direction="output", tooltip="Average latency since connecting"),
+            EnlightenPluginField(name="Max (ms)",     datatype="float", direction="output", tooltip="Worst latency since connecting")
+        ]
+        return EnlightenPluginConfiguration(
+            name             = "Latency",
+            fields           = fields,
+            is_blocking      = False,
+            process_isolated = False) # set True, or use [plugins] process_isolation, to compare
+
+    def connect(self):
+        self.reset()
+        return super().connect()
+
+    def reset(self):
+        self.count = 0
+        self.total_ms = 0
+        self.max_ms = 0
+
+    def process_request(self, request):
+        latency_ms = (datetime.datetime.now() - request.creation_time).total_seconds() * 1000.0
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+        self.burn(request.fields.get("Work (ms)", 0))
+
+        return EnlightenPluginResponse(request, outputs = {
+            "Isolated":     self.running_isolated,
+            "Latency (ms)": latency_ms,
+            "Mean (ms)":    self.total_ms / self.count,
+            "Max (ms)":     self.max_ms })
+
+    @staticmethod
+    def burn(ms):
+        """ deliberately pure-Python, so the GIL is held throughout """
+        end = time.perf_counter() + ms / 1000.0
+        n = 0
+        while time.perf_counter() < end:
+            n += 1
+        return n
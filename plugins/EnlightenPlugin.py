@@ -32,6 +32,8 @@ log = logging.getLogger(__name__)
 # - error_message can be set by the plug-in if they wish a user-visible error 
 #   string or stacktrace to be displayed to the user in a message box (e.g.
 #   following a failure in connect)
+# - running_isolated is True when the plug-in was loaded by PluginProcessWorker
+#   into its own process
 class EnlightenPluginBase:
     
     def __init__(self, ctl):
@@ -48,6 +50,7 @@ class EnlightenPluginBase:
         self.table = None
         self.x_axis_label = None
         self.y_axis_label = None
+        self.process_isolated = False
 
         self.series = {}
         self.events = {}
@@ -55,6 +58,10 @@ class EnlightenPluginBase:
         # plugins can do everything
         self.ctl = ctl
 
+        # set True by PluginProcessWorker when running in a separate process
+        # (ctl is None there, but can also be None outside ENLIGHTEN)
+        self.running_isolated = False
+
         # allow plugins to override their logfile name/location
         self.logfile = os.path.join(common.get_default_data_dir(), 'plugin.log')
         if os.path.exists(self.logfile):
@@ -226,7 +233,8 @@ class EnlightenPluginBase:
             series_names = [], # functional plugins define this on a frame-by-frame basis
             x_axis_label = self.x_axis_label,
             y_axis_label = self.y_axis_label,
-            events = self.events
+            events = self.events,
+            process_isolated = self.process_isolated
         )
     
     def process_request_obj(self, request):
@@ -418,6 +426,11 @@ class EnlightenPluginConfiguration:
     # @param multi_devices: True if the plug-in is designed to handle spectra 
     #        from multiple spectrometers (tracks requests by serial_number etc)
     # @param events: a hash of supported event names to callbacks
+    # @param process_isolated: run the plug-in in a separate process (see 
+    #        PluginProcessWorker), so heavy computation doesn't slow the GUI.
+    #        The plug-in then has no access to ENLIGHTEN (ctl is None, 
+    #        request.spec is None) and event callbacks run in ENLIGHTEN's own
+    #        copy of the plug-in, so this suits "pure" number-crunchers.
     def __init__(self, 
             name, 
             fields          = None, 
@@ -432,6 +445,7 @@ class EnlightenPluginConfiguration:
             events          = None,
             series_names    = None,
             multi_devices   = False,
+            process_isolated= False,
             graph_type      = "line"):  # "line" or "xy"
 
         self.name            = name
@@ -448,6 +462,7 @@ class EnlightenPluginConfiguration:
         self.multi_devices   = multi_devices
         self.series_names    = series_names
         self.graph_type      = graph_type
+        self.process_isolated= process_isolated
 
 ##
 # Each ENLIGHTEN plug-in will be visualized in the ENLIGHTEN GUI via a dynamically
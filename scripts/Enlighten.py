@@ -100,6 +100,7 @@ class EnlightenApplication:
         parser.add_argument("--plugin",            type=str,                      help="plugin name to start enabled")
         parser.add_argument("--password",          type=str,                      help="authentication password", default=os.environ.get("ENLIGHTEN_PASSWORD"))
         parser.add_argument("--start-batch",       action="store_true",           help="start a Batch Collection as soon as a spectrometer connects")
+        parser.add_argument("--stream-spectra",    action="store_true",           help="record every spectrum at full rate on a background thread")
 
         return parser
 
@@ -149,7 +150,8 @@ class EnlightenApplication:
             window_state      = self.args.window_state,
             start_batch       = self.args.start_batch,
             password          = self.args.password,
-            plugin            = self.args.plugin)
+            plugin            = self.args.plugin,
+            stream_spectra    = self.args.stream_spectra)
 
         # This requires explanation.  This is obviously a Qt "connect" binding,
         # but Controller is not a Qt widget, and does not inherit from/extend
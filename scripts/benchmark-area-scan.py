@@ -0,0 +1,129 @@
+import os
+import time
+import argparse
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from enlighten import common
+from enlighten.measurement.AreaScanRenderer import AreaScanRenderer
+
+if common.use_pyside2():
+    from PySide2 import QtGui, QtWidgets
+else:
+    from PySide6 import QtGui, QtWidgets
+
+try:
+    import qimage2ndarray
+except ImportError:
+    qimage2ndarray = None
+
+"""
+Measures the cost of drawing AreaScanFeature's image from synthetic
+area_scan_data, comparing the previous AreaScanFeature.finish_update (a new
+normalized QImage, scaled QPixmap and scene on every update) with
+AreaScanRenderer.
+
+- fast: a whole frame arrives at once (every row dirty)
+- slow: one row arrives per reading; the previous code redrew the whole
+  image for each, while AreaScanRenderer (at max_fps = 0, i.e. unthrottled)
+  rescales only that row unless the range changed
+
+If qimage2ndarray isn't installed, an equivalent NumPy normalization is used
+for the previous behavior.
+
+Example (see benchmark_util for the environment):
+
+    $ python scripts/benchmark-area-scan.py --shapes 64x1024 64x2048 1080x1920
+"""
+
+WIDTH = 800 # on-screen width to scale to
+
+def array2qimage(data):
+    if qimage2ndarray is not None:
+        return qimage2ndarray.array2qimage(data, normalize=True)
+    lo, hi = data.min(), data.max()
+    scaled = data - lo
+    if hi != lo:
+        scaled = scaled * (255.0 / (hi - lo))
+    gray = np.clip(scaled, 0, 255).astype(np.uint8)
+    rows, cols = gray.shape
+    argb = np.empty((rows, cols), dtype=np.uint32)
+    argb[:] = 0xff000000 | (gray.astype(np.uint32) * 0x010101)
+    return QtGui.QImage(argb.data, cols, rows, cols * 4, QtGui.QImage.Format_RGB32).copy()
+
+def legacy_update(scene, data):
+    image = array2qimage(data)
+    pixmap = QtGui.QPixmap(image).scaledToWidth(WIDTH)
+    scene.clear()
+    scene.addPixmap(pixmap)
+    np.sum(data, axis=0)
+
+def make_frames(rows, cols, count, rng):
+    base = rng.uniform(800, 1200, cols).astype(np.float32)
+    return [ (base + rng.normal(0, 30, (rows, cols))).astype(np.float32) for _ in range(count) ]
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark area scan rendering")
+    parser.add_argument("--shapes", nargs="+", default=["64x1024", "64x2048", "1080x1920"], help="ROWSxCOLS")
+    parser.add_argument("--frames", type=int, default=20)
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    rng = np.random.default_rng(0)
+
+    print("%10s %5s %12s %12s %10s %10s" % ("shape", "mode", "legacy_ms", "renderer_ms", "speedup", "max_fps"))
+    for shape in args.shapes:
+        rows, cols = [ int(n) for n in shape.split("x") ]
+        frames = make_frames(rows, cols, args.frames, rng)
+
+        legacy_scene = QtWidgets.QGraphicsScene()
+        renderer = AreaScanRenderer(QtWidgets.QGraphicsScene(), max_fps=0, callback=lambda: np.sum(data, axis=0))
+
+        # fast mode: one update per frame
+        data = np.zeros((rows, cols), dtype=np.float32)
+        start = time.perf_counter()
+        for frame in frames:
+            data[:] = frame
+            legacy_update(legacy_scene, data)
+        legacy_sec = (time.perf_counter() - start) / len(frames)
+
+        data = np.zeros((rows, cols), dtype=np.float32)
+        renderer.set_data(data)
+        start = time.perf_counter()
+        for frame in frames:
+            data[:] = frame
+            renderer.mark_dirty()
+            renderer.request(WIDTH)
+        renderer_sec = (time.perf_counter() - start) / len(frames)
+        app.processEvents()
+
+        print("%10s %5s %12.3f %12.3f %9.1fx %10.0f" % (shape, "fast", legacy_sec * 1000, renderer_sec * 1000,
+            legacy_sec / renderer_sec, 1 / renderer_sec))
+
+        # slow mode: one update per row (of the last frame)
+        count = min(rows, 64)
+        frame = frames[-1] + 1
+
+        start = time.perf_counter()
+        for i in range(count):
+            data[i] = frame[i]
+            legacy_update(legacy_scene, data)
+        legacy_sec = (time.perf_counter() - start) / count
+
+        data[:] = frames[-1]
+        renderer.set_data(data)
+        renderer.request(WIDTH)
+        start = time.perf_counter()
+        for i in range(count):
+            data[i] = frame[i]
+            renderer.mark_dirty(i)
+            renderer.request(WIDTH)
+        renderer_sec = (time.perf_counter() - start) / count
+        app.processEvents()
+
+        print("%10s %5s %12.3f %12.3f %9.1fx %10.0f" % (shape, "slow", legacy_sec * 1000, renderer_sec * 1000,
+            legacy_sec / renderer_sec, 1 / renderer_sec))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import numpy as np
+import argparse
+import time
+
+from superman.baseline.common import WhittakerSmoother
+from enlighten.post_processing.WarmStartAirPLS import WarmStartAirPLS, airpls_fit
+
+"""
+Compares cold-started and warm-started AirPLS on a synthetic stream of live
+Raman frames (fixed peaks on a slowly drifting fluorescence background, with
+shot noise), reporting iterations-to-converge, fit time and the RMS difference
+between the warm and cold baselines.
+
+Halfway through the stream the "sample" is swapped, to show the change-detection
+threshold forcing a full refit.
+
+Example (see benchmark_util for the environment):
+
+    $ python scripts/benchmark-baseline-warm-start.py --pixels 1024 --frames 200
+"""
+
+def make_frames(pixels, frames, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 1, pixels)
+
+    def sample(count):
+        peaks = np.zeros(pixels)
+        for center, height, width in zip(rng.uniform(0.05, 0.95, count), rng.uniform(500, 8000, count), rng.uniform(0.002, 0.006, count)):
+            peaks += height * np.exp(-0.5 * ((x - center) / width) ** 2)
+        return peaks
+
+    samples = [ sample(12), sample(8) ]
+    for n in range(frames):
+        peaks = samples[0] if n < frames // 2 else samples[1]
+        drift = 1.0 + 0.02 * np.sin(n / 15.0)
+        background = drift * (3000 + 4000 * np.exp(-((x - 0.3) / 0.5) ** 2) + 800 * x)
+        spectrum = background + peaks
+        yield spectrum + rng.normal(0, np.sqrt(spectrum))
+
+def benchmark(args, smoothness):
+    warm = WarmStartAirPLS(smoothness_param = smoothness,
+                           max_iters        = args.max_iters,
+                           conv_thresh      = args.conv_thresh,
+                           refit_interval   = args.refit_interval,
+                           refit_threshold  = args.refit_threshold)
+
+    cold_iters, warm_iters = [], []
+    cold_sec, warm_sec = 0, 0
+    refits = 0
+    rms_diff = []
+
+    for spectrum in make_frames(args.pixels, args.frames):
+        start = time.perf_counter()
+        smoother = WhittakerSmoother(spectrum, smoothness)
+        cold, _, iteration, _ = airpls_fit(smoother, args.max_iters, args.conv_thresh)
+        cold_sec += time.perf_counter() - start
+        cold_iters.append(iteration)
+
+        start = time.perf_counter()
+        baseline = warm.fit("bench", spectrum)
+        warm_sec += time.perf_counter() - start
+
+        state = warm.get_state("bench")
+        warm_iters.append(state.last_iterations)
+        if not state.last_warm:
+            refits += 1
+
+        # RMS difference relative to the mean cold baseline
+        rms_diff.append(np.sqrt(np.mean((baseline - cold) ** 2)) / np.mean(np.abs(cold)))
+
+    print("%10g %6s %10.2f %10d %12.3f" % (smoothness, "cold", np.mean(cold_iters), np.max(cold_iters), cold_sec * 1000 / args.frames))
+    print("%10g %6s %10.2f %10d %12.3f %8d %7.1fx %9.2f%%" % (smoothness, "warm", np.mean(warm_iters), np.max(warm_iters),
+        warm_sec * 1000 / args.frames, refits, cold_sec / warm_sec, 100 * np.mean(rms_diff)))
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark cold vs warm-started AirPLS")
+    parser.add_argument("--pixels",           type=int,   default=1024)
+    parser.add_argument("--frames",           type=int,   default=200)
+    parser.add_argument("--smoothness",       type=float, default=[20, 200, 2000], nargs="+")
+    parser.add_argument("--max-iters",        type=int,   default=500)
+    parser.add_argument("--conv-thresh",      type=float, default=8e-4)
+    parser.add_argument("--refit-interval",   type=int,   default=50)
+    parser.add_argument("--refit-threshold",  type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{args.frames} frames of {args.pixels} pixels (conv_thresh {args.conv_thresh}, refit every {args.refit_interval} or on {100 * args.refit_threshold:.0f}% change)")
+    print("%10s %6s %10s %10s %12s %8s %8s %10s" % ("smoothness", "mode", "mean_iter", "max_iter", "ms_per_frame", "refits", "speedup", "rms_diff"))
+    for smoothness in args.smoothness:
+        benchmark(args, smoothness)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import numpy as np
+import argparse
+
+from wasatch.utils import apply_boxcar
+from enlighten.post_processing.BoxcarFeature import BoxcarFeature
+from benchmark_util import time_it
+
+"""
+Compares wasatch.utils.apply_boxcar, called separately on processed,
+recordable_dark and recordable_reference (as BoxcarFeature.process used to),
+with the fused cumulative-sum BoxcarFeature.apply_boxcar_many, across a range
+of half-widths and pixel counts.  Also reports the largest difference between
+the two outputs.
+
+Example (see benchmark_util for the environment):
+
+    $ python scripts/benchmark-boxcar.py --pixels 512 1024 2048 4096 --half-widths 1 2 5 10 25 50
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark fused cumsum boxcar vs wasatch.utils.apply_boxcar")
+    parser.add_argument("--pixels",      type=int, nargs="+", default=[512, 1024, 2048, 4096])
+    parser.add_argument("--half-widths", type=int, nargs="+", default=[1, 2, 5, 10, 25, 50])
+    parser.add_argument("--repeat",      type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    print("%6s %6s %12s %12s %10s %12s" % ("pixels", "hw", "wasatch_ms", "fused_ms", "speedup", "max_abs_diff"))
+    for pixels in args.pixels:
+        arrays = { "processed":            rng.uniform(0, 60000, pixels),
+                   "recordable_dark":      rng.uniform(800, 900, pixels),
+                   "recordable_reference": rng.uniform(0, 60000, pixels) }
+
+        for hw in args.half_widths:
+            expected, old = time_it(lambda: { name: apply_boxcar(a, hw) for name, a in arrays.items() }, args.repeat)
+            actual,   new = time_it(lambda: BoxcarFeature.apply_boxcar_many(arrays, hw), args.repeat)
+
+            diff = max(np.max(np.abs(np.asarray(expected[name]) - actual[name])) for name in arrays)
+            print("%6d %6d %12.3f %12.3f %9.1fx %12.2e" % (pixels, hw, old * 1000, new * 1000, old / new, diff))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import time
+import argparse
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pyqtgraph
+
+from enlighten import common
+from enlighten.scope.CurveDecimator import CurveDecimator
+
+if common.use_pyside2():
+    from PySide2 import QtWidgets
+else:
+    from PySide6 import QtWidgets
+
+"""
+Measures frame time of the Scope Capture graph with many curves displayed, with
+and without Graph's "Fast Render" (CurveDecimator) mode.
+
+Each frame updates every curve with new data, as Controller does for live
+spectrometers (and as rescale_curves does for Measurement traces), then renders
+the PlotWidget synchronously (with the offscreen Qt platform by default).  Modes:
+
+- full:     full-resolution setData (the previous behavior)
+- decimate: min/max decimated to the ViewBox width in pixels
+- zoomed:   decimated and clipped to a view zoomed into 10% of the x-axis
+            (full-resolution "zoomed" frames are also reported for comparison)
+
+Example (see benchmark_util for the environment):
+
+    $ python scripts/benchmark-graph-decimation.py --curves 1 10 40 --pixels 1024 8192 --frames 30
+"""
+
+def make_curves(plot, count, pixels, rng):
+    x = np.linspace(400, 3200, pixels)
+    curves = []
+    spectra = []
+    for i in range(count):
+        y = rng.normal(1000 + 100 * i, 20, pixels)
+        y[rng.integers(0, pixels, 5)] += 20000
+        curves.append(plot.plot(x=x, y=y, pen=pyqtgraph.intColor(i, count)))
+        spectra.append(y)
+    return x, curves, spectra
+
+def run(app, plot, curves, x, spectra, frames, decimate, x_range):
+    box = plot.getViewBox()
+    width = box.width() * plot.devicePixelRatioF()
+    points = 0
+
+    start = time.perf_counter()
+    for frame in range(frames):
+        for curve, y in zip(curves, spectra):
+            y = np.roll(y, frame)
+            if decimate:
+                x2, y2 = CurveDecimator.reduce(x, y, width, x_range)
+            else:
+                x2, y2 = x, y
+            curve.setData(x=x2, y=y2)
+            points += len(y2)
+        plot.repaint()
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+
+    return elapsed / frames, points // frames
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark Graph frame time with and without decimation")
+    parser.add_argument("--curves", type=int, nargs="+", default=[1, 10, 40])
+    parser.add_argument("--pixels", type=int, nargs="+", default=[1024, 8192])
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--width",  type=int, default=1200, help="graph width in pixels")
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    rng = np.random.default_rng(0)
+
+    print("%6s %6s %-10s %10s %10s %12s %12s %8s" % ("curves", "pixels", "view", "full_ms", "fast_ms", "full_points", "fast_points", "speedup"))
+    for count in args.curves:
+        for pixels in args.pixels:
+            plot = pyqtgraph.PlotWidget()
+            plot.resize(args.width, 600)
+            plot.show()
+            x, curves, spectra = make_curves(plot, count, pixels, rng)
+            app.processEvents()
+
+            box = plot.getViewBox()
+            for view in [ "all", "zoomed" ]:
+                x_range = None
+                if view == "zoomed":
+                    x_range = (x[len(x) * 45 // 100], x[len(x) * 55 // 100])
+                    box.setXRange(*x_range, padding=0)
+                    app.processEvents()
+                else:
+                    box.enableAutoRange()
+
+                run(app, plot, curves, x, spectra, 2, True, x_range) # warm-up
+                full_ms, full_points = run(app, plot, curves, x, spectra, args.frames, False, None)
+                fast_ms, fast_points = run(app, plot, curves, x, spectra, args.frames, True, x_range)
+
+                print("%6d %6d %-10s %10.2f %10.2f %12d %12d %7.1fx" % (count, pixels, view,
+                    full_ms * 1000, fast_ms * 1000, full_points, fast_points, full_ms / fast_ms))
+            plot.close()
+            plot.deleteLater()
+            app.processEvents()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import time
+import argparse
+
+from enlighten.measurement.MeasurementIndex import MeasurementIndex
+
+"""
+Measures the bookkeeping cost of Measurements (the Clipboard) during a long
+BatchCollection, without any GUI: each capture is added, the oldest is deleted
+once max_thumbnails is reached, and KnowItAll / plugins look Measurements up
+by measurement_id.  Compares the previous plain list (linear get, "in" and
+remove, pop from the head) with MeasurementIndex.
+
+Per capture, the simulation performs:
+
+- add (deleting the oldest if at max_thumbnails)
+- --lookups get(measurement_id) of random Measurements still on the Clipboard
+  (e.g. KIA id_callback, Graph.export)
+- every 100 captures, the user trashes one Measurement from the middle
+
+Example (see benchmark_util for the environment):
+
+    $ python scripts/benchmark-measurements.py --captures 10000 --max-thumbnails 500 5000
+"""
+
+class EEPROM:
+    def __init__(self, serial_number): self.serial_number = serial_number
+
+class Settings:
+    def __init__(self, serial_number): self.eeprom = EEPROM(serial_number)
+
+class Measurement:
+    def __init__(self, n, settings):
+        self.measurement_id = "20240101-000000-%06d-%s" % (n, settings.eeprom.serial_number)
+        self.label = "Batch %d" % n
+        self.settings = settings
+
+class ListIndex:
+    """ the previous Measurements bookkeeping """
+    def __init__(self): self.measurements = []
+    def __len__(self): return len(self.measurements)
+    def __getitem__(self, index): return self.measurements[index]
+    def append(self, m): self.measurements.append(m)
+    def get(self, measurement_id):
+        for m in self.measurements:
+            if m.measurement_id == measurement_id:
+                return m
+    def remove(self, m):
+        if m is None or m not in self.measurements:
+            return False
+        self.measurements.remove(m)
+        return True
+
+def simulate(index, captures, max_thumbnails, lookups):
+    settings = [ Settings("WP-%05d" % i) for i in range(2) ]
+    ids = []
+    found = 0
+    for n in range(captures):
+        while len(index) >= max_thumbnails:
+            index.remove(index[0])
+
+        m = Measurement(n, settings[n % len(settings)])
+        index.append(m)
+        ids.append(m.measurement_id)
+
+        # look up recent captures (deterministic "random" spread over the Clipboard)
+        count = min(len(index), max_thumbnails)
+        for i in range(lookups):
+            measurement_id = ids[len(ids) - 1 - (n * 7919 + i * 104729) % count]
+            if index.get(measurement_id) is not None:
+                found += 1
+
+        if n % 100 == 99:
+            index.remove(index[len(index) // 2])
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark Measurements bookkeeping")
+    parser.add_argument("--captures", type=int, default=10000)
+    parser.add_argument("--max-thumbnails", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--lookups", type=int, default=2, help="get(measurement_id) calls per capture")
+    args = parser.parse_args()
+
+    print("%8s %8s %12s %12s %10s" % ("captures", "max", "list_ms", "index_ms", "speedup"))
+    for max_thumbnails in args.max_thumbnails:
+        elapsed = {}
+        found = {}
+        for name, cls in [ ("list", ListIndex), ("index", MeasurementIndex) ]:
+            start = time.perf_counter()
+            found[name] = simulate(cls(), args.captures, max_thumbnails, args.lookups)
+            elapsed[name] = time.perf_counter() - start
+
+        if found["list"] != found["index"]:
+            print("WARNING: list found %d, index found %d" % (found["list"], found["index"]))
+
+        print("%8d %8d %12.1f %12.1f %9.1fx" % (args.captures, max_thumbnails,
+            elapsed["list"] * 1000, elapsed["index"] * 1000, elapsed["list"] / elapsed["index"]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import datetime
+import threading
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "plugins"))
+
+from EnlightenPlugin import EnlightenPluginRequest
+from wasatch.ProcessedReading import ProcessedReading
+from wasatch.SpectrometerSettings import SpectrometerSettings
+
+from enlighten.Plugins.PluginModuleInfo import PluginModuleInfo
+from enlighten.Plugins.PluginWorker import PluginWorker
+from enlighten.Plugins.PluginProcessWorker import PluginProcessWorker
+
+"""
+Drives the Demo.Latency plugin through both PluginWorker (thread) and
+PluginProcessWorker (child process + shared memory) without the GUI, and
+reports:
+
+- round-trip latency: from queueing an EnlightenPluginRequest to receiving its
+  EnlightenPluginResponse, with the plugin doing no work (transport overhead);
+- GUI stall: while the plugin burns --work ms of pure-Python CPU per request,
+  how long a 1ms slice of pure-Python work on the "GUI" (main) thread
+  actually takes, i.e. how badly the plugin contends for the GIL.
+
+Example (see benchmark_util for the environment):
+
+    $ python scripts/benchmark-plugin-workers.py --pixels 1024 2048 --requests 200 --work 20
+"""
+
+PLUGIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "plugins", "Demo", "Latency.py")
+
+def make_request(request_id, settings, pixels, work_ms):
+    pr = ProcessedReading()
+    pr.processed = np.random.uniform(0, 60000, pixels)
+    pr.raw = np.copy(pr.processed)
+    pr.dark = np.random.uniform(800, 900, pixels)
+    pr.wavelengths = settings.wavelengths
+    pr.settings = settings
+    return EnlightenPluginRequest(
+        request_id        = request_id,
+        spec              = None,
+        settings          = settings,
+        processed_reading = pr,
+        creation_time     = datetime.datetime.now(),
+        fields            = { "Work (ms)": work_ms })
+
+def start_worker(mode, settings, pixels):
+    module_info = PluginModuleInfo(pathname=PLUGIN, package="Demo", filename="Latency.py", ctl=None)
+    module_info.load()
+
+    request_queue = queue.Queue()
+    response_queue = queue.Queue()
+    if mode == "thread":
+        worker = PluginWorker(request_queue, response_queue, module_info)
+    else:
+        worker = PluginProcessWorker(request_queue, response_queue, module_info)
+    worker.daemon = True
+    worker.start()
+
+    # wait for the plugin to connect (the child process takes a while to spawn)
+    request_queue.put(make_request(-1, settings, pixels, 0))
+    response_queue.get(timeout=60)
+    return worker, request_queue, response_queue
+
+def round_trip(request_queue, response_queue, settings, pixels, count):
+    times = []
+    for i in range(count):
+        request = make_request(i, settings, pixels, 0)
+        start = time.perf_counter()
+        request_queue.put(request)
+        response_queue.get(timeout=10)
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1000
+
+def gui_stall(request_queue, response_queue, settings, pixels, count, work_ms):
+    done = threading.Event()
+
+    def feed():
+        for i in range(count):
+            request_queue.put(make_request(i, settings, pixels, work_ms))
+            response_queue.get(timeout=60)
+        done.set()
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    slices = []
+    while not done.is_set():
+        start = time.perf_counter()
+        end = start + 0.001
+        while time.perf_counter() < end:
+            pass
+        slices.append(time.perf_counter() - start)
+    feeder.join()
+    return np.array(slices) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark threaded vs process-isolated plugin workers")
+    parser.add_argument("--pixels",   type=int, nargs="+", default=[1024, 2048])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--work",     type=float, default=20, help="plugin CPU ms per request for the stall test")
+    args = parser.parse_args()
+
+    print("%8s %6s %10s %10s %10s %12s %12s" % ("mode", "pixels", "rt_mean", "rt_p50", "rt_p99", "slice_mean", "slice_max"))
+    for pixels in args.pixels:
+        settings = SpectrometerSettings()
+        settings.wavelengths = np.linspace(780, 1100, pixels)
+
+        for mode in [ "thread", "process" ]:
+            worker, request_queue, response_queue = start_worker(mode, settings, pixels)
+
+            rt = round_trip(request_queue, response_queue, settings, pixels, args.requests)
+            stall = gui_stall(request_queue, response_queue, settings, pixels, max(1, args.requests // 10), args.work)
+
+            request_queue.put(None)
+            worker.join(10)
+
+            print("%8s %6d %10.3f %10.3f %10.3f %12.3f %12.3f" % (mode, pixels,
+                rt.mean(), np.percentile(rt, 50), np.percentile(rt, 99), stall.mean(), stall.max()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import math
+import argparse
+import numpy as np
+
+from enlighten.post_processing.ReferenceEngine import ReferenceEngine
+from benchmark_util import time_it
+
+"""
+Compares the per-pixel Python loops TransmissionFeature.process and
+AbsorbanceFeature.process used to run (including dark-correcting the
+reference for every reading) with ReferenceEngine, across a range of pixel
+counts.  Also reports the largest difference between the two absorbances.
+
+Example (see benchmark_util for the environment):
+
+    $ python scripts/benchmark-reference-modes.py --pixels 512 1024 2048 4096
+"""
+
+MAX_AU = 6.0
+
+def legacy(sample, reference, dark, max_perc):
+    ref = reference.copy()
+    ref -= dark
+
+    transmission = []
+    for i in range(len(sample)):
+        value = 0
+        if ref[i] != 0:
+            try:
+                value = 100.0 * float(sample[i]) / float(ref[i])
+            except:
+                pass
+        value = min(value, max_perc)
+        transmission.append(value)
+
+    absorbance = []
+    for t_perc in transmission:
+        au = 0
+        t = t_perc / 100.0
+        if t != 0:
+            if t >= 0:
+                au = -1.0 * math.log10(t)
+            else:
+                au = MAX_AU
+        absorbance.append(au)
+    return absorbance
+
+class Settings:
+    device_id = "benchmark"
+
+class Reading:
+    def __init__(self, reference, dark):
+        self.reference = reference
+        self.dark = dark
+    def is_cropped(self):
+        return False
+
+def vectorized(engine, sample, reference, dark, max_perc):
+    ref = engine.get_reference(Reading(reference, np.copy(dark)), Settings(), False, None)
+    transmission, _ = ReferenceEngine.transmission(sample, ref, max_perc)
+    absorbance, _ = ReferenceEngine.absorbance(transmission, MAX_AU)
+    return absorbance.tolist()
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark vectorized transmission/absorbance vs the per-pixel loops")
+    parser.add_argument("--pixels",   type=int, nargs="+", default=[512, 1024, 2048, 4096])
+    parser.add_argument("--repeat",   type=int, default=100)
+    parser.add_argument("--max-perc", type=float, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    print("%6s %10s %12s %10s %12s" % ("pixels", "loop_ms", "engine_ms", "speedup", "max_abs_diff"))
+    for pixels in args.pixels:
+        dark = rng.uniform(800, 900, pixels)
+        reference = rng.uniform(20000, 60000, pixels)
+        reference.flags.writeable = False
+        sample = rng.uniform(0, 50000, pixels) - dark
+
+        engine = ReferenceEngine()
+        expected, loop_sec = time_it(lambda: legacy(sample, reference, dark, args.max_perc), args.repeat)
+        actual, engine_sec = time_it(lambda: vectorized(engine, sample, reference, dark, args.max_perc), args.repeat)
+
+        diff = np.max(np.abs(np.array(expected) - np.array(actual)))
+        print("%6d %10.3f %12.4f %9.1fx %12.3g" % (pixels, loop_sec * 1000, engine_sec * 1000, loop_sec / engine_sec, diff))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import numpy as np
+import argparse
+import math
+
+from enlighten.post_processing.RichardsonLucy import RichardsonLucy, DenseGaussianKernel, BandedGaussianKernel
+from benchmark_util import time_it
+
+"""
+Compares the dense and banded Richardson-Lucy kernels on synthetic Raman
+spectra, reporting construction time, deconvolution time and the largest
+difference between the two outputs.
+
+Example (see benchmark_util for the environment):
+
+    $ python scripts/benchmark-richardson-lucy.py --pixels 512 1024 2048 4096
+"""
+
+def synthetic_spectrum(x_axis, fwhm, count=12, seed=0):
+    rng = np.random.default_rng(seed)
+    sigma = fwhm / (2.0 * math.sqrt(2.0 * math.log(2.0)))
+    spectrum = np.full(len(x_axis), 800.0) + 0.2 * (x_axis - x_axis[0])
+    for center, height in zip(rng.uniform(x_axis[0], x_axis[-1], count), rng.uniform(500, 20000, count)):
+        spectrum += height * np.exp(-0.5 * ((x_axis - center) / sigma) ** 2)
+    return spectrum + rng.normal(0, 10, len(x_axis))
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark dense vs banded Richardson-Lucy")
+    parser.add_argument("--pixels",      type=int,   nargs="+", default=[512, 1024, 2048, 4096])
+    parser.add_argument("--fwhm",        type=float, default=8.0, help="optical resolution (cm-1)")
+    parser.add_argument("--iterations",  type=int,   default=5)
+    parser.add_argument("--band-sigmas", type=float, default=4.0)
+    parser.add_argument("--repeat",      type=int,   default=5)
+    args = parser.parse_args()
+
+    print("%6s %8s %12s %12s %12s %12s %10s %12s" % ("pixels", "band_w", "dense_gen_ms", "band_gen_ms",
+        "dense_rl_ms", "band_rl_ms", "speedup", "max_rel_diff"))
+
+    for pixels in args.pixels:
+        # roughly 200-3200cm-1 across the detector, with mild curvature
+        px = np.arange(pixels, dtype=np.double)
+        x_axis = 200 + 3000 * (px / pixels) + 150 * (px / pixels) ** 2
+        spectrum = synthetic_spectrum(x_axis, args.fwhm)
+
+        pixel_sigma = RichardsonLucy.compute_pixel_sigma(x_axis, args.fwhm)
+
+        dense, dense_gen = time_it(lambda: DenseGaussianKernel(pixel_sigma), 1)
+        banded, band_gen = time_it(lambda: BandedGaussianKernel(pixel_sigma, sigmas=args.band_sigmas), args.repeat)
+
+        def run(kernel):
+            deconvolved = np.copy(spectrum)
+            deconvolved[deconvolved < 1e-5] = 1e-5
+            return RichardsonLucy.deconvolve(kernel, spectrum, deconvolved, args.iterations)
+
+        dense_out, dense_rl = time_it(lambda: run(dense),  args.repeat)
+        band_out,  band_rl  = time_it(lambda: run(banded), args.repeat)
+
+        max_rel_diff = np.max(np.abs(dense_out - band_out) / np.maximum(np.abs(dense_out), 1.0))
+
+        print("%6d %8d %12.2f %12.2f %12.2f %12.2f %9.1fx %12.2e" % (pixels, banded.half_width,
+            dense_gen * 1000, band_gen * 1000, dense_rl * 1000, band_rl * 1000, dense_rl / band_rl, max_rel_diff))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import numpy as np
+import argparse
+
+from datetime import timedelta
+from datetime import datetime as dt
+from collections import deque
+
+from enlighten.timing.RollingDataSet import RollingDataSet
+from benchmark_util import time_it
+
+"""
+Micro-benchmarks the NumPy-backed RollingDataSet against the previous
+deque-of-(datetime, value) implementation (reproduced below), for windows
+holding 10k+ samples: appending one sample (including trimming), the
+all_within / one_within status queries, and building graph data.  Also checks
+both implementations give the same answers.
+
+Example (see benchmark_util for the environment):
+
+    $ python scripts/benchmark-rolling-data-set.py --samples 10000 50000 100000
+"""
+
+class LegacyRollingDataSet:
+    """ the deque-based RollingDataSet, less logging """
+    def __init__(self, size_seconds):
+        self.data = deque()
+        self.window_limit = timedelta(seconds=size_seconds)
+
+    def add(self, value):
+        self.data.append((dt.now(), value))
+        self.filter_limit()
+
+    def filter_limit(self):
+        while (dt.now() - self.data[0][0]) > self.window_limit:
+            self.data.popleft()
+
+    def get_values(self):
+        return [y for x, y in self.data]
+
+    def get_relative_to_now(self):
+        now = dt.now()
+        return [ (now - k).total_seconds() for k, v in self.data ], [ v for k, v in self.data ]
+
+    def all_within(self, value, delta, window_sec=None):
+        now = dt.now()
+        for k, v in self.data:
+            if abs(value - v) > delta:
+                if window_sec is not None and (now - k).total_seconds() > window_sec:
+                    continue
+                return False
+        return True
+
+    def one_within(self, value, delta, window_sec=None):
+        now = dt.now()
+        for k, v in self.data:
+            if abs(value - v) <= delta:
+                if window_sec is not None and (now - k).total_seconds() > window_sec:
+                    continue
+                return True
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark NumPy RollingDataSet vs deque implementation")
+    parser.add_argument("--samples", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--repeat",  type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    print("%8s %-22s %12s %12s %10s %6s" % ("samples", "operation", "legacy_us", "numpy_us", "speedup", "same"))
+    for samples in args.samples:
+        legacy = LegacyRollingDataSet(3600)
+        rds = RollingDataSet(3600)
+        values = rng.normal(-15, 0.2, samples)
+        for v in values:
+            legacy.add(float(v))
+            rds.add(float(v))
+
+        tests = [
+            ("add",                 lambda d: d.add(-15.0)),
+            ("all_within",          lambda d: d.all_within(-15.0, 1.0)),
+            ("all_within(window)",  lambda d: d.all_within(-15.0, 1.0, window_sec=10)),
+            ("one_within",          lambda d: d.one_within(-14.0, 0.01)),
+            ("get_relative_to_now", lambda d: d.get_relative_to_now()[1]),
+            ("get_values",          lambda d: d.get_values()) ]
+
+        for name, func in tests:
+            expected, old = time_it(lambda: func(legacy), args.repeat)
+            actual,   new = time_it(lambda: func(rds), args.repeat)
+
+            if expected is None or isinstance(expected, bool):
+                same = expected == actual
+            else:
+                same = np.allclose(expected, actual)
+            print("%8d %-22s %12.1f %12.1f %9.1fx %6s" % (samples, name, old * 1e6, new * 1e6, old / new, same))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import argparse
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pyqtgraph
+import pyqtgraph.exporters
+
+from enlighten import common
+from enlighten.ui.ThumbnailRenderer import ThumbnailRenderer
+from benchmark_util import time_each
+
+if common.use_pyside2():
+    from PySide2 import QtGui, QtWidgets
+else:
+    from PySide6 import QtGui, QtWidgets
+
+"""
+Measures the cost of rendering Clipboard thumbnails, as paid for each saved
+Measurement (e.g. during BatchCollection).  Modes:
+
+- exporter: a new pyqtgraph ImageExporter per thumbnail (the previous behavior)
+- shared:   ThumbnailRenderer with painter = False (one shared ImageExporter)
+- painter:  ThumbnailRenderer's default QPainter rendering
+- cached:   ThumbnailRenderer fetching an already-rendered thumbnail
+
+Example (see benchmark_util for the environment):
+
+    $ python scripts/benchmark-thumbnails.py --pixels 1024 2048 8192 --count 200
+"""
+
+class Config:
+    """ just the defaults """
+    def get_bool(self, section, key, default=False): return default
+    def get_int (self, section, key, default=0):     return default
+
+class GUI:
+    def make_pen(self, widget=None): return pyqtgraph.mkPen(color="#2994d3", width=1)
+
+class Ctl:
+    def __init__(self):
+        self.config = Config()
+        self.gui = GUI()
+        self.thumbnail_render_graph = pyqtgraph.PlotWidget()
+        self.thumbnail_render_graph.hideAxis("left")
+        self.thumbnail_render_graph.hideAxis("bottom")
+        self.thumbnail_render_graph.resize(170, 120)
+        self.thumbnail_render_curve = self.thumbnail_render_graph.plot(list(range(1024)), pen=self.gui.make_pen())
+
+class ProcessedReading:
+    def __init__(self, spectrum): self.spectrum = spectrum
+    def get_processed(self): return self.spectrum
+
+class Measurement:
+    def __init__(self, measurement_id, spectrum):
+        self.measurement_id = measurement_id
+        self.processed_reading = ProcessedReading(spectrum)
+        self.thumbnail_widget = None
+
+def render_exporter(ctl, spectrum):
+    """ what MeasurementFactory.render_thumbnail_to_qpixmap used to do """
+    ctl.thumbnail_render_curve.setData(spectrum)
+    exporter = pyqtgraph.exporters.ImageExporter(ctl.thumbnail_render_graph.plotItem)
+    exporter.params.param('width' ).sigValueChanged.disconnect()
+    exporter.params.param('height').sigValueChanged.disconnect()
+    exporter.params['width' ] = 180
+    exporter.params['height'] = 120
+    return QtGui.QPixmap(exporter.export(toBytes=True))
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark Clipboard thumbnail rendering")
+    parser.add_argument("--pixels", type=int, nargs="+", default=[1024, 2048, 8192])
+    parser.add_argument("--count",  type=int, default=200, help="thumbnails per mode")
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    ctl = Ctl()
+    rng = np.random.default_rng(0)
+
+    print("%6s %12s %12s %12s %12s %8s" % ("pixels", "exporter_ms", "shared_ms", "painter_ms", "cached_ms", "speedup"))
+    for pixels in args.pixels:
+        measurements = [ Measurement(f"m{pixels}-{i}", rng.normal(1000, 50, pixels)) for i in range(args.count) ]
+
+        shared = ThumbnailRenderer(ctl)
+        shared.painter = False
+        painter = ThumbnailRenderer(ctl)
+
+        exporter_sec = time_each(lambda m: render_exporter(ctl, m.processed_reading.get_processed()), measurements)
+        shared_sec   = time_each(shared.get_pixmap, measurements)
+        painter_sec  = time_each(painter.get_pixmap, measurements)
+        cached_sec   = time_each(painter.get_pixmap, measurements)
+        app.processEvents()
+
+        print("%6d %12.3f %12.3f %12.3f %12.4f %7.1fx" % (pixels,
+            exporter_sec * 1000, shared_sec * 1000, painter_sec * 1000, cached_sec * 1000, exporter_sec / painter_sec))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import time
+
+"""
+Helpers shared by the scripts/benchmark-*.py scripts.
+
+Each benchmark is run from the ENLIGHTEN root, with the usual PYTHONPATH
+(ENLIGHTEN, Wasatch.PY and the plugins directory where needed), e.g.:
+
+    $ python scripts/benchmark-richardson-lucy.py --help
+
+Running a script directly puts scripts/ on sys.path, which is how they import
+this module.
+"""
+
+##
+# Call func() repeat times.
+#
+# @returns (last result, mean seconds per call)
+def time_it(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat
+
+##
+# Call func(item) for each item.
+#
+# @returns mean seconds per item
+def time_each(func, items):
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items)
@@ -0,0 +1,48 @@
+import datetime
+import pytest
+import numpy as np
+
+from enlighten.measurement.AreaScanRecording import AreaScanRecorder, AreaScanRecording
+
+def make_frames(count, shape=(8, 32), seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 0xffff, (count,) + shape).astype(np.float32)
+
+class TestAreaScanRecording:
+
+    # description: recorded frames, timestamps and ROIs read back, including while still recording
+    def test_round_trip(self, tmp_path):
+        pathname = str(tmp_path / "area-scan.npy")
+        frames = make_frames(12)
+        start = datetime.datetime(2024, 1, 2, 3, 4, 5)
+
+        recorder = AreaScanRecorder(pathname, frames.shape[1:], serial_number="WP-00001", flush_every=5)
+        for i, frame in enumerate(frames):
+            recorder.append(frame, roi=(10, 17), timestamp=start + datetime.timedelta(seconds=i))
+
+        # readable while still recording, up to the last flush
+        partial = AreaScanRecording(pathname)
+        assert len(partial) == 10
+        assert np.array_equal(partial.get_frame(9), frames[9])
+
+        recorder.close()
+
+        recording = AreaScanRecording(pathname.replace(".npy", ".json"))
+        assert len(recording) == 12
+        assert recording.shape == (8, 32)
+        assert recording.serial_number == "WP-00001"
+        assert isinstance(recording.data, np.memmap)
+        assert np.array_equal(recording.get_frame(11), frames[11])
+        assert recording.get_timestamp(3) == start + datetime.timedelta(seconds=3)
+        assert recording.get_roi(0) == (10, 17)
+
+        # and a plain .npy
+        assert np.array_equal(np.load(pathname), frames)
+
+    # description: frames of the wrong shape are rejected, leaving an empty recording
+    def test_shape_mismatch(self, tmp_path):
+        recorder = AreaScanRecorder(str(tmp_path / "area-scan.npy"), (8, 32))
+        with pytest.raises(ValueError):
+            recorder.append(np.zeros((4, 32)))
+        recorder.close()
+        assert len(AreaScanRecording(str(tmp_path / "area-scan.npy"))) == 0
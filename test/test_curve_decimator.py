@@ -0,0 +1,63 @@
+import numpy as np
+
+from enlighten.scope.CurveDecimator import CurveDecimator
+
+def make_spectrum(pixels=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(400, 3200, pixels)
+    y = rng.normal(1000, 5, pixels)
+    return x, y
+
+class TestCurveDecimator:
+
+    def test_small_curves_unchanged(self):
+        x, y = make_spectrum(1000)
+        x2, y2 = CurveDecimator.decimate(x, y, width=800)
+        assert x2 is x and y2 is y
+
+    def test_decimate_preserves_peaks(self):
+        x, y = make_spectrum()
+        y[1234] = 60000     # one-pixel spike
+        y[15000] = -500     # one-pixel dip
+
+        x2, y2 = CurveDecimator.decimate(x, y, width=800)
+
+        assert len(y2) <= 2 * 800 + 25
+        assert y2.max() == y.max()
+        assert y2.min() == y.min()
+        assert np.all(np.diff(x2) >= 0)
+        assert x2[0] == x[0] and x2[-1] == x[-1]
+
+    def test_decimate_ignores_nan(self):
+        x, y = make_spectrum()
+        y[::7] = np.nan
+        x2, y2 = CurveDecimator.decimate(x, y, width=800)
+        assert not np.any(np.isnan(y2))
+        assert np.nanmax(y) == y2.max()
+
+    def test_clip_ascending(self):
+        x, y = make_spectrum()
+        x2, y2 = CurveDecimator.clip(x, y, 1000, 1100)
+        assert x2[0] < 1000 <= x2[1]
+        assert x2[-2] <= 1100 < x2[-1]
+        assert np.all(y2 == y[np.searchsorted(x, x2[0]):][:len(y2)])
+
+    def test_clip_descending(self):
+        # RollingDataSet ages run oldest (largest) to newest
+        ages = np.linspace(60, 0, 6001)
+        values = np.arange(len(ages), dtype=np.float64)
+        x2, y2 = CurveDecimator.clip(ages, values, 10, 20)
+        assert x2[0] > 20 >= x2[1]
+        assert x2[-2] >= 10 > x2[-1]
+
+    def test_clip_non_monotonic_unchanged(self):
+        x = np.array([3.0, 1.0, 2.0, 5.0, 4.0])
+        y = np.arange(5.0)
+        x2, y2 = CurveDecimator.clip(x, y, 1.5, 3.5)
+        assert x2 is x and y2 is y
+
+    def test_reduce_lists(self):
+        x, y = make_spectrum()
+        x2, y2 = CurveDecimator.reduce(None, list(y), width=500, x_range=(5000, 15000))
+        assert len(y2) <= 2 * 500 + 25
+        assert y2.max() == y[4999:15002].max()
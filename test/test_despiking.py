@@ -0,0 +1,155 @@
+import os
+import pytest
+import numpy as np
+
+from enlighten.post_processing.DespikingFeature import DespikingFeature
+
+READINGS_DIR = os.path.join(os.path.dirname(__file__), "..", "testSpectrometers", "SiG_785", "readings")
+
+def load_processed(pathname):
+    """ @returns the Processed column of a (column-oriented) ENLIGHTEN CSV """
+    with open(pathname) as infile:
+        lines = infile.read().splitlines()
+    start = lines.index("Pixel,Wavelength,Processed") + 1
+    return np.array([ float(line.split(",")[2]) for line in lines[start:] if line.strip() ])
+
+def example_spectra():
+    return [ load_processed(os.path.join(READINGS_DIR, name)) for name in sorted(os.listdir(READINGS_DIR)) if name.endswith(".csv") ]
+
+def add_spikes(spectrum, count=6, seed=0):
+    rng = np.random.default_rng(seed)
+    spiky = np.array(spectrum, dtype=np.float64)
+    pixels = rng.choice(np.arange(10, len(spiky) - 10), count, replace=False)
+    spiky[pixels] += rng.uniform(5, 20, count) * spiky.max()
+    return spiky, pixels
+
+def legacy_despike(spectrum, tau, m):
+    """ the original DespikingFeature.DarrenEtAlAlgo / interpolate_zs, less logging """
+    from statistics import median
+    spiky_spectra = list(spectrum)
+    nabla_counts = np.asarray([yt - yt_last for yt, yt_last in zip(spiky_spectra[1:],spiky_spectra[:-1])])
+    med = median(nabla_counts)
+    mad = median(np.abs(nabla_counts - med))
+    mod_z_scores = (0.6745*(nabla_counts-med))/mad
+    mod_z_scores[0] = tau + 1
+    mod_z_scores[-1] = tau + 1
+    candidate_idxs = [idx[0] for idx, value in np.ndenumerate(mod_z_scores) if abs(value) > tau]
+
+    spectra, scores = spiky_spectra, mod_z_scores
+
+    def indicator_func(score, tau):
+        return 1 if abs(score) < tau else 0
+
+    for index in candidate_idxs:
+        zs_window = [0 for x in range(2*m)]
+        spectra_window = [0 for x in range(2*m)]
+        window_idx = 0
+        for i in range(index - m, index + m, 1):
+            if i < 0:
+                zs_window[window_idx] = scores[0]
+                spectra_window[window_idx] = spectra[0]
+            elif i >= len(scores):
+                zs_window[window_idx] = scores[-1]
+                spectra_window[window_idx] = spectra[-1]
+            else:
+                zs_window[window_idx] = scores[i]
+                spectra_window[window_idx] = spectra[i]
+            window_idx += 1
+        w = sum(map(lambda x: indicator_func(x, tau), zs_window))
+        main_sum = sum(map(lambda x: x[1]*indicator_func(x[0], tau), zip(zs_window, spectra_window)))
+        if w == 0:
+            continue
+        spectra[index] = (1/w)*main_sum
+    return np.array(spectra, dtype=np.float64)
+
+class FakeConfig:
+    def __init__(self, values):
+        self.values = values
+    def has_option(self, section, key):
+        return key in self.values
+    def get(self, section, key, default=None):
+        return self.values.get(key, default)
+    get_bool = get_int = get_float = get
+
+class FakeController:
+    def __init__(self, **values):
+        self.config = FakeConfig(values)
+
+class FakeSpectrometer:
+    def __init__(self, device_id):
+        self.device_id = device_id
+
+class TestDespiking:
+
+    # description: vectorized Whitaker-Hayes matches the original loop on the example data
+    @pytest.mark.parametrize("tau,m", [ (6.5, 5), (7.0, 7), (3.0, 2), (10.0, 12) ])
+    def test_matches_legacy(self, tau, m):
+        for spectrum in example_spectra():
+            for seed in range(3):
+                spiky, _ = add_spikes(spectrum, seed=seed)
+                expected = legacy_despike(spiky, tau, m)
+                actual = DespikingFeature.despike(spiky, tau, m)
+                np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9)
+
+    # description: unspiked example spectra are also processed identically
+    def test_matches_legacy_unspiked(self):
+        for spectrum in example_spectra():
+            np.testing.assert_allclose(DespikingFeature.despike(spectrum, 6.5, 5), legacy_despike(spectrum, 6.5, 5), rtol=1e-9, atol=1e-9)
+
+    # description: despike doesn't modify its input
+    def test_not_in_place(self):
+        spiky, _ = add_spikes(example_spectra()[0])
+        orig = np.copy(spiky)
+        DespikingFeature.despike(spiky, 6.5, 5)
+        np.testing.assert_array_equal(spiky, orig)
+
+    # description: temporal mode removes a cosmic ray and leaves everything else alone
+    def test_temporal(self):
+        feature = DespikingFeature(FakeController(mode="temporal", frames=5, tau=6.5))
+        spec = FakeSpectrometer("sim")
+        rng = np.random.default_rng(1)
+        clean = example_spectra()[0]
+
+        for _ in range(5):
+            feature.despike_temporal(spec.device_id, clean + rng.normal(0, np.sqrt(clean)))
+
+        frame = clean + rng.normal(0, np.sqrt(clean))
+        spiky = np.copy(frame)
+        spiky[[200, 900, 1500]] += 50000
+
+        despiked = feature.despike_temporal(spec.device_id, spiky)
+        assert np.all(np.abs(despiked[[200, 900, 1500]] - clean[[200, 900, 1500]]) < 10 * np.sqrt(clean[[200, 900, 1500]]) + 10)
+
+        untouched = np.ones(len(frame), dtype=bool)
+        untouched[[200, 900, 1500]] = False
+        assert np.count_nonzero(despiked[untouched] != frame[untouched]) < 0.005 * len(frame)
+
+    # description: consecutive cosmic rays on one pixel are each removed, and never enter the history
+    def test_temporal_repeated_spike(self):
+        feature = DespikingFeature(FakeController(mode="temporal", frames=3, tau=6.5))
+        spec = FakeSpectrometer("sim")
+        rng = np.random.default_rng(2)
+        clean = example_spectra()[0]
+
+        for _ in range(3):
+            feature.despike_temporal(spec.device_id, clean + rng.normal(0, np.sqrt(clean)))
+
+        for _ in range(3):
+            spiky = clean + rng.normal(0, np.sqrt(clean))
+            spiky[700] += 50000
+            despiked = feature.despike_temporal(spec.device_id, spiky)
+            assert abs(despiked[700] - clean[700]) < 10 * np.sqrt(clean[700]) + 10
+
+        assert np.all(feature.histories[spec.device_id].get()[:, 700] < clean[700] + 10 * np.sqrt(clean[700]) + 10)
+
+    # description: temporal mode restarts its history when the sample changes
+    def test_temporal_sample_change(self):
+        feature = DespikingFeature(FakeController(mode="temporal", frames=5))
+        spec = FakeSpectrometer("sim")
+        spectra = example_spectra()
+        for _ in range(5):
+            feature.despike_temporal(spec.device_id, spectra[0])
+
+        changed = spectra[0] * 3
+        np.testing.assert_allclose(feature.despike_temporal(spec.device_id, changed), DespikingFeature.despike(changed, feature.tau, feature.window))
+        assert len(feature.histories[spec.device_id]) == 1
@@ -0,0 +1,109 @@
+import os
+import time
+import pytest
+import numpy as np
+
+from enlighten.parser.ExportFileParser import ExportFileParser
+
+def write_export(pathname, spectra=2000, pixels=1024, headers=("Processed",), seed=0):
+    """
+    Generate a (format 2) ENLIGHTEN export of the given number of spectra, in the
+    layout ExportFileParser expects: three x-axis columns, then one group of
+    header columns per Measurement.  The last Measurement is cropped (shorter,
+    padded with empty cells) and the first has an "NA" cell.
+    """
+    rng = np.random.default_rng(seed)
+    data = np.round(rng.uniform(800, 60000, (pixels, spectra * len(headers))), 2)
+    cols = len(headers)
+
+    def metadata_row(field, values):
+        row = [ field, "", "" ]
+        for value in values:
+            row.append(value)
+            row.extend([ "" ] * (cols - 1))
+        return ",".join(row)
+
+    lines = [ "ENLIGHTEN Version,4.1.0" ]
+    lines.append(metadata_row("Measurement ID", [ f"enlighten-20240101-120000-{i:06d}-S1" for i in range(spectra) ]))
+    lines.append(metadata_row("Serial Number", [ "S1" ] * spectra))
+    lines.append(metadata_row("Label", [ f"Sample {i}" for i in range(spectra) ]))
+    lines.append(metadata_row("Integration Time", [ "100" ] * spectra))
+    lines.append("")
+    lines.append(metadata_row("S1", [ f"Sample {i}" for i in range(spectra) ]))
+    lines.append(",".join([ "Pixel", "Wavelength", "Wavenumber" ] + list(headers) * spectra))
+
+    cropped = pixels - 24
+    for pixel in range(pixels):
+        values = [ f"{v:.2f}" for v in data[pixel] ]
+        if pixel >= cropped:
+            values[-cols:] = [ "" ] * cols
+        if pixel == 5:
+            values[0] = "NA"
+        lines.append(",".join([ str(pixel), f"{780 + pixel * 0.1:.2f}", f"{pixel * 2.5:.2f}" ] + values))
+
+    with open(pathname, "w") as outfile:
+        outfile.write("\n".join(lines) + "\n")
+
+    return data, cropped
+
+def load(pathname, bulk):
+    parser = ExportFileParser(ctl=None, pathname=pathname, bulk=bulk)
+    start = time.perf_counter()
+    parser.load_data()
+    return parser, time.perf_counter() - start
+
+def assert_same(legacy, bulk):
+    assert len(legacy.exported_measurements) == len(bulk.exported_measurements)
+    for a, b in zip(legacy.exported_measurements, bulk.exported_measurements):
+        assert a.metadata == b.metadata
+        assert a.headers == b.headers
+        for attr in [ "processed", "raw", "dark", "reference" ]:
+            x = getattr(a.processed_reading, attr)
+            if isinstance(x, list):
+                assert np.array_equal(np.array(x), getattr(b.processed_reading, attr))
+
+class TestExportFileParser:
+
+    # description: the bulk parser loads the same Measurements as the line-by-line parser
+    def test_bulk_matches_legacy(self, tmp_path):
+        pathname = str(tmp_path / "export.csv")
+        data, cropped = write_export(pathname, spectra=50, pixels=256, headers=("Processed", "Raw", "Dark"))
+
+        legacy, _ = load(pathname, bulk=False)
+        bulk, _ = load(pathname, bulk=True)
+        assert_same(legacy, bulk)
+
+        pr = bulk.exported_measurements[0].processed_reading
+        assert pr.processed[5] == 0                                 # NA
+        assert np.array_equal(pr.raw, data[:, 1])
+        assert len(bulk.exported_measurements[-1].processed_reading.dark) == cropped
+
+    # description: rows with trailing cells dropped fall back to the line-by-line parser
+    def test_ragged_falls_back(self, tmp_path):
+        pathname = str(tmp_path / "ragged.csv")
+        write_export(pathname, spectra=20, pixels=64)
+
+        # drop the trailing (empty) cells from the last lines, as a spreadsheet might
+        with open(pathname) as infile:
+            lines = infile.read().splitlines()
+        lines = [ line.rstrip(",") for line in lines ]
+        with open(pathname, "w") as outfile:
+            outfile.write("\n".join(lines) + "\n")
+
+        legacy, _ = load(pathname, bulk=False)
+        bulk, _ = load(pathname, bulk=True)
+        assert_same(legacy, bulk)
+
+    # description: the bulk parser is at least twice as fast as the line-by-line parser
+    # wall-clock timing is unreliable on loaded machines, so only run on request
+    @pytest.mark.benchmark
+    @pytest.mark.skipif(not os.environ.get("ENLIGHTEN_BENCHMARK"), reason="set ENLIGHTEN_BENCHMARK=1 to run timing tests")
+    def test_bulk_timing(self, tmp_path):
+        pathname = str(tmp_path / "batch.csv")
+        write_export(pathname, spectra=2000, pixels=1024)
+
+        legacy, legacy_sec = load(pathname, bulk=False)
+        bulk, bulk_sec = load(pathname, bulk=True)
+
+        assert_same(legacy, bulk)
+        assert bulk_sec * 2 < legacy_sec
@@ -0,0 +1,63 @@
+from enlighten.parser.FileSniffer import FileSniffer
+
+SAMPLES = {
+    "dash.csv":         ('Dash Output v2.1,2016-09-30 10:59:55,Row,Pixel Data,S-00192\n'
+                         'Line Number,Integration Time,Timestamp\n1,100,2016-09-30 10:52:42.509,1544,1556\n', FileSniffer.DASH),
+    "labeled.csv":      ("# from RamanSpecCal\npixel,wavelength,wavenumber,corrected\n0,802.35,275.46,892\n", FileSniffer.LABELED_COLUMNS),
+    "columns.csv":      ("ENLIGHTEN Version,4.1.0\nSerial Number,WP-00887\nIntegration Time,100\n\n"
+                         "Pixel,Wavelength,Processed\n0,780.1,900\n", FileSniffer.ENLIGHTEN_COLUMNS),
+    "export.csv":       ("ENLIGHTEN Version,4.1.0\nSerial Number,,,WP-00887,WP-00888\n\n"
+                         "Pixel,Wavelength,Wavenumber,Processed,Processed\n", FileSniffer.EXPORT),
+    "simple.csv":       ("780.1,900\n780.2,901\n", FileSniffer.SIMPLE_COLUMNS),
+    "solis.asc":        ("780.1\t900\n780.2\t901\n\nDate and Time:\tMon Jan 1\n", FileSniffer.SIMPLE_COLUMNS),
+    "unknown.csv":      ("foo,bar,baz\n1,2,3\n", None),
+    "saved.json":       ('{"Label": "x"}', FileSniffer.JSON),
+}
+
+class TestFileSniffer:
+
+    # description: each sample file is sniffed as the expected format, and reopened intact
+    def test_formats(self, tmp_path):
+        for name, (text, expected) in SAMPLES.items():
+            pathname = str(tmp_path / name)
+            with open(pathname, "w") as outfile:
+                outfile.write(text)
+
+            sniffer = FileSniffer(pathname)
+            assert sniffer.sniff() == expected, name
+            assert sniffer.complete
+            assert sniffer.open().read() == text
+
+    # description: a UTF-8 BOM or Latin-2 file is decoded with the right encoding
+    def test_encoding(self, tmp_path):
+        pathname = str(tmp_path / "bom.csv")
+        with open(pathname, "w", encoding="utf-8-sig") as outfile:
+            outfile.write("Integration Time,100\n")
+        sniffer = FileSniffer(pathname)
+        assert sniffer.encoding == "utf-8-sig"
+        assert sniffer.sniff() == FileSniffer.ENLIGHTEN_COLUMNS
+
+        pathname = str(tmp_path / "latin.csv")
+        with open(pathname, "w", encoding="iso8859_2") as outfile:
+            outfile.write("Note,žluťoučký\nIntegration Time,100\n")
+        sniffer = FileSniffer(pathname)
+        assert sniffer.encoding == "iso8859_2"
+        assert sniffer.text.startswith("Note,žlu")
+
+    # description: a prefix ending mid-line is trimmed to whole lines, and doesn't decide the format alone
+    def test_truncated_prefix(self, tmp_path):
+        # a long two-column file, whose prefix ends partway through a line
+        pathname = str(tmp_path / "long.csv")
+        with open(pathname, "w") as outfile:
+            for i in range(2000):
+                outfile.write(f"{780 + i * 0.1:.3f},{1000 + i}\n")
+            outfile.write("not,simple,columns\n")
+
+        sniffer = FileSniffer(pathname, prefix_bytes=1000)
+        assert not sniffer.complete
+        assert sniffer.text is None
+        assert all(line.endswith("\n") for line in sniffer.lines())
+        assert sniffer.sniff() is None
+
+        with sniffer.open() as infile:
+            assert len(infile.readlines()) == 2001
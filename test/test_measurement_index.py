@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+from enlighten.measurement.MeasurementIndex import MeasurementIndex
+
+class Measurement:
+    """ hashed by identity, like enlighten.measurement.Measurement """
+    def __init__(self, measurement_id, label, serial_number):
+        self.measurement_id = measurement_id
+        self.label = label
+        self.settings = SimpleNamespace(eeprom=SimpleNamespace(serial_number=serial_number))
+
+def make_measurement(measurement_id, label=None, serial_number="WP-00001"):
+    return Measurement(measurement_id, label or measurement_id, serial_number)
+
+class TestMeasurementIndex:
+
+    # description: Clipboard order, id and serial-number lookups, and removal
+    def test_order_and_lookup(self):
+        index = MeasurementIndex()
+        a = make_measurement("a")
+        b = make_measurement("b", serial_number="WP-00002")
+        c = make_measurement("c")
+        for m in [a, b, c]:
+            index.append(m)
+
+        assert list(index) == [a, b, c]
+        assert index[0] is a and index[-1] is c and index[1] is b
+        assert len(index) == 3 and b in index
+        assert index.get("b") is b
+        assert index.get("missing") is None
+        assert index.find_by_serial_number("WP-00001") == [a, c]
+
+        assert index.remove(a)
+        assert not index.remove(a)
+        assert index[0] is b
+        assert index.get("a") is None
+        assert index.find_by_serial_number("WP-00001") == [c]
+
+    # description: duplicate ids return the oldest, and renamed or cleared Measurements stay removable
+    def test_duplicates_and_reindex(self):
+        index = MeasurementIndex()
+        first = make_measurement("dup", label="same")
+        second = make_measurement("dup", label="same")
+        index.append(first)
+        index.append(second)
+
+        # the oldest match, as with the previous linear scan
+        assert index.get("dup") is first
+        assert index.find_by_label("same") == [first, second]
+
+        second.label = "renamed"
+        index.reindex(second)
+        assert index.find_by_label("same") == [first]
+        assert index.get_by_label("renamed") is second
+
+        # removable after Measurement.clear()
+        first.measurement_id = first.label = first.settings = None
+        index.remove(first)
+        assert index.get("dup") is second
+        assert index.find_by_label("same") == []
+        assert list(index) == [second]
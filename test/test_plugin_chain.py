@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+import numpy as np
+
+from types import SimpleNamespace
+
+from wasatch.ProcessedReading import ProcessedReading
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "plugins"))
+
+from EnlightenPlugin import EnlightenPluginRequest, EnlightenPluginResponse
+
+from enlighten.Plugins.PluginChain import PluginChain, PluginChainMember, PluginChainModuleInfo
+
+class FakeConfig:
+    def __init__(self, sections):
+        self.sections = sections
+
+    def get_sections(self):
+        return list(self.sections)
+
+    def has_option(self, section, key):
+        return key in self.sections.get(section, {})
+
+    def get(self, section, key):
+        return self.sections[section][key]
+
+class FakePlugin:
+    """ records the processed spectrum it was given, and optionally scales it """
+    def __init__(self, scale=None, delay_sec=0):
+        self.scale = scale
+        self.delay_sec = delay_sec
+        self.seen = []
+
+    def process_request_obj(self, request):
+        time.sleep(self.delay_sec)
+        processed = request.processed_reading.processed
+        self.seen.append(np.copy(processed))
+        overrides = { "processed": processed * self.scale } if self.scale else None
+        return EnlightenPluginResponse(request, outputs={ "peak": float(processed.max()) }, overrides=overrides)
+
+def make_module_info(name, plugin):
+    return SimpleNamespace(module_name=name, instance=plugin)
+
+def make_request():
+    pr = ProcessedReading(d={ "Processed": np.arange(8, dtype=float) })
+    return EnlightenPluginRequest(request_id=1, spec=None, settings=None, processed_reading=pr, fields={})
+
+def make_chain(members, mode="sequence"):
+    chain = PluginChain(ctl=None, name="Test", members=members, mode=mode)
+    for m in members:
+        m.start()
+    return chain
+
+class TestPluginChain:
+
+    # description: [plugin_chain*] sections are parsed, and invalid ones skipped
+    def test_from_config(self):
+        module_infos = { name: make_module_info(name.split(".")[-1], FakePlugin()) for name in [ "A.One", "B.Two" ] }
+        ctl = SimpleNamespace(config=FakeConfig({
+            "plugin_chain":         { "plugins": "A.One, B.Two", "budgets_ms": "20" },
+            "plugin_chain_named":   { "plugins": "B.Two,A.One", "name": "Pair", "mode": "Parallel", "budgets_ms": "5, 0" },
+            "plugin_chain_bad":     { "plugins": "A.One, B.Two", "budgets_ms": "20ms" },
+            "plugin_chain_missing": { "plugins": "A.One, C.Three" },
+            "plugin_chain_short":   { "plugins": "A.One" },
+            "graphs":               { "plugins": "A.One, B.Two" }}))
+
+        chains = PluginChainModuleInfo.from_config(ctl, module_infos)
+        assert [ c.module_name for c in chains ] == [ "One+Two", "Pair" ]
+
+        assert chains[0].mode == "sequence"
+        assert [ (m.label, m.budget_ms) for m in chains[0].members ] == [ ("One", 20.0), ("Two", 20.0) ]
+
+        assert chains[1].mode == "parallel"
+        assert chains[1].full_module_name == "Chain.Pair"
+        assert [ (m.label, m.budget_ms) for m in chains[1].members ] == [ ("Two", 5.0), ("One", 0.0) ]
+
+    # description: in sequence, each member sees the previous member's overrides
+    def test_sequence_order(self):
+        first, second = FakePlugin(scale=2), FakePlugin(scale=3)
+        members = [ PluginChainMember(make_module_info(n, p), 0) for n, p in [ ("First", first), ("Second", second) ] ]
+        chain = make_chain(members)
+        request = make_request()
+        try:
+            response = chain.process_request_obj(request)
+        finally:
+            for m in members:
+                m.stop()
+
+        np.testing.assert_array_equal(first.seen[0], np.arange(8))
+        np.testing.assert_array_equal(second.seen[0], np.arange(8) * 2)
+        np.testing.assert_array_equal(response.overrides["processed"], np.arange(8) * 6)
+        np.testing.assert_array_equal(request.processed_reading.processed, np.arange(8))
+        assert response.outputs["peak"] == 14
+        assert response.outputs["First dropped"] == 0 and response.outputs["Second dropped"] == 0
+
+    # description: a member over its budget is dropped, then skips frames until it finishes
+    def test_budget_overrun(self):
+        fast, slow = FakePlugin(), FakePlugin(delay_sec=0.3)
+        members = [ PluginChainMember(make_module_info("Fast", fast), 0),
+                    PluginChainMember(make_module_info("Slow", slow), 10) ]
+        chain = make_chain(members, mode="parallel")
+        try:
+            response = chain.process_request_obj(make_request())
+            assert response.outputs["Slow dropped"] == 1
+            assert response.outputs["Fast dropped"] == 0
+            assert response.outputs["peak"] == 7
+
+            # still busy with the first frame
+            response = chain.process_request_obj(make_request())
+            assert response.outputs["Slow dropped"] == 2
+            assert len(fast.seen) == 2
+        finally:
+            for m in members:
+                m.stop()
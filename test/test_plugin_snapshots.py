@@ -0,0 +1,88 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+from types import SimpleNamespace
+
+from wasatch.ProcessedReading import ProcessedReading
+
+from enlighten.Plugins.PluginSnapshots import PluginSnapshots
+from enlighten.Plugins.PluginProcessWorker import PluginProcessWorker
+from enlighten.Plugins.SharedSpectrumRing import SharedSpectrumRing
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "plugins"))
+
+from EnlightenPlugin import EnlightenPluginRequest
+from Analysis.Despiking import Despiking
+
+class FakeConfig:
+    def get_float(self, section, key, default=None):
+        return default
+
+def make_ctl(unit="nm"):
+    return SimpleNamespace(config=FakeConfig(), graph=SimpleNamespace(get_x_axis_unit=lambda: unit))
+
+def make_processed_reading(pixels=256, seed=0):
+    rng = np.random.default_rng(seed)
+    processed = 1000 + rng.normal(0, 5, pixels)
+    processed[[40, 170]] += 20000
+    pr = ProcessedReading(d={ "Processed": processed, "Raw": processed + 100, "Dark": np.full(pixels, 100.0) })
+    return pr
+
+class TestPluginSnapshots:
+
+    # description: only processed is writeable, and it doesn't share ENLIGHTEN's buffer
+    def test_freeze(self):
+        snapshots = PluginSnapshots(make_ctl())
+        pr = make_processed_reading()
+        frozen = snapshots.freeze(pr)
+
+        frozen.processed[0] = -1
+        assert pr.processed[0] != -1
+
+        for name in [ "raw", "dark" ]:
+            with pytest.raises(ValueError):
+                getattr(frozen, name)[0] = -1
+
+    # description: a bundled plugin which despikes processed in-place
+    def test_despiking_plugin(self):
+        ctl = make_ctl()
+        snapshots = PluginSnapshots(ctl)
+        pr = make_processed_reading()
+        orig = np.copy(pr.processed)
+
+        plugin = Despiking(ctl)
+        settings = SimpleNamespace(wavelengths=np.linspace(800, 900, len(orig)), wavenumbers=None)
+        request = EnlightenPluginRequest(request_id=1, spec=None, settings=settings,
+            processed_reading=snapshots.freeze(pr), fields={ "tau": 7.0, "window size": 7 })
+
+        response = plugin.process_request(request)
+
+        despiked = response.series["Despiked"]["y"]
+        assert despiked[40] < 2000 and despiked[170] < 2000
+        np.testing.assert_array_equal(pr.processed, orig)
+
+    # description: process isolation ships processed through shared memory, and the child may edit it
+    def test_shared_memory_transport(self):
+        snapshots = PluginSnapshots(make_ctl())
+        pr = make_processed_reading()
+        frozen = snapshots.freeze(pr)
+
+        skeleton, arrays = PluginProcessWorker.split_reading(frozen)
+        assert (None, "processed") in arrays and (None, "raw") in arrays
+        assert skeleton.processed is None
+
+        ring = SharedSpectrumRing(slots=1, slot_bytes=64 * 1024)
+        try:
+            descriptors, leftovers = ring.pack(0, arrays)
+            assert not leftovers
+            unpacked = ring.unpack(0, descriptors)
+        finally:
+            ring.close()
+
+        joined = PluginProcessWorker.join_reading(skeleton, unpacked, settings=None)
+        np.testing.assert_array_equal(joined.processed, pr.processed)
+        joined.processed[0] = -1
+        with pytest.raises(ValueError):
+            joined.raw[0] = -1
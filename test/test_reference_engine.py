@@ -0,0 +1,119 @@
+import math
+import numpy as np
+
+from wasatch.ROI import ROI
+
+from enlighten.post_processing.ReferenceEngine import ReferenceEngine
+
+MAX_AU = 6.0
+
+def legacy_transmission(sample, ref, max_perc=None):
+    """ the original TransmissionFeature.process loop, less logging """
+    transmission = []
+    has_neg = False
+    for i in range(len(sample)):
+        value = 0
+        if ref[i] != 0:
+            try:
+                value = 100.0 * float(sample[i]) / float(ref[i])
+            except:
+                pass
+        if max_perc is not None:
+            value = min(value, max_perc)
+        transmission.append(value)
+        if value < 0:
+            has_neg = True
+    return transmission, has_neg
+
+def legacy_absorbance(trans):
+    """ the original AbsorbanceFeature.process loop """
+    saturated = False
+    absorbance = []
+    for t_perc in trans:
+        au = 0
+        t = t_perc / 100.0
+        if t != 0:
+            if t >= 0:
+                try:
+                    au = -1.0 * math.log10(t)
+                except:
+                    pass
+            else:
+                au = MAX_AU
+                saturated = True
+        absorbance.append(au)
+    return absorbance, saturated
+
+def example(pixels=1024, seed=0):
+    rng = np.random.default_rng(seed)
+    sample = rng.uniform(-50, 50000, pixels)
+    ref = rng.uniform(-50, 60000, pixels)
+    ref[[3, 10, 500]] = 0
+    sample[7] = np.nan
+    ref[20] = np.nan
+    sample[30] = -sample[30]
+    return sample, ref
+
+def same(a, b):
+    return np.array_equal(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64), equal_nan=True)
+
+class Settings:
+    def __init__(self, device_id, roi):
+        self.device_id = device_id
+        self.eeprom = self
+        self.roi = roi
+    def get_horizontal_roi(self):
+        return self.roi
+
+class Reading:
+    def __init__(self, reference, dark, cropped=False):
+        self.reference = reference
+        self.dark = dark
+        self.cropped = cropped
+    def is_cropped(self):
+        return self.cropped
+
+def crop(spectrum, roi=None):
+    return roi.crop(spectrum)
+
+class TestReferenceEngine:
+
+    # description: transmission and absorbance match the previous per-pixel implementation
+    def test_matches_legacy(self):
+        sample, ref = example()
+        for max_perc in [ None, 100, 25 ]:
+            expected, expected_neg = legacy_transmission(sample, ref, max_perc)
+            actual, has_neg = ReferenceEngine.transmission(sample, ref, max_perc)
+            assert same(actual, expected)
+            assert has_neg == expected_neg
+
+            # (numpy's log10 may differ from math.log10 in the last bit)
+            expected, expected_sat = legacy_absorbance(expected)
+            actual, saturated = ReferenceEngine.absorbance(actual, MAX_AU)
+            assert np.allclose(actual, expected, rtol=1e-14, atol=0, equal_nan=True)
+            assert saturated == expected_sat
+            assert actual[3] == 0 and not np.signbit(actual[3])
+            assert actual[7] == MAX_AU
+
+    # description: the dark-corrected, cropped reference is reused until the dark, reference or ROI changes
+    def test_cached_reference(self):
+        engine = ReferenceEngine()
+        reference = np.arange(100, 200, dtype=np.float64)
+        reference.flags.writeable = False
+        dark = np.full(100, 10.0)
+        settings = Settings("A", ROI(10, 89))
+
+        first = engine.get_reference(Reading(reference, np.copy(dark), cropped=True), settings, False, crop)
+        assert same(first, (reference - dark)[10:90])
+        assert engine.misses == 1
+
+        again = engine.get_reference(Reading(reference, np.copy(dark), cropped=True), settings, False, crop)
+        assert again is first and engine.hits == 1
+
+        # a new dark, reference or ROI is recomputed
+        engine.get_reference(Reading(reference, dark + 1, cropped=True), settings, False, crop)
+        engine.get_reference(Reading(np.copy(reference), dark + 1, cropped=True), settings, False, crop)
+        settings.roi = ROI(0, 49)
+        last = engine.get_reference(Reading(reference, dark + 1, cropped=True), settings, False, crop)
+        assert engine.misses == 4
+        assert same(last, (reference - dark - 1)[:50])